@@ -2,13 +2,19 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status,
 from ..services.chat import ChatService
 from ..utils.document_processor import DocumentProcessor, generate_widget_code
 from ..models.schemas import ChatRequest, ChatResponse, DocumentUploadResponse
+from ..models.bot import RetrievalPolicy
 from fastapi import Body
 from ..services.bot import BotService
+from ..services.warmup import WarmupService
+from ..services.bot_registry import BotRegistry
+from ..utils.memory import get_process_memory
+from ..services.vector_store import QUANTIZATION_MODES
 from .dependencies import get_current_active_user, auth_service
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 import uuid
 import os
+import hashlib
 import shutil
 import asyncio
 
@@ -16,6 +22,7 @@ router = APIRouter()
 chat_service = ChatService()
 doc_processor = DocumentProcessor()
 bot_service = BotService()
+bot_registry = BotRegistry()
 
 from ..log_config import logger
 
@@ -102,12 +109,57 @@ async def get_bot_documents(
         logger.error(f"Error in get_bot_documents endpoint: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error retrieving documents: {str(e)}")
 
+async def _verify_bot_owner(bot_id: str, user_id: str, authorization: Optional[str]):
+    token = None
+    if authorization and authorization.startswith("Bearer "):
+        token = authorization.split(" ")[1]
+    bots = await auth_service.get_user_bots(user_id, token)
+    if not any(bot["bot_id"] == bot_id for bot in bots):
+        logger.error(f"Access denied: User {user_id} attempted to access bot {bot_id}")
+        raise HTTPException(status_code=403, detail="Access denied to this bot")
+
+@router.get("/bots/{bot_id}/retrieval-policy", response_model=RetrievalPolicy)
+async def get_retrieval_policy(
+    bot_id: str,
+    current_user: dict = Depends(get_current_active_user),
+    authorization: str = Header(None)
+):
+    """Retrieval policy (k, score threshold, fallback k) the bot's chats use"""
+    try:
+        await _verify_bot_owner(bot_id, current_user["id"], authorization)
+        profile = await bot_registry.get_profile(bot_id)
+        return bot_registry.retrieval_policy(profile)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/bots/{bot_id}/retrieval-policy", response_model=RetrievalPolicy)
+async def update_retrieval_policy(
+    bot_id: str,
+    policy: RetrievalPolicy,
+    current_user: dict = Depends(get_current_active_user),
+    authorization: str = Header(None)
+):
+    """Set the bot's retrieval policy"""
+    try:
+        await _verify_bot_owner(bot_id, current_user["id"], authorization)
+        profile = await bot_registry.set_retrieval_policy(bot_id, policy)
+        logger.info(f"Updated retrieval policy for bot {bot_id}: {policy.model_dump()}")
+        return bot_registry.retrieval_policy(profile)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 from fastapi import Form
 
 @router.post("/upload", response_model=DocumentUploadResponse)
 async def upload_documents(
     company_name: str = Form(...),
     files: List[UploadFile] = File(...),
+    quantization: Optional[str] = Form(None),
+    embedding_model: Optional[str] = Form(None),
     current_user: dict = Depends(get_current_active_user)
 ):
     from ..log_config import logger
@@ -126,6 +178,18 @@ async def upload_documents(
                 detail="At least one file is required"
             )
 
+        if quantization and quantization.lower() not in QUANTIZATION_MODES:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Unsupported quantization: {quantization}. Use one of: {', '.join(QUANTIZATION_MODES)}."
+            )
+
+        if embedding_model and embedding_model not in bot_registry.allowed_models():
+            raise HTTPException(
+                status_code=422,
+                detail=f"Unsupported embedding model: {embedding_model}. Use one of: {', '.join(bot_registry.allowed_models())}."
+            )
+
         # Validate file types
         for file in files:
             ext = os.path.splitext(file.filename)[1].lower()
@@ -152,6 +216,7 @@ async def upload_documents(
             all_chunks = []
             all_filenames = []
             all_file_sizes = []
+            all_content_hashes = []
             
             for file in files:
                 file_ext = os.path.splitext(file.filename)[1].lower()
@@ -170,13 +235,15 @@ async def upload_documents(
                         with open(temp_path, "wb") as temp_file:
                             temp_file.write(content)
                             
-                        chunks = doc_processor.process_file(temp_path, file.filename)
+                        # PDF/DOCX parsing is CPU-bound; keep it off the event loop
+                        chunks = await asyncio.to_thread(doc_processor.process_file, temp_path, file.filename)
                         logger.info(f"Processed file {file.filename} ({file_size} bytes), got {len(chunks)} chunks")
                         
                         # Add chunks, filenames, and file sizes
                         all_chunks.extend(chunks)
                         all_filenames.extend([file.filename] * len(chunks))
                         all_file_sizes.extend([file_size] * len(chunks))
+                        all_content_hashes.extend([hashlib.sha256(content).hexdigest()] * len(chunks))
                         break
                         
                     except Exception as e:
@@ -191,7 +258,7 @@ async def upload_documents(
                             raise
             
             # Store in vector database with filenames and file sizes
-            await chat_service.process_documents(bot_id, user_id, all_chunks, all_filenames, all_file_sizes)
+            await chat_service.process_documents(bot_id, user_id, all_chunks, all_filenames, all_file_sizes, quantization=quantization, embedding_model=embedding_model, content_hashes=all_content_hashes)
             logger.info(f"Successfully stored {len(all_chunks)} chunks in vector database for bot {bot_id}")
             
             # Generate widget code
@@ -308,7 +375,19 @@ async def chat_with_bot_id(
 
 @router.get("/health")
 async def health_check():
-    """Health check endpoint that includes Qdrant status"""
+    """Health check endpoint that includes warm-up and Qdrant status"""
+    warmup_status = WarmupService().get_status()
+    if warmup_status["state"] in ("pending", "warming"):
+        # Don't touch Qdrant until warm-up has connected, or this request would block on it
+        return {
+            "status": "warming",
+            "timestamp": datetime.utcnow().isoformat(),
+            "services": {
+                "api": "healthy",
+                "warmup": warmup_status
+            }
+        }
+
     try:
         from ..services.vector_store import VectorStoreService
         vector_store = VectorStoreService()
@@ -319,6 +398,7 @@ async def health_check():
             "timestamp": datetime.utcnow().isoformat(),
             "services": {
                 "api": "healthy",
+                "warmup": warmup_status,
                 "qdrant": qdrant_health
             }
         }
@@ -328,9 +408,26 @@ async def health_check():
             "timestamp": datetime.utcnow().isoformat(),
             "services": {
                 "api": "healthy",
+                "warmup": warmup_status,
                 "qdrant": {
                     "status": "unhealthy",
                     "message": str(e)
                 }
             }
         }
+
+@router.get("/metrics")
+async def metrics():
+    """Runtime metrics for the retrieval pipeline"""
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "warmup": WarmupService().get_status(),
+        "embedding": chat_service.vector_store.get_embedding_stats(),
+        "ingestion": chat_service.vector_store.get_ingest_stats(),
+        "collections": chat_service.vector_store.get_collection_cache_stats(),
+        "exact_search": chat_service.vector_store.get_exact_search_stats(),
+        "retrieval_cache": chat_service.retrieval_cache.get_stats(),
+        "rerank": chat_service.reranker.get_stats(),
+        "answer_cache": chat_service.answer_cache.get_stats(),
+        "process": get_process_memory(),
+    }
@@ -31,6 +31,86 @@ class Settings(BaseSettings):
     QDRANT_PORT: int = int(os.getenv("QDRANT_PORT", "6333"))
     QDRANT_API_KEY: Optional[str] = os.getenv("QDRANT_API_KEY", None)
     QDRANT_URL: Optional[str] = os.getenv("QDRANT_URL", None)  # For cloud instances
+    QDRANT_PATH: Optional[str] = os.getenv("QDRANT_PATH", None)  # Embedded Qdrant: a storage directory or ":memory:"; no server needed
+    QDRANT_PREFER_GRPC: bool = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+    QDRANT_GRPC_PORT: int = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+    QDRANT_TIMEOUT: int = int(os.getenv("QDRANT_TIMEOUT", "30"))  # Seconds, per request
+    QDRANT_POOL_SIZE: int = int(os.getenv("QDRANT_POOL_SIZE", "20"))  # Max REST connections per client
+    QDRANT_POOL_KEEPALIVE: int = int(os.getenv("QDRANT_POOL_KEEPALIVE", "10"))  # Idle REST connections kept open
+    QDRANT_UPSERT_BATCH_SIZE: int = int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", "256"))  # Points per upsert request
+    QDRANT_UPSERT_PARALLELISM: int = int(os.getenv("QDRANT_UPSERT_PARALLELISM", "4"))  # Upsert requests in flight per upload
+    EXACT_SEARCH_ENABLED: bool = os.getenv("EXACT_SEARCH_ENABLED", "true").lower() == "true"  # In-process exact search for small bots
+    EXACT_SEARCH_MAX_POINTS: int = int(os.getenv("EXACT_SEARCH_MAX_POINTS", "5000"))  # Larger bots always use Qdrant
+    EXACT_SEARCH_MAX_MB: float = float(os.getenv("EXACT_SEARCH_MAX_MB", "128"))  # Memory budget for cached bot matrices
+    EXACT_SEARCH_DTYPE: str = os.getenv("EXACT_SEARCH_DTYPE", "float32")  # "float16" halves memory at some CPU cost
+    EXACT_SEARCH_TTL_SECONDS: float = float(os.getenv("EXACT_SEARCH_TTL_SECONDS", "300"))  # Bounds staleness for searches without a content version
+    QDRANT_STORAGE_MODE: str = os.getenv("QDRANT_STORAGE_MODE", "per_bot")  # "per_bot" (bot_<id> collections) or "shared"
+    QDRANT_SHARED_COLLECTION: str = os.getenv("QDRANT_SHARED_COLLECTION", "bots_shared")
+    BOT_REGISTRY_COLLECTION: str = os.getenv("BOT_REGISTRY_COLLECTION", "bot_registry")
+    DOCUMENT_MANIFEST_COLLECTION: str = os.getenv("DOCUMENT_MANIFEST_COLLECTION", "document_manifest")
+    BOT_PROFILE_CACHE_TTL_SECONDS: float = float(os.getenv("BOT_PROFILE_CACHE_TTL_SECONDS", "30"))
+    # Chats reuse a profile read this recently; bounds how long cached results outlive another worker's upload
+    BOT_PROFILE_REVALIDATE_SECONDS: float = float(os.getenv("BOT_PROFILE_REVALIDATE_SECONDS", "2"))
+    QDRANT_QUANTIZATION: str = os.getenv("QDRANT_QUANTIZATION", "none")  # Default for new bots: "none", "scalar" or "binary"
+    QDRANT_ORIGINALS_ON_DISK: bool = os.getenv("QDRANT_ORIGINALS_ON_DISK", "true").lower() == "true"  # Only for quantized collections
+    QDRANT_SEARCH_OVERSAMPLING: float = float(os.getenv("QDRANT_SEARCH_OVERSAMPLING", "2.0"))
+    QDRANT_SEARCH_RESCORE: bool = os.getenv("QDRANT_SEARCH_RESCORE", "true").lower() == "true"
+
+    # Retrieval Settings (defaults for bots without their own retrieval policy)
+    RETRIEVAL_TOP_K: int = int(os.getenv("RETRIEVAL_TOP_K", "5"))
+    RETRIEVAL_SCORE_THRESHOLD: float = float(os.getenv("RETRIEVAL_SCORE_THRESHOLD", "0.2"))
+    RETRIEVAL_FALLBACK_K: int = int(os.getenv("RETRIEVAL_FALLBACK_K", "8"))
+    RETRIEVAL_MODE: str = os.getenv("RETRIEVAL_MODE", "dense")  # dense, hybrid
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+    MMR_ENABLED: bool = os.getenv("MMR_ENABLED", "true").lower() == "true"
+    MMR_LAMBDA: float = float(os.getenv("MMR_LAMBDA", "0.7"))
+    MMR_DUPLICATE_THRESHOLD: float = float(os.getenv("MMR_DUPLICATE_THRESHOLD", "0.95"))
+    RETRIEVAL_CACHE_MAX_ENTRIES: int = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "10000"))
+    RETRIEVAL_CACHE_MAX_MB: float = float(os.getenv("RETRIEVAL_CACHE_MAX_MB", "32"))
+    RETRIEVAL_CACHE_TTL_SECONDS: float = float(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "3600"))
+
+    # Rerank Settings (cross-encoder stage after vector search)
+    RERANK_ENABLED: bool = os.getenv("RERANK_ENABLED", "false").lower() == "true"  # Default for bots without their own policy
+    RERANK_MODEL_NAME: str = os.getenv("RERANK_MODEL_NAME", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    RERANK_TOP_N: int = int(os.getenv("RERANK_TOP_N", "3"))
+    RERANK_BUDGET_MS: float = float(os.getenv("RERANK_BUDGET_MS", "150"))
+    RERANK_MAX_LENGTH: int = int(os.getenv("RERANK_MAX_LENGTH", "256"))  # Tokens per (query, chunk) pair
+
+    # Hybrid (sparse + dense) Search Settings
+    HYBRID_SPARSE_VECTORS: bool = os.getenv("HYBRID_SPARSE_VECTORS", "true").lower() == "true"  # Index sparse vectors in new collections
+    SPARSE_VECTOR_NAME: str = os.getenv("SPARSE_VECTOR_NAME", "text-sparse")
+    SPARSE_AVG_DOC_TERMS: float = float(os.getenv("SPARSE_AVG_DOC_TERMS", "150"))
+    HYBRID_CANDIDATES: int = int(os.getenv("HYBRID_CANDIDATES", "20"))  # Per leg, before fusion
+    HYBRID_RRF_K: int = int(os.getenv("HYBRID_RRF_K", "60"))
+    HYBRID_LEXICAL_TOP_N: int = int(os.getenv("HYBRID_LEXICAL_TOP_N", "3"))  # Top sparse hits kept regardless of the score threshold
+
+    # Semantic Answer Cache Settings (reuse answers to near-duplicate questions)
+    ANSWER_CACHE_ENABLED: bool = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_THRESHOLD: float = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))  # Query cosine needed for a hit
+    ANSWER_CACHE_TTL_SECONDS: float = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+    ANSWER_CACHE_MAX_PER_BOT: int = int(os.getenv("ANSWER_CACHE_MAX_PER_BOT", "500"))
+    ANSWER_CACHE_MAX_BOTS: int = int(os.getenv("ANSWER_CACHE_MAX_BOTS", "1000"))
+
+    # Embedding Settings
+    EMBEDDING_MODEL_NAME: str = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "torch")  # "torch" or "onnx"
+    EMBEDDING_MODELS_ALLOWED: str = os.getenv("EMBEDDING_MODELS_ALLOWED", "")  # Comma-separated models bots may opt into
+    EMBEDDING_MAX_LOADED_MODELS: int = int(os.getenv("EMBEDDING_MAX_LOADED_MODELS", "2"))
+    EMBEDDING_MODEL_IDLE_SECONDS: float = float(os.getenv("EMBEDDING_MODEL_IDLE_SECONDS", "1800"))  # Unload idle non-default models
+    EMBEDDING_NUM_THREADS: int = int(os.getenv("EMBEDDING_NUM_THREADS", "0"))  # 0 = library default
+    ONNX_MODEL_DIR: str = os.getenv("ONNX_MODEL_DIR", "models/onnx")
+    ONNX_QUANTIZE: bool = os.getenv("ONNX_QUANTIZE", "true").lower() == "true"  # Dynamic int8 weights
+    QUERY_BATCH_WINDOW_MS: float = float(os.getenv("QUERY_BATCH_WINDOW_MS", "5"))  # How long to wait for more queries
+    QUERY_BATCH_MAX_SIZE: int = int(os.getenv("QUERY_BATCH_MAX_SIZE", "32"))
+    QUERY_CACHE_MAX_ENTRIES: int = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "4096"))
+    QUERY_CACHE_TTL_SECONDS: float = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600"))
+    # Off by default; point it at an absolute path on a persistent disk (e.g. /var/data/embedding_cache.sqlite3)
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "")  # Empty disables the cache
+    EMBEDDING_CACHE_MAX_ENTRIES: int = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))  # ~1.5KB each at 384 dims
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))  # Model batch size for document chunks
+    INGEST_STREAMING: bool = os.getenv("INGEST_STREAMING", "true").lower() == "true"  # Encode and upsert batch by batch
+    INGEST_STREAM_BATCH_SIZE: int = int(os.getenv("INGEST_STREAM_BATCH_SIZE", "256"))
+    INGEST_EXECUTOR_WORKERS: int = int(os.getenv("INGEST_EXECUTOR_WORKERS", "1"))  # Concurrent document encodes
 
     class Config:
         env_file = ".env"
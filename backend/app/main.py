@@ -1,9 +1,11 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from .api.endpoints import router as main_router
 from .api.auth import router as auth_router
 from .core.config import get_settings
+from .services.warmup import WarmupService
 from .utils.json_encoder import CustomJSONEncoder
 import json
 
@@ -17,7 +19,14 @@ class CustomJSONResponse(JSONResponse):
             ensure_ascii=False
         ).encode("utf-8")
 
-app = FastAPI(title="Chatbot Builder API", default_response_class=CustomJSONResponse)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the embedding model and connect to Qdrant/Supabase in the background
+    # so the server binds immediately and /api/health reports "warming" meanwhile
+    WarmupService().start()
+    yield
+
+app = FastAPI(title="Chatbot Builder API", default_response_class=CustomJSONResponse, lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
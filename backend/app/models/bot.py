@@ -1,6 +1,6 @@
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Literal, Optional
 
 class Bot(BaseModel):
     id: str
@@ -19,4 +19,47 @@ class Bot(BaseModel):
         for k, v in d.items():
             if isinstance(v, datetime):
                 d[k] = v.isoformat()
-        return d
\ No newline at end of file
+        return d
+
+class RetrievalPolicy(BaseModel):
+    """How many chunks a bot retrieves and which of them reach the prompt"""
+    k: int = Field(5, ge=1, le=50)  # Chunks considered when scores are good
+    score_threshold: float = Field(0.2, ge=-1.0, le=1.0)
+    fallback_k: int = Field(8, ge=1, le=50)  # Chunks used, regardless of score, when none clear the threshold
+    mode: Literal["dense", "hybrid"] = "dense"  # hybrid adds a lexical (sparse) leg for codes and names
+    mmr: bool = True  # Diversify candidates with maximal marginal relevance
+    mmr_lambda: float = Field(0.7, ge=0.0, le=1.0)  # 1.0 ranks by relevance only
+    duplicate_threshold: float = Field(0.95, ge=0.0, le=1.0)  # Cosine at which a chunk counts as a near-duplicate
+    rerank: bool = False  # Reorder candidates with a cross-encoder and keep rerank_top_n
+    rerank_top_n: int = Field(3, ge=1, le=50)
+    context_token_budget: int = Field(1500, ge=100, le=30000)  # Estimated tokens of document context per prompt
+    answer_cache: bool = True  # Reuse the answer to a near-duplicate earlier question
+    answer_cache_threshold: float = Field(0.95, ge=0.0, le=1.0)  # Query cosine needed to reuse an answer
+
+    @property
+    def fetch_k(self) -> int:
+        """Largest k either branch needs, so one search serves both"""
+        return max(self.k, self.fallback_k)
+
+
+class BotProfile(BaseModel):
+    """Per-bot retrieval configuration stored in the bot registry"""
+    bot_id: str
+    embedding_model: str
+    embedding_dim: Optional[int] = None  # Unknown for bots created before the registry existed
+    quantization: Optional[str] = None
+    content_version: str = ""  # Changes whenever the bot's documents change; keys retrieval caches
+    retrieval: Optional[RetrievalPolicy] = None  # None uses the RETRIEVAL_* settings
+    created_at: Optional[str] = None
+
+
+class DocumentRecord(BaseModel):
+    """One uploaded document in a bot's document manifest"""
+    bot_id: str
+    document_key: str  # Content hash of the file, or "filename:<name>" for chunks stored without one
+    filename: str
+    file_size: int = 0
+    chunk_count: int = 0
+    content_hash: Optional[str] = None
+    preview: str = ""
+    created_at: Optional[str] = None
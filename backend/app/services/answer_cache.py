@@ -0,0 +1,122 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Hashable, Optional
+
+import numpy as np
+
+
+class _BotAnswers:
+    """One bot's cached questions (as normalized vectors) and answers.
+
+    Arrays grow by doubling up to ``capacity``, then act as a ring buffer that
+    overwrites the oldest entry, so quiet bots stay small.
+    """
+
+    def __init__(self, version: Hashable, dim: int, capacity: int):
+        self.version = version
+        self.capacity = capacity
+        initial = min(16, capacity)
+        self.vectors = np.zeros((initial, dim), dtype=np.float32)
+        self.answers = [None] * initial
+        self.expires_at = np.zeros(initial, dtype=np.float64)
+        self.llm_seconds = np.zeros(initial, dtype=np.float64)
+        self.size = 0
+        self.next = 0
+
+    def _grow(self):
+        new_size = min(self.capacity, len(self.answers) * 2)
+        extra = new_size - len(self.answers)
+        self.vectors = np.vstack([self.vectors, np.zeros((extra, self.vectors.shape[1]), dtype=np.float32)])
+        self.answers.extend([None] * extra)
+        self.expires_at = np.concatenate([self.expires_at, np.zeros(extra)])
+        self.llm_seconds = np.concatenate([self.llm_seconds, np.zeros(extra)])
+
+    def put(self, vector: np.ndarray, answer: str, expires_at: float, llm_seconds: float):
+        if self.size == len(self.answers) < self.capacity:
+            self._grow()
+            self.next = self.size
+        slot = self.next
+        self.vectors[slot] = vector
+        self.answers[slot] = answer
+        self.expires_at[slot] = expires_at
+        self.llm_seconds[slot] = llm_seconds
+        self.next = (slot + 1) % len(self.answers)
+        self.size = min(self.size + 1, len(self.answers))
+
+
+class SemanticAnswerCache:
+    """Per-bot cache of generated answers, looked up by question similarity.
+
+    A question whose embedding has cosine similarity >= the threshold with a cached
+    question gets that question's answer. Entries belong to a bot version (content
+    version plus retrieval policy); a different version discards the bot's entries.
+    Each bot keeps its ``max_per_bot`` newest answers; bots beyond ``max_bots`` are
+    dropped least recently used first.
+    """
+
+    def __init__(self, max_per_bot: int = 500, max_bots: int = 1000, ttl_seconds: Optional[float] = 3600):
+        self.max_per_bot = max(1, max_per_bot)
+        self.max_bots = max(1, max_bots)
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self._bots: "OrderedDict[str, _BotAnswers]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_llm_seconds = 0.0
+
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def get(self, bot_id: str, version: Hashable, query_vector: np.ndarray, threshold: float) -> Optional[str]:
+        """Cached answer to the most similar earlier question, if it clears the threshold"""
+        query = self._normalize(query_vector)
+        with self._lock:
+            entry = self._bots.get(bot_id)
+            answer = None
+            if entry is not None and entry.version == version and entry.size and entry.vectors.shape[1] == len(query):
+                self._bots.move_to_end(bot_id)
+                scores = entry.vectors[:entry.size] @ query
+                scores[entry.expires_at[:entry.size] <= time.monotonic()] = -np.inf
+                best = int(np.argmax(scores))
+                if scores[best] >= threshold:
+                    answer = entry.answers[best]
+                    self.saved_llm_seconds += float(entry.llm_seconds[best])
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return answer
+
+    def put(self, bot_id: str, version: Hashable, query_vector: np.ndarray, answer: str, llm_seconds: float = 0.0):
+        query = self._normalize(query_vector)
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else float("inf")
+        with self._lock:
+            entry = self._bots.get(bot_id)
+            if entry is None or entry.version != version or entry.vectors.shape[1] != len(query):
+                entry = _BotAnswers(version, len(query), self.max_per_bot)
+                self._bots[bot_id] = entry
+            self._bots.move_to_end(bot_id)
+            entry.put(query, answer, expires_at, llm_seconds)
+            while len(self._bots) > self.max_bots:
+                self._bots.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._bots.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "bots": len(self._bots),
+                "entries": sum(entry.size for entry in self._bots.values()),
+                "max_per_bot": self.max_per_bot,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "saved_llm_seconds": round(self.saved_llm_seconds, 3),
+            }
@@ -30,24 +30,33 @@ class AuthService:
             return
         with self._lock:
             if not self._initialized:
-                logger.info(f"Initializing Supabase client with URL: {settings.VITE_SUPABASE_URL}")
-                if not settings.VITE_SUPABASE_URL or not settings.VITE_SUPABASE_ANON_KEY:
-                    raise ValueError("Supabase URL or Anon Key not set in environment variables")
-                    
-                # Initialize client in a clean state
-                try:
-                    self._client = create_client(settings.VITE_SUPABASE_URL, settings.VITE_SUPABASE_ANON_KEY)
-                    # Clear any existing session
-                    self._client.auth.sign_out()
-                    logger.info("Supabase client initialized successfully")
-                except Exception as e:
-                    logger.error(f"Error initializing Supabase client: {str(e)}")
-                    raise
-                
+                # The Supabase client is created on first use so that importing
+                # the API modules does not block application startup
+                self._client_lock = Lock()
                 self._initialized = True
 
+    def _init_client(self):
+        logger.info(f"Initializing Supabase client with URL: {settings.VITE_SUPABASE_URL}")
+        if not settings.VITE_SUPABASE_URL or not settings.VITE_SUPABASE_ANON_KEY:
+            raise ValueError("Supabase URL or Anon Key not set in environment variables")
+            
+        # Initialize client in a clean state
+        try:
+            client = create_client(settings.VITE_SUPABASE_URL, settings.VITE_SUPABASE_ANON_KEY)
+            # Clear any existing session
+            client.auth.sign_out()
+            logger.info("Supabase client initialized successfully")
+        except Exception as e:
+            logger.error(f"Error initializing Supabase client: {str(e)}")
+            raise
+        self._client = client
+
     @property
     def client(self) -> Client:
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._init_client()
         return self._client
 
     async def sign_up(self, email: str, password: str) -> Dict:
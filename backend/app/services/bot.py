@@ -1,6 +1,8 @@
 from fastapi import HTTPException, status
 from .auth import AuthService
 from .vector_store import VectorStoreService
+from .bot_registry import BotRegistry
+from .document_manifest import DocumentManifestService
 from ..log_config import logger
 
 from threading import Lock
@@ -25,6 +27,8 @@ class BotService:
             if not self._initialized:
                 self.auth_service = AuthService()
                 self.vector_store = VectorStoreService()
+                self.bot_registry = BotRegistry()
+                self.document_manifest = DocumentManifestService()
                 self._initialized = True
 
     async def delete_bot(self, bot_id: str, user_id: str, token: str = None) -> None:
@@ -38,14 +42,29 @@ class BotService:
                     detail="Access denied to this bot"
                 )
             
-            # Delete vector store collection first
-            collection_name = f"bot_{bot_id}"
+            # Delete vector store data first; the version bump stops cached results being served meanwhile
             try:
-                self.vector_store.delete_collection(collection_name)
-                logger.info(f"Successfully deleted Qdrant collection: {collection_name}")
+                profile = await self.bot_registry.bump_content_version(bot_id)
+            except Exception as e:
+                logger.error(f"Error bumping content version for bot {bot_id}: {str(e)}")
+                # Continue with the deletion; caches expire on their own TTLs
+                profile = await self.bot_registry.get_profile(bot_id)
+            collection_name = self.vector_store.collection_for_bot(bot_id, profile.embedding_model)
+            bot_filter = self.vector_store.tenant_filter(bot_id)
+            try:
+                if bot_filter is not None:
+                    # Shared collection: only remove this bot's points
+                    await self.vector_store.delete_points_by_filter_async(collection_name, bot_filter)
+                    logger.info(f"Successfully deleted points for bot {bot_id} from {collection_name}")
+                else:
+                    await self.vector_store.delete_collection_async(collection_name)
+                    logger.info(f"Successfully deleted Qdrant collection: {collection_name}")
             except Exception as e:
                 logger.error(f"Error deleting vector store collection: {str(e)}")
                 # Continue with database deletion even if vector store deletion fails
+
+            await self.document_manifest.delete_bot_documents(bot_id)
+            await self.bot_registry.delete_profile(bot_id)
             
             # Delete bot from database using authenticated client
             if token:
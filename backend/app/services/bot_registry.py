@@ -0,0 +1,220 @@
+import time
+import uuid
+from datetime import datetime
+from threading import Lock
+from typing import Optional
+
+from qdrant_client.http import models
+
+from ..core.config import get_settings
+from ..log_config import logger
+from ..models.bot import BotProfile, RetrievalPolicy
+from ..utils.cache import LRUCache
+from .vector_store import PAYLOAD_ONLY_VECTOR, VectorStoreService
+
+settings = get_settings()
+
+# Stable namespace so a bot's registry point id can be derived from its bot_id
+_REGISTRY_NAMESPACE = uuid.UUID("6f1c1c52-5a1e-4d3b-9a53-3f3c1b8f0a7e")
+
+
+class BotRegistry:
+    """Records each bot's embedding model, dimension and retrieval settings.
+
+    Profiles live in a small Qdrant collection (one point per bot, payload only)
+    so every worker and the public chat path can read them without Supabase.
+    Reads are cached in-process for BOT_PROFILE_CACHE_TTL_SECONDS. content_version keys
+    the retrieval and answer caches and another worker may have just changed it, so
+    the chat path revalidates profiles older than BOT_PROFILE_REVALIDATE_SECONDS and
+    read-modify-write updates always read the registry (max_age=0).
+    """
+    _instance = None
+    _lock = Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(BotRegistry, cls).__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if not self._initialized:
+                self.vector_store = VectorStoreService()
+                self.collection_name = settings.BOT_REGISTRY_COLLECTION
+                self._cache = LRUCache(max_entries=10000, ttl_seconds=settings.BOT_PROFILE_CACHE_TTL_SECONDS)
+                self._validated_at = LRUCache(max_entries=10000)  # Monotonic time each cached profile was last read or written
+                self._collection_ready = False
+                self._initialized = True
+
+    @staticmethod
+    def _point_id(bot_id: str) -> str:
+        return str(uuid.uuid5(_REGISTRY_NAMESPACE, bot_id))
+
+    def default_profile(self, bot_id: str) -> BotProfile:
+        """Profile for bots that predate the registry: they were built with the default model"""
+        return BotProfile(bot_id=bot_id, embedding_model=settings.EMBEDDING_MODEL_NAME)
+
+    @staticmethod
+    def retrieval_policy(profile: BotProfile) -> RetrievalPolicy:
+        """The bot's own retrieval policy, or the RETRIEVAL_* defaults"""
+        if profile.retrieval is not None:
+            return profile.retrieval
+        return RetrievalPolicy(
+            k=settings.RETRIEVAL_TOP_K,
+            score_threshold=settings.RETRIEVAL_SCORE_THRESHOLD,
+            fallback_k=settings.RETRIEVAL_FALLBACK_K,
+            mode=settings.RETRIEVAL_MODE,
+            mmr=settings.MMR_ENABLED,
+            mmr_lambda=settings.MMR_LAMBDA,
+            duplicate_threshold=settings.MMR_DUPLICATE_THRESHOLD,
+            rerank=settings.RERANK_ENABLED,
+            rerank_top_n=settings.RERANK_TOP_N,
+            context_token_budget=settings.CONTEXT_TOKEN_BUDGET,
+            answer_cache=settings.ANSWER_CACHE_ENABLED,
+            answer_cache_threshold=settings.ANSWER_CACHE_THRESHOLD,
+        )
+
+    async def _ensure_collection(self):
+        if self._collection_ready:
+            return
+        await self.vector_store.ensure_payload_collection_async(self.collection_name)
+        self._collection_ready = True
+
+    async def get_profile(self, bot_id: str, max_age: Optional[float] = None) -> BotProfile:
+        """Return a bot's profile, falling back to the default profile if it has none.
+
+        max_age bounds, in seconds, how long ago a cached profile must have been read
+        from (or written to) the registry to be reused; 0 always reads the registry.
+        """
+        profile = self._cache.get(bot_id)
+        if profile is not None:
+            validated_at = self._validated_at.get(bot_id)
+            if max_age is None or (validated_at is not None and time.monotonic() - validated_at <= max_age):
+                return profile
+        cached = profile
+
+        try:
+            await self._ensure_collection()
+            points = await self.vector_store.async_client.retrieve(
+                collection_name=self.collection_name,
+                ids=[self._point_id(bot_id)],
+                with_payload=True,
+            )
+            profile = BotProfile(**points[0].payload) if points else self.default_profile(bot_id)
+        except Exception as e:
+            if cached is not None:
+                # Keep the bot's model, but an unverified content_version must not key any cache
+                logger.warning(f"Could not refresh bot registry for {bot_id}, using cached profile: {str(e)}")
+                return cached.model_copy(update={"content_version": ""})
+            # Don't fail chats because the registry is unreachable; don't cache the guess either
+            logger.warning(f"Could not read bot registry for {bot_id}, using default profile: {str(e)}")
+            return self.default_profile(bot_id)
+
+        self._remember(profile)
+        return profile
+
+    def _remember(self, profile: BotProfile):
+        self._cache.set(profile.bot_id, profile)
+        self._validated_at.set(profile.bot_id, time.monotonic())
+
+    async def create_profile(
+        self,
+        bot_id: str,
+        embedding_model: Optional[str] = None,
+        quantization: Optional[str] = None,
+        retrieval: Optional[RetrievalPolicy] = None,
+    ) -> BotProfile:
+        """Register a new bot with its embedding model and dimension"""
+        embedding_model = embedding_model or settings.EMBEDDING_MODEL_NAME
+        embedder = await self.vector_store.embedder_async(embedding_model)
+        profile = BotProfile(
+            bot_id=bot_id,
+            embedding_model=embedding_model,
+            embedding_dim=embedder.dimension,
+            quantization=quantization,
+            content_version=uuid.uuid4().hex,
+            retrieval=retrieval,
+            created_at=datetime.utcnow().isoformat(),
+        )
+        await self.save_profile(profile)
+        return profile
+
+    async def save_profile(self, profile: BotProfile):
+        await self._ensure_collection()
+        await self.vector_store.async_client.upsert(
+            collection_name=self.collection_name,
+            points=[
+                models.PointStruct(
+                    id=self._point_id(profile.bot_id),
+                    vector=PAYLOAD_ONLY_VECTOR,
+                    payload=profile.model_dump(),
+                )
+            ],
+        )
+        self._remember(profile)
+        logger.info(f"Saved profile for bot {profile.bot_id}: model={profile.embedding_model}, dim={profile.embedding_dim}")
+
+    async def bump_content_version(self, bot_id: str) -> BotProfile:
+        """Mark a bot's documents as changed so results cached under the old version are never served"""
+        profile = (await self.get_profile(bot_id, max_age=0)).model_copy()
+        profile.content_version = uuid.uuid4().hex
+        await self.save_profile(profile)
+        return profile
+
+    async def backfill_content_versions(self) -> int:
+        """One-off: give registered bots that predate content versions one, so their results can be cached.
+
+        Returns how many profiles were updated. Bots without a registry profile get a
+        version with their next upload.
+        """
+        await self._ensure_collection()
+        client = self.vector_store.async_client
+        updated = 0
+        offset = None
+        while True:
+            points, offset = await client.scroll(
+                collection_name=self.collection_name,
+                limit=256,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False,
+            )
+            for point in points:
+                profile = BotProfile(**point.payload)
+                if not profile.content_version:
+                    await self.bump_content_version(profile.bot_id)
+                    updated += 1
+            if offset is None:
+                break
+        return updated
+
+    async def set_retrieval_policy(self, bot_id: str, policy: Optional[RetrievalPolicy]) -> BotProfile:
+        """Store a bot's retrieval policy (None restores the defaults)"""
+        profile = (await self.get_profile(bot_id, max_age=0)).model_copy()
+        profile.retrieval = policy
+        await self.save_profile(profile)
+        return profile
+
+    async def delete_profile(self, bot_id: str):
+        self._cache.pop(bot_id)
+        self._validated_at.pop(bot_id)
+        try:
+            await self._ensure_collection()
+            await self.vector_store.async_client.delete(
+                collection_name=self.collection_name,
+                points_selector=models.PointIdsList(points=[self._point_id(bot_id)]),
+            )
+            logger.info(f"Deleted profile for bot {bot_id}")
+        except Exception as e:
+            logger.error(f"Error deleting profile for bot {bot_id}: {str(e)}")
+
+    def allowed_models(self) -> list:
+        """Embedding models bots may opt into; the default model is always allowed"""
+        extra = [name.strip() for name in settings.EMBEDDING_MODELS_ALLOWED.split(",") if name.strip()]
+        return list(dict.fromkeys([settings.EMBEDDING_MODEL_NAME] + extra))
@@ -1,6 +1,9 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 import pickle
 import asyncio
+import hashlib
+import time
+import numpy as np
 from datetime import datetime
 from fastapi import HTTPException, status
 from ..log_config import logger
@@ -8,6 +11,14 @@ from ..core.config import get_settings
 from .vector_store import VectorStoreService
 from .auth import AuthService
 from .ai_service import AIService
+from .bot_registry import BotRegistry
+from .document_manifest import DocumentManifestService
+from .reranker import Reranker
+from .mmr import mmr_select
+from .context_packer import estimate_tokens, pack_context
+from .answer_cache import SemanticAnswerCache
+from ..models.bot import BotProfile, RetrievalPolicy
+from ..utils.cache import LRUCache
 from threading import Lock
 
 settings = get_settings()
@@ -33,11 +44,95 @@ class ChatService:
                 self.vector_store = VectorStoreService()
                 self.auth_service = AuthService()
                 self.ai_service = AIService()
+                self.bot_registry = BotRegistry()
+                self.document_manifest = DocumentManifestService()
+                self.reranker = Reranker()
+                self.retrieval_cache = LRUCache(
+                    max_entries=settings.RETRIEVAL_CACHE_MAX_ENTRIES,
+                    ttl_seconds=settings.RETRIEVAL_CACHE_TTL_SECONDS,
+                    max_bytes=int(settings.RETRIEVAL_CACHE_MAX_MB * 1024 * 1024),
+                    sizeof=self._results_size,
+                )
+                self.answer_cache = SemanticAnswerCache(
+                    max_per_bot=settings.ANSWER_CACHE_MAX_PER_BOT,
+                    max_bots=settings.ANSWER_CACHE_MAX_BOTS,
+                    ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+                )
                 self._initialized = True
     
-    def _get_collection_name(self, bot_id: str) -> str:
-        """Generate collection name for a bot"""
-        return f"bot_{bot_id}"
+    @staticmethod
+    def _results_size(results: List[Dict]) -> int:
+        # Rough footprint: the chunk text and vector dominate, plus the dicts and metadata around them
+        return sum(len(r.get("text", "")) + 512 + (r["vector"].nbytes if "vector" in r else 0) for r in results)
+
+    async def _search(self, bot_id: str, profile: BotProfile, collection_name: str, query: str, limit: int, mode: str = "dense", with_vectors: bool = False) -> List[Dict]:
+        """Top-k search, served from the retrieval cache while the bot's documents are unchanged.
+
+        Entries are keyed by the bot's content version, which process_documents and
+        delete_bot replace, so an upload or deletion makes every older entry unreachable.
+        Bots without a version (no upload since versions were introduced) are not cached.
+        """
+        cache_key = None
+        if profile.content_version:
+            query_hash = hashlib.sha256(self.vector_store._normalize_query(query, profile.embedding_model).encode()).hexdigest()
+            cache_key = (bot_id, profile.content_version, mode, with_vectors, limit, query_hash)
+            results = self.retrieval_cache.get(cache_key)
+            if results is not None:
+                return results
+
+        results = await self.vector_store.search_async(collection_name, query, limit=limit, model_name=profile.embedding_model, bot_id=bot_id, mode=mode, with_vectors=with_vectors, content_version=profile.content_version)
+        # search_async reports failures as no results, so empty lists are never cached
+        if cache_key is not None and results:
+            self.retrieval_cache.set(cache_key, results)
+        return results
+
+    async def _select_chunks(self, query: str, results: List[Dict], policy: RetrievalPolicy) -> List[Dict]:
+        """Pick the search results that go into the prompt, best first"""
+        # 🔹 Lowered threshold (MMR and reranking choose from a wider pool)
+        pool_size = policy.fetch_k if policy.mmr or policy.rerank else policy.k
+        # In hybrid mode the score is dense cosine; exact-term matches the lexical leg ranked
+        # highly (codes, names) often score low on it, so they skip the threshold
+        lexical_top_n = settings.HYBRID_LEXICAL_TOP_N if policy.mode == "hybrid" else 0
+        candidates = [
+            r for r in results[:pool_size]
+            if (r.get("score", 0) >= policy.score_threshold or (r.get("sparse_rank") or lexical_top_n + 1) <= lexical_top_n)
+            and r.get("text", "").strip()
+        ]
+        keep = policy.k
+        
+        # 🔹 Fallback broader selection
+        if not candidates:
+            candidates = [r for r in results[:policy.fallback_k] if r.get("text")]
+            keep = policy.fallback_k
+        
+        # 🔹 Diversify: overlapping chunks from the splitter mostly repeat each other
+        if policy.mmr and len(candidates) > 1 and all("vector" in r for r in candidates):
+            relevance = np.array([r.get("score", 0) for r in candidates])
+            if lexical_top_n:
+                # A top lexical match counts as relevant as the best dense hit, as it did in fusion
+                lexical = np.array([(r.get("sparse_rank") or lexical_top_n + 1) <= lexical_top_n for r in candidates])
+                relevance[lexical] = np.maximum(relevance[lexical], relevance.max())
+            order = mmr_select(
+                relevance,
+                np.stack([r["vector"] for r in candidates]),
+                # The reranker makes the final cut, so only drop near-duplicates before it
+                k=len(candidates) if policy.rerank else keep,
+                lambda_mult=policy.mmr_lambda,
+                duplicate_threshold=policy.duplicate_threshold,
+            )
+            candidates = [candidates[i] for i in order]
+        elif not policy.rerank:
+            candidates = candidates[:keep]
+        
+        # 🔹 Optional cross-encoder rerank; when skipped, the same number of chunks in search order
+        if policy.rerank:
+            reranked = await self.reranker.rerank(query, candidates, policy.rerank_top_n)
+            candidates = reranked if reranked is not None else candidates[:policy.rerank_top_n]
+        return candidates
+
+    def _get_collection_name(self, bot_id: str, model_name: Optional[str] = None) -> str:
+        """Generate collection name for a bot (a shared collection in shared storage mode)"""
+        return self.vector_store.collection_for_bot(bot_id, model_name)
     
     async def verify_bot_access(self, bot_id: str, user_id: Optional[str], token: str = None) -> dict:
         """Verify user has access to the bot"""
@@ -88,56 +183,35 @@ class ChatService:
             await self.verify_bot_access(bot_id, user_id, token)
             
             # Get the collection name for this bot
-            collection_name = self._get_collection_name(bot_id)
+            profile = await self.bot_registry.get_profile(bot_id)
+            collection_name = self._get_collection_name(bot_id, profile.embedding_model)
+            bot_filter = self.vector_store.tenant_filter(bot_id)
             logger.info(f"Looking for documents in collection: {collection_name}")
             
-            # Get collection info from Qdrant
-            collection_info = self.vector_store.get_collection_info(collection_name)
-            
-            if not collection_info:
-                logger.info(f"No collection found for bot {bot_id}")
-                return {"documents": []}
-            
             try:
-                scroll_result = self.vector_store.scroll_collection(collection_name, limit=100)
-                points = scroll_result.get("points", [])
+                records = await self.document_manifest.get_documents(bot_id)
+                if records is None:
+                    # Bot predates the manifest: build it once from the chunks
+                    # (existence is usually answered from the known-collections registry)
+                    if not await self.vector_store.collection_exists_async(collection_name):
+                        logger.info(f"No collection found for bot {bot_id}")
+                        return {"documents": []}
+                    records = await self.document_manifest.rebuild(bot_id, collection_name, bot_filter)
                 
-                if not points:
+                if not records:
                     logger.info(f"No documents found in collection {collection_name}")
                     return {"documents": []}
                 
-                # Group points by filename
-                file_groups = {}
-                for point in points:
-                    payload = point.get("payload", {})
-                    filename = payload.get("filename", "unknown_document.txt")
-                    
-                    if filename not in file_groups:
-                        file_groups[filename] = {
-                            "chunks": [],
-                            "total_length": 0,
-                            "original_file_size": payload.get("original_file_size", 0),
-                            "created_at": payload.get("created_at", datetime.now().isoformat())
-                        }
-                    
-                    file_groups[filename]["chunks"].append(payload.get("text", ""))
-                    file_groups[filename]["total_length"] += payload.get("chunk_length", 0)
-                
                 documents = []
-                for i, (filename, data) in enumerate(file_groups.items()):
-                    file_size = data["original_file_size"] if data["original_file_size"] > 0 else data["total_length"]
-                    preview_text = ""
-                    if data["chunks"]:
-                        preview_text = data["chunks"][0][:100] + "..." if len(data["chunks"][0]) > 100 else data["chunks"][0]
-                    
+                for i, record in enumerate(records):
                     documents.append({
                         "id": str(i),
                         "bot_id": bot_id,
-                        "filename": filename,
-                        "file_size": file_size,
-                        "created_at": data["created_at"],
-                        "text": preview_text,
-                        "chunk_count": len(data["chunks"])
+                        "filename": record.filename,
+                        "file_size": record.file_size,
+                        "created_at": record.created_at or datetime.now().isoformat(),
+                        "text": record.preview,
+                        "chunk_count": record.chunk_count
                     })
                 
                 logger.info(f"Successfully retrieved {len(documents)} documents for bot {bot_id}")
@@ -145,7 +219,7 @@ class ChatService:
                 
             except Exception as e:
                 logger.error(f"Error getting documents from Qdrant for bot {bot_id}: {str(e)}")
-                stats = self.vector_store.get_collection_stats(collection_name)
+                stats = await self.vector_store.get_collection_stats_async(collection_name, count_filter=bot_filter)
                 documents = [{
                     "id": "collection_info",
                     "bot_id": bot_id,
@@ -168,33 +242,37 @@ class ChatService:
         """Get response from Gemini based on context from vector store"""
         try:
             bot = await self.verify_bot_access(bot_id, user_id, token)
-            collection_name = self._get_collection_name(bot_id)
+            # Queries must be embedded with the same model the bot's documents were. content_version keys
+            # the retrieval and answer caches and may have changed in another worker, so revalidate it often
+            profile = await self.bot_registry.get_profile(bot_id, max_age=settings.BOT_PROFILE_REVALIDATE_SECONDS)
+            model_name = profile.embedding_model
+            collection_name = self._get_collection_name(bot_id, model_name)
             
-            # 🔹 Improved retrieval
-            results = self.vector_store.search(collection_name, query, limit=5)
+            # 🔹 One search for the largest k either branch needs; thresholding and fallback happen in memory
+            policy = self.bot_registry.retrieval_policy(profile)
+
+            # 🔹 Near-duplicate of a recent question: reuse its answer. The version ties entries to the
+            # bot's current documents and policy; the query vector is cached, so search reuses it
+            query_vector = None
+            answer_version = (profile.content_version, policy.model_dump_json())
+            if policy.answer_cache and profile.content_version:
+                query_vector = await self.vector_store.embed_query_async(query, model_name)
+                cached_answer = self.answer_cache.get(bot_id, answer_version, query_vector, policy.answer_cache_threshold)
+                if cached_answer is not None:
+                    return cached_answer
+
+            results = await self._search(bot_id, profile, collection_name, query, limit=policy.fetch_k, mode=policy.mode, with_vectors=policy.mmr)
             
             if not results:
                 return "I don’t have any relevant information to answer your question right now."
             
-            # 🔹 Lowered threshold and deduplication
-            context_chunks = []
-            for result in results:
-                text = result.get("text", "")
-                score = result.get("score", 0)
-                if score >= 0.2 and text.strip():
-                    context_chunks.append(text.strip())
+            candidates = await self._select_chunks(query, results, policy)
+            context_chunks = [r["text"].strip() for r in candidates]
             
-            # 🔹 Fallback broader search
-            if not context_chunks:
-                try:
-                    broader_results = self.vector_store.search(collection_name, query, limit=8)
-                    context_chunks = [r.get("text", "") for r in broader_results if r.get("text")]
-                except Exception:
-                    pass
-            
-            # 🔹 Deduplicate & merge
+            # 🔹 Deduplicate & pack the best chunks into the bot's token budget
             unique_chunks = list(dict.fromkeys(context_chunks))
-            context = "\n\n".join(f"- {chunk}" for chunk in unique_chunks[:8])
+            packed_chunks, context_tokens, trimmed = pack_context(unique_chunks, policy.context_token_budget)
+            context = "\n\n".join(f"- {chunk}" for chunk in packed_chunks)
             bot_name = bot.get('name', 'an AI assistant')
             
             # 🔹 Stronger reasoning prompt
@@ -212,9 +290,18 @@ User Question: {query}
 Answer (use helpful and natural tone):
 """
             try:
+                llm_start = time.perf_counter()
                 response_text = await self.ai_service.generate_response(prompt)
+                llm_seconds = time.perf_counter() - llm_start
+                logger.info(
+                    f"LLM call for bot {bot_id}: {len(packed_chunks)}/{len(unique_chunks)} chunks, "
+                    f"~{context_tokens} context tokens (budget {policy.context_token_budget}, trimmed={trimmed}), "
+                    f"~{estimate_tokens(prompt)} prompt tokens, {llm_seconds * 1000:.0f}ms"
+                )
                 if not response_text or len(response_text.strip()) == 0:
                     return "I'm sorry, I couldn't generate a meaningful response at this time. Please try again."
+                if query_vector is not None:
+                    self.answer_cache.put(bot_id, answer_version, query_vector, response_text.strip(), llm_seconds)
                 return response_text.strip()
             except Exception:
                 return "I apologize, but I'm having trouble generating a response right now. Please try again later."
@@ -227,15 +314,31 @@ Answer (use helpful and natural tone):
                 detail=f"Error generating response: {str(e)}"
             )
 
-    async def process_documents(self, bot_id: str, user_id: str, texts: List[str], filenames: List[str] = None, file_sizes: List[int] = None):
-        """Process and store document chunks in vector store"""
+    async def process_documents(self, bot_id: str, user_id: str, texts: List[str], filenames: List[str] = None, file_sizes: List[int] = None, quantization: Optional[str] = None, embedding_model: Optional[str] = None, content_hashes: List[str] = None):
+        """Process and store document chunks in vector store.
+
+        content_hashes (one per chunk: the sha256 of the source file) make point ids
+        deterministic, so the retries below overwrite a partial upload instead of duplicating it.
+        """
         try:
-            collection_name = self._get_collection_name(bot_id)
+            # New bots record their model; later uploads reuse whatever the bot was created with
+            profile = await self.bot_registry.get_profile(bot_id, max_age=0)
+            if profile.embedding_dim is None:
+                profile = await self.bot_registry.create_profile(
+                    bot_id,
+                    embedding_model=embedding_model or profile.embedding_model,
+                    quantization=quantization,
+                    retrieval=profile.retrieval,
+                )
+            elif embedding_model and embedding_model != profile.embedding_model:
+                logger.warning(f"Bot {bot_id} already uses {profile.embedding_model}; ignoring requested model {embedding_model}")
+            model_name = profile.embedding_model
+            collection_name = self._get_collection_name(bot_id, model_name)
             
             # Create collection if not exists
             try:
-                self.vector_store.create_collection(collection_name)
-                logger.info(f"Created new collection {collection_name}")
+                await self.vector_store.create_collection_async(collection_name, quantization=quantization, model_name=model_name)
+                logger.info(f"Ensured collection {collection_name} exists")
             except Exception as e:
                 if "already exists" not in str(e).lower():
                     logger.error(f"Error creating collection {collection_name}: {str(e)}")
@@ -244,6 +347,7 @@ Answer (use helpful and natural tone):
             
             # Prepare metadata
             metadata = []
+            file_chunk_counts = {}
             for i, text in enumerate(texts):
                 chunk_metadata = {
                     "bot_id": bot_id,
@@ -262,6 +366,12 @@ Answer (use helpful and natural tone):
                 if file_sizes and i < len(file_sizes):
                     chunk_metadata["original_file_size"] = file_sizes[i]
                 
+                if content_hashes and i < len(content_hashes):
+                    content_hash = content_hashes[i]
+                    chunk_metadata["content_hash"] = content_hash
+                    chunk_metadata["file_chunk_index"] = file_chunk_counts.get(content_hash, 0)
+                    file_chunk_counts[content_hash] = chunk_metadata["file_chunk_index"] + 1
+                
                 metadata.append(chunk_metadata)
             
             # Retry logic
@@ -271,16 +381,24 @@ Answer (use helpful and natural tone):
             
             for attempt in range(max_retries):
                 try:
-                    self.vector_store.add_texts(collection_name, texts, metadata)
+                    await self.vector_store.add_texts_async(collection_name, texts, metadata, model_name=model_name)
                     logger.info(f"Successfully added {len(texts)} texts to collection {collection_name}")
-                    return
+                    break
                 except Exception as e:
                     last_error = e
                     if attempt < max_retries - 1:
                         logger.warning(f"Attempt {attempt + 1} failed, retrying in {retry_delay} seconds: {str(e)}")
                         await asyncio.sleep(retry_delay)
                         retry_delay *= 2
-            raise last_error
+            else:
+                raise last_error
+            
+            # Keep the document list current without re-reading chunks later
+            await self.document_manifest.save_records(
+                self.document_manifest.build_records(bot_id, texts, metadata)
+            )
+            # New chunks can change any answer, so retire cached results for this bot
+            await self.bot_registry.bump_content_version(bot_id)
             
         except Exception as e:
             logger.error(f"Error processing documents: {str(e)}")
@@ -0,0 +1,52 @@
+import math
+import re
+from typing import List, Tuple
+
+# Gemini averages about four characters of English text per token
+CHARS_PER_TOKEN = 4.0
+
+# A sentence ends at . ! ? (optionally followed by a closing quote/bracket) before whitespace, or at a line break
+_SENTENCE_END_RE = re.compile(r"[.!?][\"')\]]?(?=\s)|\n")
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast token estimate without a tokenizer round-trip"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def trim_to_sentence(text: str, max_tokens: int) -> str:
+    """Longest prefix of whole sentences within max_tokens; empty if not even one sentence fits"""
+    max_chars = int(max_tokens * CHARS_PER_TOKEN)
+    if len(text) <= max_chars:
+        return text
+    cut = 0
+    for match in _SENTENCE_END_RE.finditer(text, 0, max_chars):
+        cut = match.end()
+    return text[:cut].rstrip()
+
+
+def pack_context(chunks: List[str], token_budget: int) -> Tuple[List[str], int, bool]:
+    """Fill the budget with chunks in the order given (best first).
+
+    Whole chunks are added while they fit; the first one that doesn't is cut at a
+    sentence boundary (a word boundary if it is the only chunk) and packing stops
+    there. Returns (packed chunks, estimated tokens, whether a chunk was trimmed).
+    """
+    packed: List[str] = []
+    used = 0
+    for chunk in chunks:
+        tokens = estimate_tokens(chunk)
+        if used + tokens <= token_budget:
+            packed.append(chunk)
+            used += tokens
+            continue
+        trimmed = trim_to_sentence(chunk, token_budget - used)
+        if not trimmed and not packed:
+            # Never send an empty context because the best chunk is one long sentence
+            head = chunk[:int(token_budget * CHARS_PER_TOKEN)]
+            trimmed = head.rsplit(None, 1)[0] if head.strip() else ""
+        if trimmed:
+            packed.append(trimmed)
+            used += estimate_tokens(trimmed)
+        return packed, used, bool(trimmed)
+    return packed, used, False
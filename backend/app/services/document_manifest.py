@@ -0,0 +1,167 @@
+import uuid
+from datetime import datetime
+from threading import Lock
+from typing import Dict, List, Optional
+
+from qdrant_client.http import models
+
+from ..core.config import get_settings
+from ..log_config import logger
+from ..models.bot import DocumentRecord
+from .vector_store import PAYLOAD_ONLY_VECTOR, VectorStoreService
+
+settings = get_settings()
+
+# Stable namespace so a document's manifest point id can be derived from bot_id and document key
+_MANIFEST_NAMESPACE = uuid.UUID("a4d2e9c1-7b3f-4e58-8c6a-0f1e2d3c4b5a")
+_PREVIEW_LENGTH = 100
+
+
+def _preview(text: str) -> str:
+    return text[:_PREVIEW_LENGTH] + "..." if len(text) > _PREVIEW_LENGTH else text
+
+
+class DocumentManifestService:
+    """Per-bot list of uploaded documents (filename, size, chunk count, content hash).
+
+    Kept in a payload-only Qdrant collection with one point per document and updated
+    at ingestion and bot deletion, so listing a bot's documents reads O(#documents)
+    points instead of scrolling every chunk.
+    """
+    _instance = None
+    _lock = Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(DocumentManifestService, cls).__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if not self._initialized:
+                self.vector_store = VectorStoreService()
+                self.collection_name = settings.DOCUMENT_MANIFEST_COLLECTION
+                self._collection_ready = False
+                self._initialized = True
+
+    @staticmethod
+    def _point_id(bot_id: str, document_key: str) -> str:
+        return str(uuid.uuid5(_MANIFEST_NAMESPACE, f"{bot_id}:{document_key}"))
+
+    @staticmethod
+    def _bot_filter(bot_id: str) -> models.Filter:
+        return models.Filter(must=[models.FieldCondition(key="bot_id", match=models.MatchValue(value=bot_id))])
+
+    async def _ensure_collection(self):
+        if self._collection_ready:
+            return
+        await self.vector_store.ensure_payload_collection_async(self.collection_name, keyword_fields=["bot_id"])
+        self._collection_ready = True
+
+    @staticmethod
+    def build_records(bot_id: str, texts: List[str], metadata: List[Dict]) -> List[DocumentRecord]:
+        """Group chunk metadata into one record per document"""
+        created_at = datetime.utcnow().isoformat()
+        records: Dict[str, DocumentRecord] = {}
+        first_chunk: Dict[str, int] = {}
+        for text, meta in zip(texts, metadata):
+            filename = meta.get("filename", "unknown_document.txt")
+            content_hash = meta.get("content_hash")
+            key = content_hash or f"filename:{filename}"
+            record = records.get(key)
+            if record is None:
+                record = records[key] = DocumentRecord(
+                    bot_id=bot_id,
+                    document_key=key,
+                    filename=filename,
+                    file_size=meta.get("original_file_size", 0),
+                    content_hash=content_hash,
+                    created_at=meta.get("created_at", created_at),
+                )
+            record.chunk_count += 1
+            # Preview the file's first chunk, whatever order the chunks arrive in
+            index = meta.get("file_chunk_index", meta.get("chunk_index", 0))
+            if key not in first_chunk or index < first_chunk[key]:
+                first_chunk[key] = index
+                record.preview = _preview(text)
+            if not meta.get("original_file_size"):
+                record.file_size += meta.get("chunk_length", len(text))
+        return list(records.values())
+
+    async def save_records(self, records: List[DocumentRecord]):
+        """Upsert manifest entries; re-uploading a document overwrites its entry"""
+        if not records:
+            return
+        await self._ensure_collection()
+        await self.vector_store.async_client.upsert(
+            collection_name=self.collection_name,
+            points=models.Batch(
+                ids=[self._point_id(record.bot_id, record.document_key) for record in records],
+                vectors=[PAYLOAD_ONLY_VECTOR] * len(records),
+                payloads=[record.model_dump() for record in records],
+            ),
+        )
+        logger.info(f"Saved {len(records)} document manifest entries for bot {records[0].bot_id}")
+
+    async def get_documents(self, bot_id: str) -> Optional[List[DocumentRecord]]:
+        """A bot's documents, or None if it has no manifest yet (bots created before the manifest)"""
+        await self._ensure_collection()
+        records = []
+        offset = None
+        while True:
+            points, offset = await self.vector_store.async_client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self._bot_filter(bot_id),
+                limit=256,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False,
+            )
+            records.extend(DocumentRecord(**point.payload) for point in points)
+            if offset is None:
+                break
+        if not records:
+            return None
+        return sorted(records, key=lambda record: record.created_at or "")
+
+    async def rebuild(self, bot_id: str, collection_name: str, scroll_filter: Optional[models.Filter] = None) -> List[DocumentRecord]:
+        """Build a bot's manifest by scrolling all of its chunks once, for bots that predate the manifest"""
+        texts, metadata = [], []
+        offset = None
+        while True:
+            points, offset = await self.vector_store.async_client.scroll(
+                collection_name=collection_name,
+                scroll_filter=scroll_filter,
+                limit=1000,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False,
+            )
+            for point in points:
+                payload = point.payload or {}
+                texts.append(payload.get("text", ""))
+                metadata.append(payload)
+            if offset is None:
+                break
+
+        records = self.build_records(bot_id, texts, metadata)
+        await self.save_records(records)
+        logger.info(f"Rebuilt document manifest for bot {bot_id} from {len(texts)} chunks: {len(records)} documents")
+        return records
+
+    async def delete_bot_documents(self, bot_id: str):
+        try:
+            await self._ensure_collection()
+            await self.vector_store.async_client.delete(
+                collection_name=self.collection_name,
+                points_selector=models.FilterSelector(filter=self._bot_filter(bot_id)),
+            )
+            logger.info(f"Deleted document manifest for bot {bot_id}")
+        except Exception as e:
+            logger.error(f"Error deleting document manifest for bot {bot_id}: {str(e)}")
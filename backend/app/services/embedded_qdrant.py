@@ -0,0 +1,57 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from threading import RLock
+from typing import Any
+
+from qdrant_client import QdrantClient
+
+
+class LockedQdrantClient:
+    """Serializes calls to an embedded (local mode) QdrantClient.
+
+    The local client keeps collections in plain Python/NumPy structures and is not
+    thread-safe, while the service calls it from request threads, the upsert pool
+    and the async facade below.
+    """
+
+    def __init__(self, client: QdrantClient):
+        self._client = client
+        self._lock = RLock()
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def locked(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+
+        return locked
+
+
+class AsyncEmbeddedQdrantClient:
+    """AsyncQdrantClient-compatible facade over the same embedded client.
+
+    A separate AsyncQdrantClient(path=...) would open its own copy of the storage
+    (or, for ":memory:", an unrelated empty one), so async calls are run on the
+    shared sync client in a dedicated thread instead.
+    """
+
+    def __init__(self, client: LockedQdrantClient):
+        self._client = client
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qdrant-embedded")
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(attr, *args, **kwargs))
+
+        return call
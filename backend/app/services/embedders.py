@@ -0,0 +1,329 @@
+import os
+import json
+import inspect
+import time
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class Embedder(ABC):
+    """Common interface for sentence embedding backends"""
+
+    backend: str = "base"
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.dimension: int = 0
+        # Uncased tokenizers lower-case their input, so queries differing only in case get the same vector
+        self.lowercases: bool = False
+
+    @property
+    def variant(self) -> str:
+        """Backend (and precision) producing the vectors; the same model differs slightly across variants"""
+        return self.backend
+
+    @abstractmethod
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Encode texts into a (len(texts), dimension) float32 array"""
+
+
+class TorchEmbedder(Embedder):
+    """SentenceTransformer (PyTorch) backend"""
+
+    backend = "torch"
+
+    def __init__(self, model_name: str):
+        super().__init__(model_name)
+        from sentence_transformers import SentenceTransformer
+
+        if settings.EMBEDDING_NUM_THREADS > 0:
+            import torch
+            torch.set_num_threads(settings.EMBEDDING_NUM_THREADS)
+
+        self.model = SentenceTransformer(model_name)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self.lowercases = bool(getattr(self.model.tokenizer, "do_lower_case", False))
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        return np.asarray(self.model.encode(texts, batch_size=batch_size, show_progress_bar=False), dtype=np.float32)
+
+
+def _onnx_model_dir(model_name: str) -> str:
+    return os.path.join(settings.ONNX_MODEL_DIR, model_name.replace("/", "__"))
+
+
+def _export_fp32(model_name: str, model_dir: str, fp32_path: str):
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0]
+    transformer.tokenizer.save_pretrained(model_dir)
+    auto_model = transformer.auto_model.eval()
+
+    normalize = any(type(module).__name__ == "Normalize" for module in st_model)
+    config = {
+        "model_name": model_name,
+        "dimension": st_model.get_sentence_embedding_dimension(),
+        "max_seq_length": st_model.max_seq_length,
+        "normalize": normalize,
+    }
+    with open(os.path.join(model_dir, "embedder.json"), "w") as f:
+        json.dump(config, f)
+
+    sample = transformer.tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    export_kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # Newer torch defaults to the dynamo exporter, which needs onnxscript
+        export_kwargs["dynamo"] = False
+
+    with torch.no_grad():
+        torch.onnx.export(
+            auto_model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            **export_kwargs,
+        )
+    logger.info(f"Exported ONNX model for {model_name} to {fp32_path}")
+
+
+def export_onnx_model(model_name: str, quantize: bool = True) -> str:
+    """Export a SentenceTransformer model to ONNX (and optionally int8) and return the model directory.
+
+    Requires torch and sentence-transformers; run it at build time (see download_model.py)
+    so that serving hosts only need onnxruntime.
+    """
+    model_dir = _onnx_model_dir(model_name)
+    os.makedirs(model_dir, exist_ok=True)
+    fp32_path = os.path.join(model_dir, "model.onnx")
+
+    if not os.path.exists(fp32_path):
+        _export_fp32(model_name, model_dir, fp32_path)
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        int8_path = os.path.join(model_dir, "model-int8.onnx")
+        if not os.path.exists(int8_path):
+            quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+            logger.info(f"Wrote dynamic int8 quantized model to {int8_path}")
+
+    return model_dir
+
+
+class OnnxEmbedder(Embedder):
+    """ONNX Runtime backend with optional dynamic int8 quantization.
+
+    Reproduces the SentenceTransformer pipeline (mean pooling, optional L2 normalization)
+    on top of the exported transformer so vectors stay compatible with the torch backend.
+    """
+
+    backend = "onnx"
+
+    def __init__(self, model_name: str, quantize: bool = True):
+        super().__init__(model_name)
+        try:
+            import onnxruntime as ort
+            from transformers import AutoTokenizer
+        except ImportError:
+            raise RuntimeError("ONNX embedding backend requires onnxruntime and transformers to be installed.")
+
+        self.quantize = quantize
+        model_dir = _onnx_model_dir(model_name)
+        model_file = "model-int8.onnx" if quantize else "model.onnx"
+        model_path = os.path.join(model_dir, model_file)
+        if not os.path.exists(model_path):
+            logger.warning(f"No exported ONNX model at {model_path}, exporting now (needs torch)")
+            export_onnx_model(model_name, quantize=quantize)
+
+        with open(os.path.join(model_dir, "embedder.json")) as f:
+            config = json.load(f)
+        self.dimension = config["dimension"]
+        self.max_seq_length = config["max_seq_length"]
+        self.normalize = config["normalize"]
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.lowercases = bool(getattr(self.tokenizer, "do_lower_case", False))
+        options = ort.SessionOptions()
+        if settings.EMBEDDING_NUM_THREADS > 0:
+            options.intra_op_num_threads = settings.EMBEDDING_NUM_THREADS
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np",
+        )
+        inputs = {name: encoded[name].astype(np.int64) for name in self._input_names}
+        hidden = self.session.run(None, inputs)[0]
+
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+    @property
+    def variant(self) -> str:
+        return "onnx-int8" if self.quantize else "onnx-fp32"
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        # Sort by length so each batch pads to a similar sequence length
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        output = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            batch_idx = order[start:start + batch_size]
+            output[batch_idx] = self._encode_batch([texts[i] for i in batch_idx])
+        return output
+
+
+def load_embedder(model_name: Optional[str] = None, backend: Optional[str] = None) -> Embedder:
+    """Load the configured embedding backend, retrying transient download failures"""
+    model_name = model_name or settings.EMBEDDING_MODEL_NAME
+    backend = (backend or settings.EMBEDDING_BACKEND).lower()
+
+    max_retries = 3
+    retry_delay = 5  # seconds
+
+    for attempt in range(max_retries):
+        try:
+            if backend == "onnx":
+                embedder = OnnxEmbedder(model_name, quantize=settings.ONNX_QUANTIZE)
+            elif backend == "torch":
+                embedder = TorchEmbedder(model_name)
+            else:
+                raise ValueError(f"Unknown embedding backend: {backend}")
+            logger.info(f"Successfully loaded {embedder.backend} embedding model: {model_name} (dim={embedder.dimension})")
+            return embedder
+        except (ValueError, RuntimeError):
+            raise
+        except Exception as e:
+            if attempt == max_retries - 1:
+                raise Exception(f"Failed to load model after {max_retries} attempts: {str(e)}")
+            logger.warning(f"Attempt {attempt + 1} failed, retrying in {retry_delay} seconds...")
+            time.sleep(retry_delay)
+
+
+class EmbedderPool:
+    """Keeps several embedding models loaded at once.
+
+    The default model is always kept. Other models are unloaded when they have been
+    idle for ``idle_seconds`` or when more than ``max_models`` are loaded (least
+    recently used first). The model being handed out is never unloaded, so with
+    ``max_models=1`` it is kept alongside the default until another model replaces it.
+    """
+
+    def __init__(self, default_model: str, max_models: int = 2, idle_seconds: float = 1800):
+        self.default_model = default_model
+        self.max_models = max(1, max_models)
+        self.idle_seconds = idle_seconds
+        self._models: "OrderedDict[str, Embedder]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._load_locks: Dict[str, Lock] = {}
+        self._lock = Lock()
+        self.loads = 0
+        self.unloads = 0
+
+    def get(self, model_name: Optional[str] = None) -> Embedder:
+        """Return the embedder for a model, loading it on first use"""
+        model_name = model_name or self.default_model
+        with self._lock:
+            embedder = self._touch(model_name)
+            if embedder is not None:
+                return embedder
+            load_lock = self._load_locks.setdefault(model_name, Lock())
+
+        # Load outside the pool lock so other models stay usable meanwhile
+        with load_lock:
+            with self._lock:
+                embedder = self._touch(model_name)
+            if embedder is None:
+                embedder = load_embedder(model_name)
+                with self._lock:
+                    self._add_locked(embedder)
+                    self.loads += 1
+        return embedder
+
+    def peek(self, model_name: Optional[str] = None) -> Optional[Embedder]:
+        """Return a model's embedder if it is loaded, without loading it or marking it used"""
+        with self._lock:
+            return self._models.get(model_name or self.default_model)
+
+    def add(self, embedder: Embedder):
+        """Register an already loaded embedder"""
+        with self._lock:
+            self._add_locked(embedder)
+
+    def _add_locked(self, embedder: Embedder):
+        self._models[embedder.model_name] = embedder
+        self._models.move_to_end(embedder.model_name)
+        self._last_used[embedder.model_name] = time.monotonic()
+        self._evict_locked(keep=embedder.model_name)
+
+    def _touch(self, model_name: str) -> Optional[Embedder]:
+        embedder = self._models.get(model_name)
+        if embedder is not None:
+            self._models.move_to_end(model_name)
+            self._last_used[model_name] = time.monotonic()
+            self._evict_locked(keep=model_name)
+        return embedder
+
+    def _unload_locked(self, model_name: str):
+        self._models.pop(model_name, None)
+        self._last_used.pop(model_name, None)
+        self.unloads += 1
+        logger.info(f"Unloaded embedding model {model_name}")
+
+    def _evict_locked(self, keep: str):
+        """Unload idle and over-capacity models, never the default or ``keep`` (the one being handed out)"""
+        pinned = {self.default_model, keep}
+        now = time.monotonic()
+        for model_name in list(self._models):
+            if model_name not in pinned and now - self._last_used[model_name] > self.idle_seconds:
+                self._unload_locked(model_name)
+        while len(self._models) > self.max_models:
+            victim = next((name for name in self._models if name not in pinned), None)
+            if victim is None:
+                break
+            self._unload_locked(victim)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "default_model": self.default_model,
+                "max_models": self.max_models,
+                "loaded": {
+                    name: {
+                        "backend": embedder.backend,
+                        "dimension": embedder.dimension,
+                        "idle_s": round(now - self._last_used[name], 1),
+                    }
+                    for name, embedder in self._models.items()
+                },
+                "loads": self.loads,
+                "unloads": self.unloads,
+            }
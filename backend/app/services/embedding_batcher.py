@@ -0,0 +1,125 @@
+import time
+import logging
+from concurrent.futures import Future
+from queue import Queue, Empty
+from threading import Lock, Thread
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """Coalesces single-text encode calls from concurrent callers into batched model calls.
+
+    Callers block on (or await) a Future while a background thread collects every
+    request that arrives within ``max_wait_ms`` of the first one, up to
+    ``max_batch_size``, and runs them through ``encode_fn`` in one forward pass.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], Sequence[np.ndarray]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        name: str = "embedding",
+    ):
+        self._encode_fn = encode_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+
+        self._queue: Queue = Queue()
+        self._worker_lock = Lock()
+        self._worker = None
+
+        self._stats_lock = Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_batch_seen = 0
+        self._errors = 0
+        self._encode_seconds = 0.0
+        self._batch_size_histogram: Dict[int, int] = {}
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+                self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue a text for encoding and return a Future resolving to its vector"""
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def encode(self, text: str, timeout: float = None) -> np.ndarray:
+        """Encode a single text, sharing the model call with concurrent callers"""
+        return self.submit(text).result(timeout=timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        batch.append(self._queue.get(timeout=remaining))
+                    else:
+                        # Window closed; still take anything already queued
+                        batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch: List[tuple]):
+        # Drop requests whose callers have already given up
+        pending = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+        if not pending:
+            return
+
+        texts = [text for text, _ in pending]
+        start = time.perf_counter()
+        try:
+            vectors = self._encode_fn(texts)
+        except Exception as e:
+            logger.error(f"{self.name} batcher failed to encode batch of {len(texts)}: {str(e)}")
+            with self._stats_lock:
+                self._errors += 1
+            for _, future in pending:
+                future.set_exception(e)
+            return
+        elapsed = time.perf_counter() - start
+
+        for (_, future), vector in zip(pending, vectors):
+            future.set_result(vector)
+
+        size = len(pending)
+        with self._stats_lock:
+            self._batches += 1
+            self._items += size
+            self._encode_seconds += elapsed
+            self._max_batch_seen = max(self._max_batch_seen, size)
+            self._batch_size_histogram[size] = self._batch_size_histogram.get(size, 0) + 1
+        logger.debug(f"{self.name} batcher encoded batch of {size} in {elapsed * 1000:.1f}ms")
+
+    def get_stats(self) -> Dict:
+        """Return batch size statistics for the metrics endpoint"""
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self._batches,
+                "items": self._items,
+                "errors": self._errors,
+                "avg_batch_size": (self._items / self._batches) if self._batches else 0.0,
+                "max_batch_seen": self._max_batch_seen,
+                "avg_encode_ms": (self._encode_seconds * 1000.0 / self._batches) if self._batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._batch_size_histogram.items())),
+                "queue_depth": self._queue.qsize(),
+            }
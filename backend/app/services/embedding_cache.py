@@ -0,0 +1,111 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+from threading import Lock
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """Persistent, content-addressed cache of chunk embeddings backed by SQLite.
+
+    Entries are keyed by a hash of the model name, embedder variant (backend and
+    precision) and chunk text, and stored as raw float32 bytes. When the cache
+    grows past ``max_entries`` the least recently used entries are evicted.
+    """
+
+    _QUERY_CHUNK = 500  # Stay well below SQLite's bound-parameter limit
+
+    def __init__(self, path: str, max_entries: int = 100000):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key BLOB PRIMARY KEY, dim INTEGER NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model_name: str, variant: str, text: str) -> bytes:
+        return hashlib.sha256(f"{model_name}\0{variant}\0{text}".encode("utf-8")).digest()
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Return cached vectors for whichever keys are present, refreshing their LRU position"""
+        found: Dict[bytes, np.ndarray] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(unique_keys), self._QUERY_CHUNK):
+                chunk = unique_keys[start:start + self._QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, dim, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, dim, blob in rows:
+                    found[bytes(key)] = np.frombuffer(blob, dtype=np.float32, count=dim)
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(now, key) for key, _, _ in rows],
+                    )
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(unique_keys) - len(found)
+        return found
+
+    def put_many(self, items: List[Tuple[bytes, np.ndarray]]):
+        """Store vectors and evict the least recently used entries beyond the size cap"""
+        if not items:
+            return
+        now = time.time()
+        rows = [
+            (key, int(vector.shape[0]), np.ascontiguousarray(vector, dtype=np.float32).tobytes(), now)
+            for key, vector in items
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, vector, last_used) VALUES (?, ?, ?, ?)", rows
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self.evictions += overflow
+                logger.info(f"Evicted {overflow} entries from embedding cache {self.path}")
+            self._conn.commit()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
@@ -0,0 +1,158 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+
+class ExactIndex:
+    """All vectors of one small bot as a normalized matrix, searched exactly with one mat-vec product"""
+
+    def __init__(self, vectors: np.ndarray, payloads: List[Dict], dtype: str = "float32"):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.matrix = (vectors / np.clip(norms, 1e-12, None)).astype(dtype)
+        self.payloads = payloads
+        self.nbytes = self.matrix.nbytes + sum(len(p.get("text", "")) for p in payloads)
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    def search(self, query_vector: np.ndarray, limit: int, with_vectors: bool = False) -> List[Tuple]:
+        """Top-k by cosine similarity, best first (same scores as a Qdrant cosine collection).
+
+        Returns (score, payload) pairs, or (score, payload, normalized vector) with with_vectors.
+        """
+        if not self.payloads or limit <= 0:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        # float32 goes through BLAS; a float16 matrix is upcast, slower but half the memory
+        scores = np.dot(self.matrix, query)
+        if limit < len(scores):
+            # O(n) selection of the k best, then sort only those
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        if with_vectors:
+            return [(float(scores[i]), self.payloads[i], self.matrix[i]) for i in top]
+        return [(float(scores[i]), self.payloads[i]) for i in top]
+
+
+# Marker for bots too large for the fast path, so they aren't re-counted on every query
+TOO_LARGE = object()
+# Marker for bots with no points (or no collection) yet, so they aren't re-scrolled on every query
+NO_POINTS = object()
+
+
+class ExactSearchCache:
+    """LRU cache of ExactIndex objects bounded by total memory and entry count, with a per-entry TTL.
+
+    Each index is stored under the bot's content version at load time; a lookup with
+    another version is a miss, so uploads in any worker retire stale indexes. Within
+    the process, invalidate() also drops entries at once and marks loads in flight
+    (at most one per key) so they are discarded instead of cached stale.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: Optional[float] = None, max_entries: int = 10000):
+        self.max_bytes = max(0, max_bytes)
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._loading: Dict[Hashable, bool] = {}  # Key -> still valid, only while a load is in flight
+        self._lock = Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale = 0
+
+    def begin_load(self, key: Hashable):
+        """Call before loading an index so invalidate() can mark the load stale; pair with end_load()"""
+        with self._lock:
+            self._loading[key] = True
+
+    def end_load(self, key: Hashable):
+        with self._lock:
+            self._loading.pop(key, None)
+
+    def get(self, key: Hashable, version: Optional[str] = None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, entry_version = entry
+            if entry_version != version:
+                self._remove_locked(key)
+                self.stale += 1
+                self.misses += 1
+                return None
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove_locked(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            if isinstance(value, ExactIndex):
+                self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value, version: Optional[str] = None) -> bool:
+        """Store an index for a content version unless the key was invalidated during its load"""
+        size = value.nbytes if isinstance(value, ExactIndex) else 0
+        if size > self.max_bytes:
+            value, size = TOO_LARGE, 0
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            if not self._loading.get(key, True):
+                return False
+            self._remove_locked(key)
+            self._data[key] = (value, expires_at, version)
+            self.nbytes += size
+            if isinstance(value, ExactIndex):
+                self.loads += 1
+            while (self.nbytes > self.max_bytes or len(self._data) > self.max_entries) and self._data:
+                oldest = next(iter(self._data))
+                self._remove_locked(oldest)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, predicate) -> int:
+        """Drop every entry whose key matches predicate(key) and mark matching loads in flight stale"""
+        with self._lock:
+            keys = {key for key in list(self._data) + list(self._loading) if predicate(key)}
+            for key in keys:
+                self._remove_locked(key)
+                if key in self._loading:
+                    self._loading[key] = False
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def _remove_locked(self, key: Hashable):
+        entry = self._data.pop(key, None)
+        if entry is not None and isinstance(entry[0], ExactIndex):
+            self.nbytes -= entry[0].nbytes
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            indexed = [entry[0] for entry in self._data.values() if isinstance(entry[0], ExactIndex)]
+            lookups = self.hits + self.misses
+            return {
+                "bots": len(indexed),
+                "too_large": sum(1 for entry in self._data.values() if entry[0] is TOO_LARGE),
+                "empty": sum(1 for entry in self._data.values() if entry[0] is NO_POINTS),
+                "points": sum(len(v) for v in indexed),
+                "memory_mb": round(self.nbytes / 1024 / 1024, 2),
+                "max_memory_mb": round(self.max_bytes / 1024 / 1024, 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale": self.stale,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
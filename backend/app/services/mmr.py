@@ -0,0 +1,46 @@
+from typing import List, Optional
+
+import numpy as np
+
+
+def mmr_select(
+    relevance: np.ndarray,
+    vectors: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.7,
+    duplicate_threshold: Optional[float] = 0.95,
+) -> List[int]:
+    """Indices of up to k candidates chosen by maximal marginal relevance, in pick order.
+
+    Each step picks the candidate maximizing
+    ``lambda_mult * relevance - (1 - lambda_mult) * max cosine to the picks so far``.
+    Candidates whose cosine to a pick reaches ``duplicate_threshold`` are dropped
+    outright, so fewer than k indices come back when the pool holds near-duplicates.
+    One pairwise similarity matrix is computed up front; each step is a vector update.
+    """
+    n = len(relevance)
+    if n == 0 or k <= 0:
+        return []
+    vectors = np.asarray(vectors, dtype=np.float32)
+    vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+    similarity = vectors @ vectors.T
+    relevance = np.asarray(relevance, dtype=np.float32)
+
+    selected: List[int] = []
+    available = np.ones(n, dtype=bool)
+    max_similarity = np.full(n, -np.inf, dtype=np.float32)
+    for _ in range(min(k, n)):
+        if selected:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        else:
+            scores = relevance.copy()
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        if not available[best]:
+            break
+        selected.append(best)
+        available[best] = False
+        max_similarity = np.maximum(max_similarity, similarity[best])
+        if duplicate_threshold is not None:
+            available &= similarity[best] < duplicate_threshold
+    return selected
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, Thread
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class Reranker:
+    """Reorders retrieved chunks with a small CPU cross-encoder under a hard time budget.
+
+    All candidates are scored in one batch. The stage is skipped (the caller keeps
+    the vector-search order) when the model isn't loaded yet, when the running
+    per-pair cost estimate says the batch won't fit in RERANK_BUDGET_MS, when the
+    job would start too late because another rerank is still running, or when
+    scoring overruns the budget.
+    """
+    _instance = None
+    _lock = Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(Reranker, cls).__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if not self._initialized:
+                self.model_name = settings.RERANK_MODEL_NAME
+                self.budget_seconds = max(0.0, settings.RERANK_BUDGET_MS) / 1000.0
+                self.model = None
+                self._loader: Optional[Thread] = None
+                self._load_failures = 0
+                self._next_load_at = 0.0  # Monotonic time before which a failed load isn't retried
+                # One worker: a rerank queued behind another would usually miss its budget anyway
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+                self._seconds_per_pair: Optional[float] = None  # Moving average of observed cost
+                self._stats_lock = Lock()
+                self._stats = {
+                    "reranked": 0,
+                    "skipped_not_loaded": 0,
+                    "skipped_budget": 0,
+                    "timeouts": 0,
+                    "failures": 0,
+                    "rerank_seconds": 0.0,
+                }
+                self._initialized = True
+
+    def load(self):
+        """Load the cross-encoder (blocking); called from warm-up or a background thread"""
+        if self.model is not None:
+            return
+        from sentence_transformers import CrossEncoder
+
+        start = time.perf_counter()
+        self.model = CrossEncoder(self.model_name, max_length=settings.RERANK_MAX_LENGTH, device="cpu")
+        logger.info(f"Loaded rerank model {self.model_name} in {time.perf_counter() - start:.2f}s")
+
+    def _load_in_background(self):
+        with self._lock:
+            if self._loader is not None or time.monotonic() < self._next_load_at:
+                return
+            self._loader = Thread(target=self._safe_load, name="rerank-load", daemon=True)
+            self._loader.start()
+
+    def _safe_load(self):
+        try:
+            self.load()
+        except Exception as e:
+            with self._lock:
+                # Retry on a later request, backing off 30s, 60s, ... up to 10 minutes
+                self._load_failures += 1
+                backoff = min(600.0, 30.0 * 2 ** (self._load_failures - 1))
+                self._next_load_at = time.monotonic() + backoff
+                self._loader = None
+            logger.error(f"Failed to load rerank model {self.model_name} (retrying in {backoff:.0f}s): {str(e)}")
+
+    def _count(self, key: str, seconds: float = 0.0):
+        with self._stats_lock:
+            self._stats[key] += 1
+            self._stats["rerank_seconds"] += seconds
+
+    def _predict(self, query: str, texts: List[str], deadline: float) -> Optional[np.ndarray]:
+        # Queued behind another rerank: if the estimate no longer fits, don't burn CPU on a late answer
+        if time.monotonic() + len(texts) * (self._seconds_per_pair or 0.0) > deadline:
+            return None
+        start = time.perf_counter()
+        scores = self.model.predict([(query, text) for text in texts], batch_size=len(texts), show_progress_bar=False)
+        per_pair = (time.perf_counter() - start) / len(texts)
+        # Rises at once when scoring gets slower, falls back gradually
+        if self._seconds_per_pair is None or per_pair > self._seconds_per_pair:
+            self._seconds_per_pair = per_pair
+        else:
+            self._seconds_per_pair = 0.8 * self._seconds_per_pair + 0.2 * per_pair
+        return np.asarray(scores, dtype=np.float32)
+
+    async def rerank(self, query: str, results: List[Dict], top_n: int) -> Optional[List[Dict]]:
+        """The top_n results by cross-encoder score (best first), or None if the stage was skipped"""
+        if not results:
+            return results
+        if self.model is None:
+            self._load_in_background()
+            self._count("skipped_not_loaded")
+            return None
+        if self._seconds_per_pair is not None and len(results) * self._seconds_per_pair > self.budget_seconds:
+            # Skipped batches teach nothing, so let the estimate decay until another attempt is made
+            self._seconds_per_pair *= 0.95
+            self._count("skipped_budget")
+            return None
+
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.budget_seconds
+        loop = asyncio.get_running_loop()
+        texts = [result.get("text", "") for result in results]
+        try:
+            scores = await asyncio.wait_for(
+                loop.run_in_executor(self._executor, self._predict, query, texts, deadline),
+                timeout=self.budget_seconds,
+            )
+        except asyncio.TimeoutError:
+            self._count("timeouts")
+            logger.warning(f"Rerank of {len(results)} chunks exceeded {self.budget_seconds * 1000:.0f}ms; keeping search order")
+            return None
+        except Exception as e:
+            self._count("failures")
+            logger.error(f"Rerank failed, keeping search order: {str(e)}")
+            return None
+        if scores is None:
+            self._count("skipped_budget")
+            return None
+
+        self._count("reranked", time.perf_counter() - start)
+        order = np.argsort(-scores, kind="stable")[:max(1, top_n)]
+        return [{**results[i], "rerank_score": float(scores[i])} for i in order]
+
+    def get_stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        reranked = stats["reranked"]
+        stats.update({
+            "model": self.model_name,
+            "loaded": self.model is not None,
+            "load_failures": self._load_failures,
+            "budget_ms": round(self.budget_seconds * 1000, 1),
+            "est_ms_per_pair": round(self._seconds_per_pair * 1000, 3) if self._seconds_per_pair is not None else None,
+            "avg_rerank_ms": round(stats["rerank_seconds"] / reranked * 1000, 2) if reranked else 0.0,
+        })
+        return stats
@@ -0,0 +1,91 @@
+import re
+import zlib
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+from qdrant_client.http import models
+
+# Keeps codes like "BTL-500-SS", "E-4021" or "v2.1" together as one token
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+_PART_RE = re.compile(r"[-_./]")
+
+# Without corpus IDF these would match nearly every chunk, so they carry no weight at all
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both but by
+can could did do does doing down during each few for from further had has have having he her here hers herself him
+himself his how i if in into is it its itself just me more most my myself no nor not now of off on once only or other
+our ours ourselves out over own same she should so some such than that the their theirs them themselves then there
+these they this those through to too under until up very was we were what when where which while who whom why will
+with would you your yours yourself yourselves please tell know get give us
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms; compound codes are kept whole and also split into their parts"""
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        parts = _PART_RE.split(token)
+        if len(parts) > 1:
+            terms.append(token)
+        terms.extend(part for part in parts if part not in STOPWORDS)
+    return terms
+
+
+def _term_index(term: str) -> int:
+    # Stable across processes (unlike hash()), so ingestion and query workers agree
+    return zlib.crc32(term.encode("utf-8")) & 0x7FFFFFFF
+
+
+class SparseEncoder:
+    """BM25-style lexical vectors for Qdrant named sparse vectors.
+
+    Terms are hashed to indices, so no vocabulary has to be stored or shared. Documents
+    get BM25 term-frequency saturation and length normalization against ``avg_doc_terms``;
+    query terms weigh 1 each. The sparse dot product is then BM25 without the IDF factor,
+    which needs corpus statistics that Qdrant only computes server-side from 1.10.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_terms: float = 150.0):
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_terms = max(1.0, avg_doc_terms)
+
+    @staticmethod
+    def _to_vector(weights: Dict[int, float]) -> models.SparseVector:
+        indices = sorted(weights)
+        return models.SparseVector(indices=indices, values=[float(weights[i]) for i in indices])
+
+    def encode_document(self, text: str) -> models.SparseVector:
+        terms = tokenize(text)
+        norm = self.k1 * (1 - self.b + self.b * len(terms) / self.avg_doc_terms)
+        weights: Dict[int, float] = {}
+        for term, tf in Counter(terms).items():
+            index = _term_index(term)
+            # Hash collisions just add up
+            weights[index] = weights.get(index, 0.0) + tf * (self.k1 + 1) / (tf + norm)
+        return self._to_vector(weights)
+
+    def encode_documents(self, texts: List[str]) -> List[models.SparseVector]:
+        return [self.encode_document(text) for text in texts]
+
+    def encode_query(self, text: str) -> Optional[models.SparseVector]:
+        """Query vector, or None when the query has no searchable terms"""
+        weights = {_term_index(term): 1.0 for term in set(tokenize(text))}
+        return self._to_vector(weights) if weights else None
+
+
+def reciprocal_rank_fusion(rankings: List[List[Hashable]], k: int = 60) -> List[Tuple[Hashable, float]]:
+    """Fuse ranked id lists: each id scores sum(1 / (k + rank)), best first"""
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda entry: entry[1], reverse=True)
+
+
+def cosine(query_vector: np.ndarray, vector) -> float:
+    """Cosine similarity between the query and a stored dense vector"""
+    vector = np.asarray(vector, dtype=np.float32)
+    denominator = float(np.linalg.norm(query_vector)) * float(np.linalg.norm(vector))
+    return float(np.dot(query_vector, vector)) / denominator if denominator > 0 else 0.0
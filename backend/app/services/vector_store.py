@@ -1,21 +1,134 @@
 import uuid
 import time
+import asyncio
+import functools
+import gc
+import re
+import hashlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import List, Dict, Optional
 from threading import Lock
 import logging
 from datetime import datetime
 
+import httpx
 import numpy as np
-from qdrant_client import QdrantClient
+from qdrant_client import QdrantClient, AsyncQdrantClient
 from qdrant_client.http import models
-from qdrant_client.http.models import Distance, VectorParams, PointStruct
-from sentence_transformers import SentenceTransformer
+from qdrant_client.http.models import Distance, VectorParams
 
 from ..core.config import get_settings
+from .embedders import Embedder, EmbedderPool
+from .embedding_batcher import EmbeddingBatcher
+from .embedding_cache import EmbeddingCache
+from .exact_search import ExactIndex, ExactSearchCache, NO_POINTS, TOO_LARGE
+from .embedded_qdrant import AsyncEmbeddedQdrantClient, LockedQdrantClient
+from .sparse_encoder import SparseEncoder, cosine, reciprocal_rank_fusion
+from ..utils.cache import LRUCache
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+QUANTIZATION_MODES = ("none", "scalar", "binary")
+
+# Payload-only collections (bot registry, document manifest) still need a vector, so every point gets this one
+PAYLOAD_ONLY_VECTOR = [1.0]
+
+# Namespace for uuid5 point ids; changing it would orphan every existing point id
+POINT_ID_NAMESPACE = uuid.UUID("2b0f5a3e-8c1d-4f6b-9e27-5d4c3a1b0e9f")
+
+
+def point_id(bot_id: str, content_hash: str, chunk_index: int) -> str:
+    """Stable id for a chunk: the same file uploaded to the same bot always maps to the same points"""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{bot_id}:{content_hash}:{chunk_index}"))
+
+
+def quantization_config(mode: Optional[str]) -> Optional[models.QuantizationConfig]:
+    """Qdrant quantization config for a mode; quantized vectors stay in RAM, originals go to disk"""
+    mode = (mode or "none").lower()
+    if mode == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True,
+            )
+        )
+    if mode == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=True)
+        )
+    if mode != "none":
+        raise ValueError(f"Unknown quantization mode: {mode}. Expected one of {QUANTIZATION_MODES}")
+    return None
+
+
+def quantized_search_params(oversampling: Optional[float] = None, rescore: Optional[bool] = None) -> models.SearchParams:
+    """Search params that oversample quantized candidates and rescore them with the original vectors.
+
+    Qdrant ignores these for collections without quantization, so they are safe to send everywhere.
+    """
+    return models.SearchParams(
+        quantization=models.QuantizationSearchParams(
+            rescore=settings.QDRANT_SEARCH_RESCORE if rescore is None else rescore,
+            oversampling=settings.QDRANT_SEARCH_OVERSAMPLING if oversampling is None else oversampling,
+        )
+    )
+
+
+class _IngestRun:
+    """Batching and bookkeeping for one upload, shared by add_texts and add_texts_async.
+
+    The callers only encode and send: stage() turns an encoded batch into point
+    batches and returns those to upsert now with wait=False, always holding back the
+    newest one, which the caller sends last with wait=True as the write barrier.
+    """
+
+    def __init__(self, service: "VectorStoreService", collection_name: str, texts: List[str], metadata: List[Dict] = None):
+        self.service = service
+        self.collection_name = collection_name
+        self.texts = texts
+        self.metadata = metadata
+        self.created_at = datetime.utcnow().isoformat()
+        self.started = time.perf_counter()
+        self.encode_seconds = 0.0
+        self.upsert_batches = 0
+        self.last_batch: Optional[models.Batch] = None
+
+    def batches(self) -> List[tuple]:
+        """(texts, metadata, ids) batches to encode, in order"""
+        ids = self.service._point_ids(self.collection_name, self.texts, self.metadata)
+        return self.service._ingest_batches(self.texts, self.metadata, ids)
+
+    def stage(self, batch_texts: List[str], batch_metadata: List[Dict], batch_ids: List[str], embeddings: np.ndarray, sparse_vectors: Optional[List[models.SparseVector]], encode_seconds: float) -> List[models.Batch]:
+        self.encode_seconds += encode_seconds
+        ready = []
+        for batch in self.service._point_batches(batch_texts, embeddings, batch_metadata, batch_ids, self.created_at, sparse_vectors):
+            if self.last_batch is not None:
+                ready.append(self.last_batch)
+            self.last_batch = batch
+        self.upsert_batches += len(ready)
+        return ready
+
+    def finish(self, barrier_start: float, operation_info):
+        """Record the upload once the barrier upsert returned"""
+        self.upsert_batches += 1
+        now = time.perf_counter()
+        self.service._record_ingest(
+            self.collection_name, len(self.texts), self.upsert_batches, self.encode_seconds, now - self.started, now - barrier_start
+        )
+        self.service._invalidate_exact(self.collection_name, self.metadata)
+        logger.info(f"Successfully added {len(self.texts)} texts to collection {self.collection_name}")
+        logger.debug(f"Operation info: {operation_info}")
+
+    def fail(self, e: Exception):
+        # The collection may have been deleted by another worker; re-check on the next attempt
+        self.service._forget_collection(self.collection_name)
+        self.service._invalidate_exact(self.collection_name, self.metadata)
+        logger.error(f"Failed to add texts to collection {self.collection_name}: {str(e)}")
+        raise Exception(f"Failed to add texts to collection {self.collection_name}: {str(e)}")
+
+
 class VectorStoreService:
     _instance = None
     _lock = Lock()
@@ -33,185 +146,962 @@ class VectorStoreService:
         if self._initialized:
             return
             
-        # Try loading the model with retries
-        max_retries = 3
-        retry_delay = 5  # seconds
-        model_name = 'all-MiniLM-L6-v2'
-        
-        for attempt in range(max_retries):
-            try:
-                self.model = SentenceTransformer(model_name)
-                logger.info(f"Successfully loaded SentenceTransformer model: {model_name}")
-                break
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    raise Exception(f"Failed to load model after {max_retries} attempts: {str(e)}")
-                logger.warning(f"Attempt {attempt + 1} failed, retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-        
-        # Initialize Qdrant client
-        self._init_qdrant_client()
+        # Embedding models and the Qdrant client are loaded lazily (see warm_up)
+        # so that constructing the service never blocks application startup
+        self.embedders = EmbedderPool(
+            settings.EMBEDDING_MODEL_NAME,
+            max_models=settings.EMBEDDING_MAX_LOADED_MODELS,
+            idle_seconds=settings.EMBEDDING_MODEL_IDLE_SECONDS,
+        )
+        self._client = None
+        self._async_client = None
+        self._embedding_cache = None
+        self._init_lock = Lock()
+        self._stats_lock = Lock()
+        # Collections this process has created or seen, so hot paths skip get_collection round-trips.
+        # Another worker may delete one; callers forget it when a write fails (see add_texts).
+        self._known_collections = set()
+        # Small bots are searched in-process from normalized matrices; see _exact_index
+        self.exact_cache = ExactSearchCache(
+            max_bytes=int(settings.EXACT_SEARCH_MAX_MB * 1024 * 1024),
+            ttl_seconds=settings.EXACT_SEARCH_TTL_SECONDS,
+        )
+        self._exact_loads: Dict[tuple, asyncio.Task] = {}
+        self._search_counts = {"exact": 0, "qdrant": 0, "hybrid": 0}
+        # Lexical vectors for hybrid search; which collections have a sparse vector slot is cached
+        self.sparse_encoder = SparseEncoder(avg_doc_terms=settings.SPARSE_AVG_DOC_TERMS)
+        self._sparse_collections: Dict[str, bool] = {}
+        self._collection_lookups_saved = 0
+        self._ingest_stats = {
+            "uploads": 0,
+            "batches": 0,
+            "chunks": 0,
+            "upsert_batches": 0,
+            "encode_seconds": 0.0,
+            "wall_seconds": 0.0,
+            "last_batch_chunks_per_s": 0.0,
+            "last_upload_chunks_per_s": 0.0,
+        }
+
+        # Bounded pool for CPU-bound document encoding so ingestion can't starve chat requests
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.INGEST_EXECUTOR_WORKERS,
+            thread_name_prefix="ingest-embed",
+        )
+        self.model_name = settings.EMBEDDING_MODEL_NAME
+
+        # One batcher per embedding model coalesces concurrent queries into batched forward passes
+        self._query_batchers: Dict[str, EmbeddingBatcher] = {}
+        self.query_cache = LRUCache(
+            max_entries=settings.QUERY_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.QUERY_CACHE_TTL_SECONDS,
+        )
         self._initialized = True
-        
+
+    @property
+    def embedder(self) -> Embedder:
+        """Embedder for the deployment's default model"""
+        return self.embedders.get()
+
+    async def embedder_async(self, model_name: Optional[str] = None) -> Embedder:
+        """Embedder for a model; a first load (seconds, with retries) runs off the event loop"""
+        return await asyncio.to_thread(self.embedders.get, model_name)
+
+    def _query_batcher(self, model_name: Optional[str] = None) -> EmbeddingBatcher:
+        model_name = model_name or self.model_name
+        batcher = self._query_batchers.get(model_name)
+        if batcher is None:
+            with self._init_lock:
+                batcher = self._query_batchers.get(model_name)
+                if batcher is None:
+                    # Resolve the model on every batch so an unloaded model is reloaded, not pinned
+                    batcher = EmbeddingBatcher(
+                        lambda texts: self.embedders.get(model_name).encode(texts),
+                        max_batch_size=settings.QUERY_BATCH_MAX_SIZE,
+                        max_wait_ms=settings.QUERY_BATCH_WINDOW_MS,
+                        name=f"query:{model_name}",
+                    )
+                    self._query_batchers[model_name] = batcher
+        return batcher
+
+    @property
+    def client(self) -> QdrantClient:
+        if self._client is None:
+            with self._init_lock:
+                if self._client is None:
+                    self._init_qdrant_client()
+        return self._client
+
+    @property
+    def embedding_cache(self) -> Optional[EmbeddingCache]:
+        """Persistent chunk embedding cache, or None when EMBEDDING_CACHE_PATH is empty"""
+        if self._embedding_cache is None and settings.EMBEDDING_CACHE_PATH:
+            with self._init_lock:
+                if self._embedding_cache is None:
+                    self._embedding_cache = EmbeddingCache(
+                        settings.EMBEDDING_CACHE_PATH,
+                        max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+                    )
+        return self._embedding_cache
+
+    def warm_up(self) -> Dict:
+        """Load the embedding model, run a warm-up encode and connect to Qdrant"""
+        timings = {}
+
+        start = time.perf_counter()
+        self.embedder
+        timings["model_load_s"] = round(time.perf_counter() - start, 3)
+
+        # The first forward pass allocates buffers and is much slower than later ones
+        start = time.perf_counter()
+        self._query_batcher().encode("warm-up query")
+        timings["warmup_encode_s"] = round(time.perf_counter() - start, 3)
+
+        start = time.perf_counter()
+        self.client
+        timings["qdrant_connect_s"] = round(time.perf_counter() - start, 3)
+
+        logger.info(f"Vector store warm-up complete: {timings}")
+        return timings
+
+    def preload_for_fork(self) -> Dict:
+        """Load the default model's weights in a pre-fork master process.
+
+        Workers forked afterwards share the weight pages copy-on-write instead of each
+        loading their own copy. Nothing that starts threads or opens sockets may run
+        here (no encode, no Qdrant client, no SQLite cache): none of it survives a fork.
+        """
+        timings = {}
+        if settings.EMBEDDING_BACKEND.lower() != "torch":
+            # onnxruntime sessions own thread pools that do not survive fork
+            logger.warning(f"Skipping pre-fork model load for the {settings.EMBEDDING_BACKEND} backend")
+            return timings
+
+        start = time.perf_counter()
+        embedder = self.embedders.get()
+        embedder.model.eval()
+        for parameter in embedder.model.parameters():
+            parameter.requires_grad_(False)
+        timings["model_load_s"] = round(time.perf_counter() - start, 3)
+
+        # Move everything allocated so far out of the GC's reach; otherwise collections
+        # in the workers write to these objects' headers and un-share their pages
+        gc.collect()
+        gc.freeze()
+        logger.info(f"Preloaded {embedder.model_name} for forked workers: {timings}")
+        return timings
+
+    def _client_kwargs(self, prefer_grpc: Optional[bool] = None) -> Dict:
+        """Connection arguments shared by the sync and async Qdrant clients"""
+        kwargs = {
+            "api_key": settings.QDRANT_API_KEY,
+            "prefer_grpc": settings.QDRANT_PREFER_GRPC if prefer_grpc is None else prefer_grpc,
+            "grpc_port": settings.QDRANT_GRPC_PORT,
+            "timeout": settings.QDRANT_TIMEOUT,
+            # qdrant-client turns keep-alive off for localhost by default, paying a new
+            # connection per REST request; gRPC multiplexes over one channel instead
+            "limits": httpx.Limits(
+                max_connections=settings.QDRANT_POOL_SIZE,
+                max_keepalive_connections=settings.QDRANT_POOL_KEEPALIVE,
+            ),
+        }
+        if settings.QDRANT_URL:
+            # Use cloud/remote Qdrant instance
+            kwargs["url"] = settings.QDRANT_URL
+        else:
+            # Use local Qdrant instance
+            kwargs["host"] = settings.QDRANT_HOST
+            kwargs["port"] = settings.QDRANT_PORT
+        return kwargs
+
     def _init_qdrant_client(self):
         """Initialize Qdrant client with configuration"""
         try:
+            if settings.QDRANT_PATH:
+                self._client = self._init_embedded_client()
+                return
+
+            client = QdrantClient(**self._client_kwargs())
+            transport = "gRPC" if settings.QDRANT_PREFER_GRPC else "REST"
             if settings.QDRANT_URL:
-                # Use cloud/remote Qdrant instance
-                self.client = QdrantClient(
-                    url=settings.QDRANT_URL,
-                    api_key=settings.QDRANT_API_KEY,
-                )
-                logger.info(f"Connected to Qdrant cloud instance: {settings.QDRANT_URL}")
+                logger.info(f"Connected to Qdrant cloud instance over {transport}: {settings.QDRANT_URL}")
             else:
-                # Use local Qdrant instance
-                self.client = QdrantClient(
-                    host=settings.QDRANT_HOST,
-                    port=settings.QDRANT_PORT,
-                    api_key=settings.QDRANT_API_KEY,
-                )
-                logger.info(f"Connected to local Qdrant instance: {settings.QDRANT_HOST}:{settings.QDRANT_PORT}")
+                logger.info(f"Connected to local Qdrant instance over {transport}: {settings.QDRANT_HOST}:{settings.QDRANT_PORT}")
                 
             # Test connection
-            collections = self.client.get_collections()
+            collections = client.get_collections()
             logger.info(f"Qdrant connection successful. Found {len(collections.collections)} collections.")
+            self._client = client
             
         except Exception as e:
             logger.error(f"Failed to connect to Qdrant: {str(e)}")
             raise Exception(f"Failed to initialize Qdrant client: {str(e)}")
+
+    def _init_embedded_client(self) -> LockedQdrantClient:
+        """Run Qdrant in-process (local mode) on a storage directory or in memory"""
+        if settings.QDRANT_PATH == ":memory:":
+            client = QdrantClient(location=":memory:")
+        else:
+            client = QdrantClient(path=settings.QDRANT_PATH)
+        logger.info(f"Using embedded Qdrant at {settings.QDRANT_PATH}")
+        return LockedQdrantClient(client)
+
+    @property
+    def async_client(self) -> AsyncQdrantClient:
+        """Async Qdrant client used by the request path so I/O never blocks the event loop"""
+        if self._async_client is None:
+            if settings.QDRANT_PATH:
+                # Embedded storage can only be opened once per process; share it with the sync client
+                embedded = self.client
+                with self._init_lock:
+                    if self._async_client is None:
+                        self._async_client = AsyncEmbeddedQdrantClient(embedded)
+                return self._async_client
+            with self._init_lock:
+                if self._async_client is None:
+                    self._async_client = AsyncQdrantClient(**self._client_kwargs())
+        return self._async_client
+
+    def _vectors_config(self, quantization: Optional[str] = None, model_name: Optional[str] = None, dimension: Optional[int] = None) -> VectorParams:
+        quantization = quantization or settings.QDRANT_QUANTIZATION
+        quantized = quantization_config(quantization)
+        return VectorParams(
+            size=dimension or self.embedders.get(model_name).dimension,
+            distance=Distance.COSINE,  # Use cosine similarity
+            quantization_config=quantized,
+            # With quantized copies in RAM, the originals are only read for rescoring
+            on_disk=quantized is not None and settings.QDRANT_ORIGINALS_ON_DISK,
+        )
         
-    def create_collection(self, collection_name: str):
-        """Create a new Qdrant collection"""
+    def shared_collection_name(self, model_name: Optional[str] = None) -> str:
+        """Multi-tenant collection for a model; vector sizes differ, so each model gets its own"""
+        model_name = model_name or self.model_name
+        if model_name == self.model_name:
+            return settings.QDRANT_SHARED_COLLECTION
+        return f"{settings.QDRANT_SHARED_COLLECTION}__{re.sub(r'[^A-Za-z0-9_-]+', '_', model_name)}"
+
+    def collection_for_bot(self, bot_id: str, model_name: Optional[str] = None) -> str:
+        """Collection that holds a bot's chunks in the configured storage mode"""
+        if settings.QDRANT_STORAGE_MODE == "shared":
+            return self.shared_collection_name(model_name)
+        return f"bot_{bot_id}"
+
+    @staticmethod
+    def tenant_filter(bot_id: str) -> Optional[models.Filter]:
+        """Filter restricting a shared collection to one bot; None in per-bot mode"""
+        if settings.QDRANT_STORAGE_MODE != "shared":
+            return None
+        return models.Filter(must=[models.FieldCondition(key="bot_id", match=models.MatchValue(value=bot_id))])
+
+    @staticmethod
+    def _is_shared_collection(collection_name: str) -> bool:
+        return collection_name == settings.QDRANT_SHARED_COLLECTION or collection_name.startswith(f"{settings.QDRANT_SHARED_COLLECTION}__")
+
+    def _collection_config(self, collection_name: str, quantization: Optional[str], model_name: Optional[str], dimension: Optional[int] = None) -> Dict:
+        if settings.HYBRID_SPARSE_VECTORS:
+            # Qdrant can't add a sparse vector to an existing collection, so it is reserved up front
+            config = {"sparse_vectors_config": {settings.SPARSE_VECTOR_NAME: models.SparseVectorParams()}}
+        else:
+            config = {}
+        if not self._is_shared_collection(collection_name):
+            return {**config, "vectors_config": self._vectors_config(quantization, model_name, dimension)}
+        if quantization:
+            logger.info(f"Ignoring per-bot quantization {quantization} for shared collection {collection_name}")
+        return {
+            **config,
+            "vectors_config": self._vectors_config(None, model_name, dimension),
+            # Every search filters on bot_id, so build per-tenant HNSW graphs instead of one global graph
+            "hnsw_config": models.HnswConfigDiff(payload_m=16, m=0),
+        }
+
+    def _is_known_collection(self, collection_name: str) -> bool:
+        with self._stats_lock:
+            if collection_name in self._known_collections:
+                self._collection_lookups_saved += 1
+                return True
+        return False
+
+    def _remember_collection(self, collection_name: str):
+        with self._stats_lock:
+            self._known_collections.add(collection_name)
+
+    def _forget_collection(self, collection_name: str):
+        with self._stats_lock:
+            self._known_collections.discard(collection_name)
+            self._sparse_collections.pop(collection_name, None)
+
+    def _note_sparse(self, collection_name: str, collection_info) -> bool:
+        sparse_vectors = collection_info.config.params.sparse_vectors or {}
+        has_sparse = settings.SPARSE_VECTOR_NAME in sparse_vectors
+        with self._stats_lock:
+            self._sparse_collections[collection_name] = has_sparse
+        return has_sparse
+
+    def _has_sparse(self, collection_name: str) -> bool:
+        """Whether the collection stores sparse vectors (collections from before hybrid search don't)"""
+        has_sparse = self._sparse_collections.get(collection_name)
+        if has_sparse is None:
+            try:
+                has_sparse = self._note_sparse(collection_name, self.client.get_collection(collection_name))
+            except Exception:
+                return False
+        return has_sparse
+
+    async def _has_sparse_async(self, collection_name: str) -> bool:
+        has_sparse = self._sparse_collections.get(collection_name)
+        if has_sparse is None:
+            try:
+                has_sparse = self._note_sparse(collection_name, await self.async_client.get_collection(collection_name))
+            except Exception:
+                return False
+        return has_sparse
+
+    def collection_exists(self, collection_name: str) -> bool:
+        """Whether a collection exists, answered from the known-collections registry when possible"""
+        if self._is_known_collection(collection_name):
+            return True
+        try:
+            self.client.get_collection(collection_name)
+        except Exception:
+            return False
+        self._remember_collection(collection_name)
+        return True
+
+    async def collection_exists_async(self, collection_name: str) -> bool:
+        if self._is_known_collection(collection_name):
+            return True
+        try:
+            await self.async_client.get_collection(collection_name)
+        except Exception:
+            return False
+        self._remember_collection(collection_name)
+        return True
+
+    def _collection_found(self, collection_name: str, collection_info):
+        logger.info(f"Collection {collection_name} already exists")
+        self._note_sparse(collection_name, collection_info)
+        self._remember_collection(collection_name)
+
+    def _create_collection_calls(self, collection_name: str, quantization: Optional[str], model_name: Optional[str], dimension: int) -> List[tuple]:
+        """(client method, kwargs) calls that create a collection, shared by the sync and async paths"""
+        calls = [("create_collection", {
+            "collection_name": collection_name,
+            **self._collection_config(collection_name, quantization, model_name, dimension),
+        })]
+        if self._is_shared_collection(collection_name):
+            calls.append(("create_payload_index", {
+                "collection_name": collection_name,
+                "field_name": "bot_id",
+                "field_schema": models.PayloadSchemaType.KEYWORD,
+            }))
+        return calls
+
+    def _collection_created(self, collection_name: str):
+        logger.info(f"Successfully created Qdrant collection: {collection_name}")
+        with self._stats_lock:
+            self._sparse_collections[collection_name] = settings.HYBRID_SPARSE_VECTORS
+        self._remember_collection(collection_name)
+
+    def _handle_create_error(self, collection_name: str, e: Exception):
+        # Handle the case where collection already exists (race condition)
+        if "already exists" in str(e).lower():
+            logger.info(f"Collection {collection_name} already exists (race condition)")
+            self._remember_collection(collection_name)
+            return
+        logger.error(f"Failed to create collection {collection_name}: {str(e)}")
+        raise Exception(f"Failed to create collection {collection_name}: {str(e)}")
+
+    def create_collection(self, collection_name: str, quantization: Optional[str] = None, model_name: Optional[str] = None):
+        """Create a new Qdrant collection, optionally with scalar or binary quantization"""
+        if self._is_known_collection(collection_name):
+            return
         try:
             # Check if collection already exists
             try:
-                collection_info = self.client.get_collection(collection_name)
-                logger.info(f"Collection {collection_name} already exists")
+                self._collection_found(collection_name, self.client.get_collection(collection_name))
                 return
             except Exception:
                 # Collection doesn't exist, create it
                 pass
-                
-            # Create collection with vector configuration
-            self.client.create_collection(
+
+            dimension = self.embedders.get(model_name).dimension
+            for method, kwargs in self._create_collection_calls(collection_name, quantization, model_name, dimension):
+                getattr(self.client, method)(**kwargs)
+            self._collection_created(collection_name)
+
+        except Exception as e:
+            self._handle_create_error(collection_name, e)
+
+    async def create_collection_async(self, collection_name: str, quantization: Optional[str] = None, model_name: Optional[str] = None):
+        """Create a new Qdrant collection without blocking the event loop"""
+        if self._is_known_collection(collection_name):
+            return
+        try:
+            try:
+                self._collection_found(collection_name, await self.async_client.get_collection(collection_name))
+                return
+            except Exception:
+                pass
+
+            dimension = (await self.embedder_async(model_name)).dimension
+            for method, kwargs in self._create_collection_calls(collection_name, quantization, model_name, dimension):
+                await getattr(self.async_client, method)(**kwargs)
+            self._collection_created(collection_name)
+
+        except Exception as e:
+            self._handle_create_error(collection_name, e)
+
+    async def ensure_payload_collection_async(self, collection_name: str, keyword_fields: List[str] = None):
+        """Create a payload-only collection if it doesn't exist, with keyword indexes on the given fields"""
+        client = self.async_client
+        try:
+            await client.get_collection(collection_name)
+            return
+        except Exception:
+            pass
+        try:
+            await client.create_collection(
                 collection_name=collection_name,
-                vectors_config=VectorParams(
-                    size=384,  # all-MiniLM-L6-v2 embedding dimension
-                    distance=Distance.COSINE,  # Use cosine similarity
-                ),
+                vectors_config=VectorParams(size=len(PAYLOAD_ONLY_VECTOR), distance=Distance.DOT),
             )
-            logger.info(f"Successfully created Qdrant collection: {collection_name}")
-            
+            for field_name in keyword_fields or []:
+                await client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field_name,
+                    field_schema=models.PayloadSchemaType.KEYWORD,
+                )
+            logger.info(f"Created payload-only collection {collection_name}")
         except Exception as e:
-            # Handle the case where collection already exists (race condition)
-            if "already exists" in str(e).lower():
-                logger.info(f"Collection {collection_name} already exists (race condition)")
-                return
-            logger.error(f"Failed to create collection {collection_name}: {str(e)}")
-            raise Exception(f"Failed to create collection {collection_name}: {str(e)}")
+            if "already exists" not in str(e).lower():
+                raise
+
+    @staticmethod
+    def _point_ids(collection_name: str, texts: List[str], metadata: List[Dict] = None) -> List[str]:
+        """Deterministic point ids, so re-running an ingestion overwrites instead of duplicating.
+
+        Chunks carrying bot_id, content_hash and file_chunk_index are identified by those,
+        independent of where they land in the call; other chunks by bot, collection, position
+        and text, so bots sharing a collection never overwrite each other's identical chunks.
+        """
+        ids = []
+        for i, text in enumerate(texts):
+            meta = metadata[i] if metadata and i < len(metadata) else {}
+            if "content_hash" in meta and "bot_id" in meta:
+                ids.append(point_id(meta["bot_id"], meta["content_hash"], meta.get("file_chunk_index", i)))
+            else:
+                text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+                ids.append(str(uuid.uuid5(POINT_ID_NAMESPACE, f"{meta.get('bot_id')}:{collection_name}:{i}:{text_hash}")))
+        return ids
+
+    def _point_batches(self, texts: List[str], embeddings: np.ndarray, metadata: List[Dict], ids: List[str], created_at: str, sparse_vectors: Optional[List[models.SparseVector]] = None) -> List[models.Batch]:
+        """Split encoded chunks into columnar upsert batches of QDRANT_UPSERT_BATCH_SIZE"""
+        step = max(1, settings.QDRANT_UPSERT_BATCH_SIZE)
+        batches = []
+        for start in range(0, len(texts), step):
+            end = start + step
+            payloads = []
+            for i in range(start, min(end, len(texts))):
+                payload = {"text": texts[i], "created_at": created_at}
+                if metadata and i < len(metadata):
+                    payload.update(metadata[i])
+                payloads.append(payload)
+            # One tolist() over the 2-D block instead of one per vector
+            vectors = embeddings[start:end].tolist()
+            if sparse_vectors is not None:
+                # "" is the collection's unnamed dense vector
+                vectors = {"": vectors, settings.SPARSE_VECTOR_NAME: sparse_vectors[start:end]}
+            batches.append(models.Batch(ids=ids[start:end], vectors=vectors, payloads=payloads))
+        return batches
     
-    def add_texts(self, collection_name: str, texts: List[str], metadata: List[Dict] = None):
-        """Add text chunks to the collection"""
+    def _ingest_batches(self, texts: List[str], metadata: List[Dict], ids: List[str]) -> List[tuple]:
+        """Split chunks into length-sorted batches so each model batch pads to similar lengths.
+
+        In streaming mode batches are encoded one at a time and handed to the upsert
+        pipeline, which bounds memory for very large uploads. Otherwise everything is one batch.
+        """
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        step = max(1, settings.INGEST_STREAM_BATCH_SIZE if settings.INGEST_STREAMING else len(order))
+        batches = []
+        for start in range(0, len(order), step):
+            idx = order[start:start + step]
+            batch_texts = [texts[i] for i in idx]
+            batch_metadata = [metadata[i] if metadata and i < len(metadata) else {} for i in idx]
+            batch_ids = [ids[i] for i in idx]
+            batches.append((batch_texts, batch_metadata, batch_ids))
+        return batches
+
+    def _record_ingest_batch(self, collection_name: str, count: int, encode_seconds: float, batch_seconds: float):
+        # batch_seconds runs until the batch's points are queued, so it includes waiting on in-flight upserts
+        throughput = count / batch_seconds if batch_seconds > 0 else 0.0
+        logger.info(
+            f"Ingested batch of {count} chunks into {collection_name}: {throughput:.1f} chunks/s "
+            f"(encode {encode_seconds * 1000:.0f}ms, queue {(batch_seconds - encode_seconds) * 1000:.0f}ms)"
+        )
+        with self._stats_lock:
+            self._ingest_stats["batches"] += 1
+            self._ingest_stats["last_batch_chunks_per_s"] = throughput
+
+    def _record_ingest(self, collection_name: str, count: int, upsert_batches: int, encode_seconds: float, wall_seconds: float, barrier_seconds: float):
+        throughput = count / wall_seconds if wall_seconds > 0 else 0.0
+        logger.info(
+            f"Ingested {count} chunks into {collection_name} in {upsert_batches} upsert batches: {throughput:.1f} chunks/s "
+            f"(total {wall_seconds * 1000:.0f}ms, encode {encode_seconds * 1000:.0f}ms, final write barrier {barrier_seconds * 1000:.0f}ms)"
+        )
+        with self._stats_lock:
+            stats = self._ingest_stats
+            stats["uploads"] += 1
+            stats["chunks"] += count
+            stats["upsert_batches"] += upsert_batches
+            stats["encode_seconds"] += encode_seconds
+            stats["wall_seconds"] += wall_seconds
+            stats["last_upload_chunks_per_s"] = throughput
+
+    def add_texts(self, collection_name: str, texts: List[str], metadata: List[Dict] = None, model_name: Optional[str] = None):
+        """Add text chunks to the collection.
+
+        Batches are upserted with wait=False, up to QDRANT_UPSERT_PARALLELISM at a time, while
+        later chunks are still being encoded. The last batch is sent with wait=True only after
+        every other batch was acknowledged; Qdrant applies a collection's updates in order, so
+        once it returns the whole upload is searchable.
+        """
         if not texts:
             logger.warning("No texts provided to add_texts")
             return
 
+        run = _IngestRun(self, collection_name, texts, metadata)
         try:
             # Ensure collection exists
-            self.create_collection(collection_name)
-            
-            # Generate embeddings for the texts
+            self.create_collection(collection_name, model_name=model_name)
+            sparse = self._has_sparse(collection_name)
+
             logger.info(f"Generating embeddings for {len(texts)} texts")
-            embeddings = self.model.encode(texts)
-            
-            # Prepare points for insertion
-            points = []
-            for i, (text, embedding) in enumerate(zip(texts, embeddings)):
-                point_id = str(uuid.uuid4())
-                
-                # Prepare payload (metadata)
-                payload = {
-                    "text": text,
-                    "created_at": datetime.utcnow().isoformat(),
-                }
-                
-                # Add custom metadata if provided
-                if metadata and i < len(metadata):
-                    payload.update(metadata[i])
-                
-                points.append(
-                    PointStruct(
-                        id=point_id,
-                        vector=embedding.tolist(),
-                        payload=payload
-                    )
-                )
-            
-            # Insert points into Qdrant
-            operation_info = self.client.upsert(
-                collection_name=collection_name,
-                points=points
-            )
-            
-            logger.info(f"Successfully added {len(texts)} texts to collection {collection_name}")
-            logger.debug(f"Operation info: {operation_info}")
-            
+            in_flight = set()
+            with ThreadPoolExecutor(max_workers=max(1, settings.QDRANT_UPSERT_PARALLELISM), thread_name_prefix="upsert") as pool:
+                for batch_texts, batch_metadata, batch_ids in run.batches():
+                    # Generate embeddings for the batch
+                    start = time.perf_counter()
+                    embeddings = self.encode_texts(batch_texts, model_name=model_name)
+                    sparse_vectors = self.sparse_encoder.encode_documents(batch_texts) if sparse else None
+                    batch_encode_seconds = time.perf_counter() - start
+
+                    for batch in run.stage(batch_texts, batch_metadata, batch_ids, embeddings, sparse_vectors, batch_encode_seconds):
+                        if len(in_flight) >= max(1, settings.QDRANT_UPSERT_PARALLELISM):
+                            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                future.result()
+                        in_flight.add(pool.submit(
+                            self.client.upsert, collection_name=collection_name, points=batch, wait=False
+                        ))
+                    self._record_ingest_batch(collection_name, len(batch_texts), batch_encode_seconds, time.perf_counter() - start)
+
+                for future in in_flight:
+                    future.result()
+
+            # Final consistency barrier
+            barrier_start = time.perf_counter()
+            run.finish(barrier_start, self.client.upsert(collection_name=collection_name, points=run.last_batch, wait=True))
+
+        except Exception as e:
+            run.fail(e)
+
+    def encode_texts(self, texts: List[str], batch_size: Optional[int] = None, model_name: Optional[str] = None) -> np.ndarray:
+        """Encode document chunks, only running the model for chunks missing from the embedding cache"""
+        batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        embedder = self.embedders.get(model_name)
+        cache = self.embedding_cache
+        if cache is None:
+            return embedder.encode(texts, batch_size=batch_size)
+
+        keys = [EmbeddingCache.make_key(embedder.model_name, embedder.variant, text) for text in texts]
+        try:
+            cached = cache.get_many(keys)
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed, encoding all chunks: {str(e)}")
+            cached = {}
+
+        # Encode each missing chunk once, even if it repeats within the upload
+        miss_idx = []
+        seen = set()
+        for i, key in enumerate(keys):
+            if key not in cached and key not in seen:
+                seen.add(key)
+                miss_idx.append(i)
+        if miss_idx:
+            encoded = embedder.encode([texts[i] for i in miss_idx], batch_size=batch_size)
+            new_vectors = {keys[i]: vector for i, vector in zip(miss_idx, encoded)}
+            try:
+                cache.put_many(list(new_vectors.items()))
+            except Exception as e:
+                logger.warning(f"Failed to store embeddings in cache: {str(e)}")
+            cached.update(new_vectors)
+
+        embeddings = np.empty((len(texts), embedder.dimension), dtype=np.float32)
+        for i, key in enumerate(keys):
+            embeddings[i] = cached[key]
+
+        logger.info(f"Embedding cache: {len(texts) - len(miss_idx)} of {len(texts)} chunks reused, {len(miss_idx)} encoded")
+        return embeddings
+
+    async def encode_texts_async(self, texts: List[str], model_name: Optional[str] = None) -> np.ndarray:
+        """Encode document chunks on the bounded ingestion executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(self.encode_texts, texts, model_name=model_name))
+
+    async def add_texts_async(self, collection_name: str, texts: List[str], metadata: List[Dict] = None, model_name: Optional[str] = None):
+        """Add text chunks to the collection without blocking the event loop (same write pattern as add_texts)"""
+        if not texts:
+            logger.warning("No texts provided to add_texts")
+            return
+
+        run = _IngestRun(self, collection_name, texts, metadata)
+        in_flight = set()
+        try:
+            await self.create_collection_async(collection_name, model_name=model_name)
+            sparse = await self._has_sparse_async(collection_name)
+
+            logger.info(f"Generating embeddings for {len(texts)} texts")
+            for batch_texts, batch_metadata, batch_ids in run.batches():
+                start = time.perf_counter()
+                embeddings = await self.encode_texts_async(batch_texts, model_name=model_name)
+                sparse_vectors = None
+                if sparse:
+                    loop = asyncio.get_running_loop()
+                    sparse_vectors = await loop.run_in_executor(self._executor, self.sparse_encoder.encode_documents, batch_texts)
+                batch_encode_seconds = time.perf_counter() - start
+
+                for batch in run.stage(batch_texts, batch_metadata, batch_ids, embeddings, sparse_vectors, batch_encode_seconds):
+                    if len(in_flight) >= max(1, settings.QDRANT_UPSERT_PARALLELISM):
+                        done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            task.result()
+                    in_flight.add(asyncio.create_task(
+                        self.async_client.upsert(collection_name=collection_name, points=batch, wait=False)
+                    ))
+                self._record_ingest_batch(collection_name, len(batch_texts), batch_encode_seconds, time.perf_counter() - start)
+
+            if in_flight:
+                await asyncio.gather(*in_flight)
+
+            # Final consistency barrier
+            barrier_start = time.perf_counter()
+            run.finish(barrier_start, await self.async_client.upsert(collection_name=collection_name, points=run.last_batch, wait=True))
+
         except Exception as e:
-            logger.error(f"Failed to add texts to collection {collection_name}: {str(e)}")
-            raise Exception(f"Failed to add texts to collection {collection_name}: {str(e)}")
+            for task in in_flight:
+                task.cancel()
+            run.fail(e)
 
     def delete_collection(self, collection_name: str):
         """Delete a Qdrant collection"""
         try:
             # Try to delete the collection directly
+            self._forget_collection(collection_name)
+            self._invalidate_exact(collection_name)
             result = self.client.delete_collection(collection_name)
             logger.info(f"Successfully deleted collection: {collection_name}")
             return result
             
         except Exception as e:
-            error_msg = str(e).lower()
-            # If collection doesn't exist, that's fine
-            if "not found" in error_msg or "doesn't exist" in error_msg or "404" in error_msg:
-                logger.info(f"Collection {collection_name} doesn't exist, nothing to delete")
-                return
-            # Otherwise, it's a real error
-            logger.error(f"Failed to delete collection {collection_name}: {str(e)}")
-            raise Exception(f"Failed to delete collection {collection_name}: {str(e)}")
+            self._handle_delete_error(collection_name, e)
 
-    def search(self, collection_name: str, query: str, limit: int = 5) -> List[Dict]:
-        """Search for similar text chunks using Qdrant"""
+    async def delete_collection_async(self, collection_name: str):
+        """Delete a Qdrant collection without blocking the event loop"""
         try:
-            # Generate query embedding
-            query_vector = self.model.encode([query])[0]
+            self._forget_collection(collection_name)
+            self._invalidate_exact(collection_name)
+            result = await self.async_client.delete_collection(collection_name)
+            logger.info(f"Successfully deleted collection: {collection_name}")
+            return result
+        except Exception as e:
+            self._handle_delete_error(collection_name, e)
+
+    @staticmethod
+    def _is_missing_collection_error(e: Exception) -> bool:
+        error_msg = str(e).lower()
+        return "not found" in error_msg or "doesn't exist" in error_msg or "404" in error_msg
+
+    @staticmethod
+    def _handle_delete_error(collection_name: str, e: Exception):
+        # If collection doesn't exist, that's fine
+        if VectorStoreService._is_missing_collection_error(e):
+            logger.info(f"Collection {collection_name} doesn't exist, nothing to delete")
+            return
+        # Otherwise, it's a real error
+        logger.error(f"Failed to delete collection {collection_name}: {str(e)}")
+        raise Exception(f"Failed to delete collection {collection_name}: {str(e)}")
+
+    def _normalize_query(self, query: str, model_name: Optional[str] = None) -> str:
+        """Cache key text for a query: tokenizers ignore whitespace runs, and only uncased ones ignore case"""
+        query = " ".join(query.split())
+        # A model that isn't loaded yet can't be asked; its keys just stay cased until it is
+        embedder = self.embedders.peek(model_name or self.model_name)
+        return query.lower() if embedder is not None and embedder.lowercases else query
+
+    def embed_query(self, query: str, model_name: Optional[str] = None) -> np.ndarray:
+        """Embed a search query, reusing cached vectors for repeated questions"""
+        model_name = model_name or self.model_name
+        cache_key = (model_name, self._normalize_query(query, model_name))
+        query_vector = self.query_cache.get(cache_key)
+        if query_vector is None:
+            query_vector = self._query_batcher(model_name).encode(query)
+            query_vector.setflags(write=False)
+            self.query_cache.set(cache_key, query_vector)
+        return query_vector
+
+    async def embed_query_async(self, query: str, model_name: Optional[str] = None) -> np.ndarray:
+        """Embed a search query without blocking the event loop while the batcher runs"""
+        model_name = model_name or self.model_name
+        cache_key = (model_name, self._normalize_query(query, model_name))
+        query_vector = self.query_cache.get(cache_key)
+        if query_vector is None:
+            query_vector = await asyncio.wrap_future(self._query_batcher(model_name).submit(query))
+            query_vector.setflags(write=False)
+            self.query_cache.set(cache_key, query_vector)
+        return query_vector
+
+    def _exact_key(self, collection_name: str, bot_id: Optional[str]) -> tuple:
+        return (collection_name, bot_id if self._is_shared_collection(collection_name) else None)
+
+    def _count_search(self, path: str):
+        with self._stats_lock:
+            self._search_counts[path] += 1
+
+    def _exact_index(self, collection_name: str, bot_id: Optional[str], content_version: Optional[str] = None, load: bool = True) -> Optional[ExactIndex]:
+        """Cached exact index for a small bot; on a miss, start loading one (if load) and let this query use Qdrant"""
+        if not settings.EXACT_SEARCH_ENABLED:
+            return None
+        key = self._exact_key(collection_name, bot_id)
+        index = self.exact_cache.get(key, content_version)
+        if index is None and load and key not in self._exact_loads:
+            self.exact_cache.begin_load(key)
+            task = asyncio.create_task(self._load_exact_index(key, bot_id, content_version))
+            self._exact_loads[key] = task
+            task.add_done_callback(lambda _: self._exact_loads.pop(key, None))
+        return index if isinstance(index, ExactIndex) else None
+
+    async def _load_exact_index(self, key: tuple, bot_id: Optional[str], content_version: Optional[str] = None):
+        collection_name = key[0]
+        scroll_filter = self.tenant_filter(bot_id) if key[1] is not None else None
+        try:
+            count = (await self.async_client.count(collection_name, count_filter=scroll_filter, exact=True)).count
+            if count > settings.EXACT_SEARCH_MAX_POINTS:
+                self.exact_cache.put(key, TOO_LARGE, content_version)
+                return
+
+            vectors, payloads = [], []
+            offset = None
+            while True:
+                points, offset = await self.async_client.scroll(
+                    collection_name=collection_name,
+                    scroll_filter=scroll_filter,
+                    limit=1000,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True,
+                )
+                for point in points:
+                    vectors.append(self._dense_vector(point.vector))
+                    payloads.append(point.payload or {})
+                if offset is None:
+                    break
+            if not payloads:
+                self.exact_cache.put(key, NO_POINTS, content_version)
+                return
+
+            # Building the matrix from Python lists takes a while for 5k x 384; keep it off the loop
+            loop = asyncio.get_running_loop()
+            index = await loop.run_in_executor(None, ExactIndex, vectors, payloads, settings.EXACT_SEARCH_DTYPE)
+            if self.exact_cache.put(key, index, content_version):
+                logger.info(f"Loaded exact-search index for {key}: {len(index)} points, {index.nbytes / 1024 / 1024:.1f}MB")
+        except Exception as e:
+            if self._is_missing_collection_error(e):
+                # The bot's first upload creates the collection and bumps content_version
+                self.exact_cache.put(key, NO_POINTS, content_version)
+                return
+            logger.warning(f"Failed to load exact-search index for {key}: {str(e)}")
+        finally:
+            self.exact_cache.end_load(key)
+
+    def _invalidate_exact(self, collection_name: str, metadata: Optional[List[Dict]] = None):
+        """Drop cached exact indexes after a collection changed (only the uploading bots' in a shared collection)"""
+        bot_ids = {meta.get("bot_id") for meta in metadata or [] if meta.get("bot_id")}
+        self.exact_cache.invalidate(
+            lambda key: key[0] == collection_name and (key[1] is None or not bot_ids or key[1] in bot_ids)
+        )
+
+    @staticmethod
+    def _dense_vector(vector):
+        # Collections with a sparse vector return {"": dense, name: sparse}
+        return vector.get("") if isinstance(vector, dict) else vector
+
+    def _format_results(self, collection_name: str, query: str, hits) -> List[Dict]:
+        """Format (score, payload[, vector[, sparse_rank]]) hits from Qdrant, hybrid fusion or the exact-search path"""
+        results = []
+        for hit in hits:
+            # Cosine similarity scores (higher is better)
+            score = float(hit[0])
+            payload = hit[1] or {}
             
-            # Search in Qdrant
-            search_result = self.client.search(
-                collection_name=collection_name,
-                query_vector=query_vector.tolist(),
-                limit=limit,
+            result = {
+                "text": payload.get("text", ""),
+                "metadata": {k: v for k, v in payload.items() if k != "text"},
+                "score": score
+            }
+            if len(hit) > 2 and hit[2] is not None:
+                result["vector"] = np.asarray(hit[2], dtype=np.float32)
+            if len(hit) > 3 and hit[3] is not None:
+                result["sparse_rank"] = hit[3]
+            results.append(result)
+        
+        logger.info(f"Found {len(results)} results for query '{query}' in collection {collection_name}")
+        for r in results:
+            logger.debug(f"Score: {r['score']:.3f} | Text: {r['text'][:100]}...")
+        return results
+
+    def _hybrid_requests(self, query: str, query_vector: np.ndarray, query_filter: Optional[models.Filter], limit: int, with_vectors: bool = False) -> Optional[List[models.SearchRequest]]:
+        """Dense and sparse legs for one search_batch call; None if the query has no lexical terms"""
+        sparse_query = self.sparse_encoder.encode_query(query)
+        if sparse_query is None:
+            return None
+        candidates = max(limit, settings.HYBRID_CANDIDATES)
+        return [
+            models.SearchRequest(
+                vector=query_vector.tolist(),
+                filter=query_filter,
+                limit=candidates,
+                params=quantized_search_params(),
                 with_payload=True,
-                with_vectors=False,  # We don't need vectors in response
+                with_vector=with_vectors,
+            ),
+            models.SearchRequest(
+                vector=models.NamedSparseVector(name=settings.SPARSE_VECTOR_NAME, vector=sparse_query),
+                filter=query_filter,
+                limit=candidates,
+                with_payload=True,
+                # Lexical-only hits still need a cosine score for the caller's thresholds
+                with_vector=True,
+            ),
+        ]
+
+    @staticmethod
+    def _fuse_hybrid(query_vector: np.ndarray, responses: List[List[models.ScoredPoint]], limit: int, with_vectors: bool = False) -> List[tuple]:
+        """Order both legs by reciprocal rank fusion.
+
+        Every hit keeps its dense cosine score and carries its rank in the sparse leg
+        (None if lexical search didn't return it), so callers can keep strong lexical
+        matches whose cosine is low.
+        """
+        dense_hits, sparse_hits = responses
+        # Points sharing no term with the query can come back with score 0; they are no lexical match
+        sparse_hits = [point for point in sparse_hits if point.score > 0]
+        points = {}
+        scores = {point.id: point.score for point in dense_hits}
+        sparse_ranks = {point.id: rank for rank, point in enumerate(sparse_hits, start=1)}
+        for point in dense_hits:
+            points[point.id] = point
+        for point in sparse_hits:
+            points.setdefault(point.id, point)
+            if point.id not in scores:
+                vector = VectorStoreService._dense_vector(point.vector)
+                scores[point.id] = cosine(query_vector, vector) if vector else 0.0
+        fused = reciprocal_rank_fusion(
+            [[point.id for point in dense_hits], [point.id for point in sparse_hits]],
+            k=settings.HYBRID_RRF_K,
+        )
+        return [
+            (
+                scores[point_id],
+                points[point_id].payload,
+                VectorStoreService._dense_vector(points[point_id].vector) if with_vectors else None,
+                sparse_ranks.get(point_id),
             )
-            
-            # Format results
-            results = []
-            for scored_point in search_result:
-                # Qdrant returns cosine similarity scores (higher is better)
-                score = float(scored_point.score)
-                payload = scored_point.payload
-                
-                results.append({
-                    "text": payload.get("text", ""),
-                    "metadata": {k: v for k, v in payload.items() if k != "text"},
-                    "score": score
-                })
-            
-            logger.info(f"Found {len(results)} results for query '{query}' in collection {collection_name}")
-            for r in results:
-                logger.debug(f"Score: {r['score']:.3f} | Text: {r['text'][:100]}...")
-            
-            return results
-            
+            for point_id, _ in fused[:limit]
+        ]
+
+    def _search_filter(self, query_filter: Optional[models.Filter], bot_id: Optional[str]) -> tuple:
+        """(filter, is_custom): a caller's own filter wins over the bot's tenant filter"""
+        if query_filter is not None:
+            return query_filter, True
+        return (self.tenant_filter(bot_id) if bot_id else None), False
+
+    @staticmethod
+    def _dense_search_kwargs(collection_name: str, query_vector: np.ndarray, query_filter: Optional[models.Filter], limit: int, with_vectors: bool) -> Dict:
+        return {
+            "collection_name": collection_name,
+            "query_vector": query_vector.tolist(),
+            "query_filter": query_filter,
+            "limit": limit,
+            "search_params": quantized_search_params(),
+            "with_payload": True,
+            "with_vectors": with_vectors,
+        }
+
+    def _format_points(self, collection_name: str, query: str, points: List[models.ScoredPoint]) -> List[Dict]:
+        return self._format_results(collection_name, query, [(p.score, p.payload, self._dense_vector(p.vector)) for p in points])
+
+    def search(self, collection_name: str, query: str, limit: int = 5, model_name: Optional[str] = None, query_filter: Optional[models.Filter] = None, bot_id: Optional[str] = None, mode: str = "dense", with_vectors: bool = False, content_version: Optional[str] = None) -> List[Dict]:
+        """Search for similar text chunks using Qdrant (or an already cached exact index).
+
+        mode="hybrid" adds a sparse lexical leg in the same request and fuses both
+        rankings; collections without sparse vectors are searched dense-only.
+        with_vectors adds each hit's dense vector to its result as "vector".
+        content_version (the bot's, from the registry) keeps exact indexes from
+        before another worker's upload from being used.
+        """
+        try:
+            # Generate query embedding
+            query_vector = self.embed_query(query, model_name)
+
+            query_filter, custom_filter = self._search_filter(query_filter, bot_id)
+            if mode == "hybrid" and self._has_sparse(collection_name):
+                requests = self._hybrid_requests(query, query_vector, query_filter, limit, with_vectors)
+                if requests:
+                    self._count_search("hybrid")
+                    responses = self.client.search_batch(collection_name=collection_name, requests=requests)
+                    return self._format_results(collection_name, query, self._fuse_hybrid(query_vector, responses, limit, with_vectors))
+
+            # Loading an exact index needs the event loop, so only an already cached one is used here
+            index = None if custom_filter else self._exact_index(collection_name, bot_id, content_version, load=False)
+            if index is not None:
+                self._count_search("exact")
+                return self._format_results(collection_name, query, index.search(query_vector, limit, with_vectors))
+            self._count_search("qdrant")
+
+            # Search in Qdrant
+            search_result = self.client.search(**self._dense_search_kwargs(collection_name, query_vector, query_filter, limit, with_vectors))
+            return self._format_points(collection_name, query, search_result)
+
+        except Exception as e:
+            logger.error(f"Error searching collection {collection_name}: {str(e)}")
+            return []
+
+    async def search_async(self, collection_name: str, query: str, limit: int = 5, model_name: Optional[str] = None, query_filter: Optional[models.Filter] = None, bot_id: Optional[str] = None, mode: str = "dense", with_vectors: bool = False, content_version: Optional[str] = None) -> List[Dict]:
+        """Search for similar text chunks without blocking the event loop.
+
+        Pass bot_id rather than query_filter so small bots can be answered from the
+        in-process exact index; custom filters always go to Qdrant. Hybrid searches
+        always go to Qdrant too (see search).
+        """
+        try:
+            query_vector = await self.embed_query_async(query, model_name)
+
+            query_filter, custom_filter = self._search_filter(query_filter, bot_id)
+            if mode == "hybrid" and await self._has_sparse_async(collection_name):
+                requests = self._hybrid_requests(query, query_vector, query_filter, limit, with_vectors)
+                if requests:
+                    self._count_search("hybrid")
+                    responses = await self.async_client.search_batch(collection_name=collection_name, requests=requests)
+                    return self._format_results(collection_name, query, self._fuse_hybrid(query_vector, responses, limit, with_vectors))
+
+            index = None if custom_filter else self._exact_index(collection_name, bot_id, content_version)
+            if index is not None:
+                self._count_search("exact")
+                return self._format_results(collection_name, query, index.search(query_vector, limit, with_vectors))
+            self._count_search("qdrant")
+
+            search_result = await self.async_client.search(**self._dense_search_kwargs(collection_name, query_vector, query_filter, limit, with_vectors))
+            return self._format_points(collection_name, query, search_result)
+
         except Exception as e:
             logger.error(f"Error searching collection {collection_name}: {str(e)}")
             return []
@@ -244,30 +1134,54 @@ class VectorStoreService:
             logger.error(f"Error listing collections: {str(e)}")
             return []
 
-    def get_collection_stats(self, collection_name: str) -> Dict:
-        """Get statistics for a collection"""
+    @staticmethod
+    def _collection_stats(collection_info, total_points: Optional[int]) -> Dict:
+        return {
+            "total_points": total_points,
+            "vectors_count": collection_info.vectors_count,
+            "indexed_vectors_count": collection_info.indexed_vectors_count,
+            "status": collection_info.status.value if collection_info.status else "unknown"
+        }
+
+    @staticmethod
+    def _empty_collection_stats() -> Dict:
+        return {
+            "total_points": 0,
+            "vectors_count": 0,
+            "indexed_vectors_count": 0,
+            "status": "error"
+        }
+
+    def get_collection_stats(self, collection_name: str, count_filter: Optional[models.Filter] = None) -> Dict:
+        """Get statistics for a collection, counting only points matching count_filter if given"""
         try:
             collection_info = self.client.get_collection(collection_name)
-            return {
-                "total_points": collection_info.points_count,
-                "vectors_count": collection_info.vectors_count,
-                "indexed_vectors_count": collection_info.indexed_vectors_count,
-                "status": collection_info.status.value if collection_info.status else "unknown"
-            }
+            total_points = collection_info.points_count
+            if count_filter is not None:
+                total_points = self.client.count(collection_name, count_filter=count_filter, exact=True).count
+            return self._collection_stats(collection_info, total_points)
         except Exception as e:
             logger.error(f"Error getting stats for collection {collection_name}: {str(e)}")
-            return {
-                "total_points": 0,
-                "vectors_count": 0,
-                "indexed_vectors_count": 0,
-                "status": "error"
-            }
+            return self._empty_collection_stats()
+
+    async def get_collection_stats_async(self, collection_name: str, count_filter: Optional[models.Filter] = None) -> Dict:
+        """Same as get_collection_stats, without blocking the event loop"""
+        try:
+            collection_info = await self.async_client.get_collection(collection_name)
+            total_points = collection_info.points_count
+            if count_filter is not None:
+                total_points = (await self.async_client.count(collection_name, count_filter=count_filter, exact=True)).count
+            return self._collection_stats(collection_info, total_points)
+        except Exception as e:
+            logger.error(f"Error getting stats for collection {collection_name}: {str(e)}")
+            return self._empty_collection_stats()
 
-    def scroll_collection(self, collection_name: str, limit: int = 100, offset: Optional[str] = None) -> Dict:
-        """Scroll through all points in a collection"""
+    def scroll_collection(self, collection_name: str, limit: int = 100, offset: Optional[str] = None, scroll_filter: Optional[models.Filter] = None) -> Dict:
+        """Scroll through all points in a collection, or those matching scroll_filter"""
         try:
             result = self.client.scroll(
                 collection_name=collection_name,
+                scroll_filter=scroll_filter,
                 limit=limit,
                 offset=offset,
                 with_payload=True,
@@ -291,6 +1205,7 @@ class VectorStoreService:
     def delete_points(self, collection_name: str, point_ids: List[str]) -> bool:
         """Delete specific points from a collection"""
         try:
+            self._invalidate_exact(collection_name)
             operation_info = self.client.delete(
                 collection_name=collection_name,
                 points_selector=models.PointIdsList(
@@ -303,9 +1218,38 @@ class VectorStoreService:
             logger.error(f"Error deleting points from collection {collection_name}: {str(e)}")
             return False
 
+    def delete_points_by_filter(self, collection_name: str, points_filter: models.Filter) -> bool:
+        """Delete all points matching a filter, e.g. one bot's chunks in a shared collection"""
+        try:
+            self._invalidate_exact(collection_name)
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=models.FilterSelector(filter=points_filter),
+            )
+            logger.info(f"Deleted points matching {points_filter} from collection {collection_name}")
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting points by filter from collection {collection_name}: {str(e)}")
+            return False
+
+    async def delete_points_by_filter_async(self, collection_name: str, points_filter: models.Filter) -> bool:
+        """Same as delete_points_by_filter, without blocking the event loop"""
+        try:
+            self._invalidate_exact(collection_name)
+            await self.async_client.delete(
+                collection_name=collection_name,
+                points_selector=models.FilterSelector(filter=points_filter),
+            )
+            logger.info(f"Deleted points matching {points_filter} from collection {collection_name}")
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting points by filter from collection {collection_name}: {str(e)}")
+            return False
+
     def update_payload(self, collection_name: str, point_id: str, payload: Dict) -> bool:
         """Update payload for a specific point"""
         try:
+            self._invalidate_exact(collection_name)
             operation_info = self.client.set_payload(
                 collection_name=collection_name,
                 payload=payload,
@@ -317,6 +1261,48 @@ class VectorStoreService:
             logger.error(f"Error updating payload for point {point_id}: {str(e)}")
             return False
 
+    def get_ingest_stats(self) -> Dict:
+        """Get ingestion throughput statistics for the metrics endpoint"""
+        with self._stats_lock:
+            stats = dict(self._ingest_stats)
+        stats["avg_chunks_per_s"] = stats["chunks"] / stats["wall_seconds"] if stats["wall_seconds"] > 0 else 0.0
+        stats["batch_size"] = settings.EMBEDDING_BATCH_SIZE
+        stats["streaming"] = settings.INGEST_STREAMING
+        stats["stream_batch_size"] = settings.INGEST_STREAM_BATCH_SIZE
+        stats["upsert_batch_size"] = settings.QDRANT_UPSERT_BATCH_SIZE
+        stats["upsert_parallelism"] = settings.QDRANT_UPSERT_PARALLELISM
+        return stats
+
+    def get_collection_cache_stats(self) -> Dict:
+        """Known-collections registry statistics for the metrics endpoint"""
+        with self._stats_lock:
+            return {
+                "known_collections": len(self._known_collections),
+                "lookups_saved": self._collection_lookups_saved,
+            }
+
+    def get_exact_search_stats(self) -> Dict:
+        """Exact-search fast path statistics for the metrics endpoint"""
+        with self._stats_lock:
+            searches = dict(self._search_counts)
+        return {
+            "enabled": settings.EXACT_SEARCH_ENABLED,
+            "max_points": settings.EXACT_SEARCH_MAX_POINTS,
+            "searches": searches,
+            "cache": self.exact_cache.get_stats(),
+        }
+
+    def get_embedding_stats(self) -> Dict:
+        """Get embedding statistics for the metrics endpoint"""
+        return {
+            "default_model": self.model_name,
+            "backend": settings.EMBEDDING_BACKEND,
+            "models": self.embedders.get_stats(),
+            "query_batchers": {name: batcher.get_stats() for name, batcher in list(self._query_batchers.items())},
+            "query_cache": self.query_cache.get_stats(),
+            "chunk_cache": self._embedding_cache.get_stats() if self._embedding_cache else None,
+        }
+
     def health_check(self) -> Dict:
         """Check Qdrant health and return status"""
         try:
@@ -325,6 +1311,7 @@ class VectorStoreService:
             return {
                 "status": "healthy",
                 "collections_count": len(collections.collections),
+                "transport": "embedded" if settings.QDRANT_PATH else ("grpc" if settings.QDRANT_PREFER_GRPC else "rest"),
                 "message": "Qdrant is running and accessible"
             }
         except Exception as e:
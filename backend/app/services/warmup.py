@@ -0,0 +1,88 @@
+import time
+from datetime import datetime
+from threading import Lock, Thread
+from typing import Dict, Optional
+
+from ..core.config import get_settings
+from ..log_config import logger
+
+settings = get_settings()
+
+
+class WarmupService:
+    """Loads models and connects to backing services in a background thread after startup"""
+    _instance = None
+    _lock = Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(WarmupService, cls).__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if not self._initialized:
+                self.state = "pending"
+                self.error: Optional[str] = None
+                self.started_at: Optional[str] = None
+                self.finished_at: Optional[str] = None
+                self.timings: Dict = {}
+                self._thread: Optional[Thread] = None
+                self._initialized = True
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == "ready"
+
+    def start(self):
+        """Start warming up in the background; safe to call more than once"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.state = "warming"
+            self.started_at = datetime.utcnow().isoformat()
+            self._thread = Thread(target=self._run, name="warmup", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        from .vector_store import VectorStoreService
+        from .auth import AuthService
+        from .reranker import Reranker
+
+        start = time.perf_counter()
+        try:
+            self.timings.update(VectorStoreService().warm_up())
+
+            if settings.RERANK_ENABLED:
+                step_start = time.perf_counter()
+                Reranker().load()
+                self.timings["rerank_model_load_s"] = round(time.perf_counter() - step_start, 3)
+
+            step_start = time.perf_counter()
+            AuthService().client
+            self.timings["supabase_connect_s"] = round(time.perf_counter() - step_start, 3)
+
+            self.state = "ready"
+            logger.info(f"Warm-up finished in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            logger.error(f"Warm-up failed: {str(e)}", exc_info=True)
+        finally:
+            self.timings["total_s"] = round(time.perf_counter() - start, 3)
+            self.finished_at = datetime.utcnow().isoformat()
+
+    def get_status(self) -> Dict:
+        return {
+            "state": self.state,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "timings": dict(self.timings),
+        }
@@ -0,0 +1,31 @@
+import os
+from typing import Dict
+
+
+def get_process_memory() -> Dict:
+    """Memory usage of the current process in MB.
+
+    ``uss_mb`` (pages only this process maps) is what each extra worker really costs;
+    ``shared_mb`` covers pages shared with other processes, such as model weights
+    inherited from a preloading gunicorn master. Falls back to peak RSS where
+    /proc/self/smaps_rollup is not available.
+    """
+    fields = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    except OSError:
+        import resource
+        return {"pid": os.getpid(), "rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {
+        "pid": os.getpid(),
+        "rss_mb": round(fields.get("Rss", 0), 1),
+        "pss_mb": round(fields.get("Pss", 0), 1),
+        "uss_mb": round(uss, 1),
+        "shared_mb": round(fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0), 1),
+    }
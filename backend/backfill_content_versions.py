@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+One-off script giving bots registered before content versions existed a
+content_version, so the retrieval and answer caches apply to them.
+
+Until a bot has a version those caches stay off for it; the next upload to the
+bot also sets one. Safe to re-run: bots that already have a version are skipped.
+
+Usage:
+    python backfill_content_versions.py
+"""
+
+import asyncio
+import logging
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def backfill():
+    # Import here to avoid circular imports
+    from app.services.bot_registry import BotRegistry
+
+    updated = await BotRegistry().backfill_content_versions()
+    logger.info(f"Backfill completed. Updated {updated} bot profiles.")
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
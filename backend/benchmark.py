@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the retrieval pipeline.
+
+Usage:
+    python benchmark.py embedders [--texts 512] [--batch-size 32]
+    python benchmark.py quantization [--points 20000] [--queries 200] [--k 10]
+    python benchmark.py transport [--points 20000] [--batch-size 256] [--queries 500]
+    python benchmark.py embedded [--sizes 1000 20000] [--queries 200]
+    python benchmark.py exact [--sizes 500 2000 5000] [--queries 500]
+    python benchmark.py fallback [--chunks 2000] [--queries 300]
+    python benchmark.py hybrid [--chunks 2000] [--needles 200] [--k 5]
+    python benchmark.py mmr [--paragraphs 400] [--queries 100]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SAMPLE_TEXTS = [
+    "What are your opening hours?",
+    "How much does the premium plan cost per month?",
+    "Our support team is available Monday to Friday from 9am to 5pm.",
+    "Refunds are processed within 5-7 business days after the return is received.",
+    "Error code E-4021 means the device could not reach the update server.",
+    "The SKU for the 500ml stainless steel bottle is BTL-500-SS.",
+    "Machine learning is a subset of AI that focuses on algorithms that learn from data.",
+    "Vector databases are great for similarity search over embeddings.",
+]
+
+
+def _sample_corpus(n: int):
+    """Build n texts of mixed length from the sample sentences"""
+    rng = np.random.default_rng(42)
+    corpus = []
+    for _ in range(n):
+        k = int(rng.integers(1, 12))
+        corpus.append(" ".join(rng.choice(SAMPLE_TEXTS, size=k)))
+    return corpus
+
+
+def _rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_embedders(args) -> bool:
+    """Compare torch and ONNX (fp32/int8) backends for parity and throughput"""
+    from app.core.config import get_settings
+    from app.services.embedders import OnnxEmbedder, TorchEmbedder
+
+    settings = get_settings()
+    corpus = _sample_corpus(args.texts)
+    model_name = settings.EMBEDDING_MODEL_NAME
+
+    # Load ONNX first so its RSS is not inflated by torch
+    backends = []
+    for quantize in (False, True):
+        rss_before = _rss_mb()
+        try:
+            embedder = OnnxEmbedder(model_name, quantize=quantize)
+        except Exception as e:
+            print(f"❌ Could not load ONNX backend (quantize={quantize}): {e}")
+            return False
+        backends.append((f"onnx-{'int8' if quantize else 'fp32'}", embedder, _rss_mb() - rss_before))
+
+    rss_before = _rss_mb()
+    reference = TorchEmbedder(model_name)
+    backends.insert(0, ("torch", reference, _rss_mb() - rss_before))
+
+    reference_vectors = None
+    ok = True
+    print(f"\n{'backend':<12} {'texts/s':>10} {'ms/query':>10} {'rss +MB':>10} {'min cos':>10} {'mean cos':>10}")
+    for name, embedder, rss_delta in backends:
+        embedder.encode(corpus[:args.batch_size], batch_size=args.batch_size)  # warm-up
+
+        start = time.perf_counter()
+        vectors = embedder.encode(corpus, batch_size=args.batch_size)
+        throughput = len(corpus) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for text in SAMPLE_TEXTS:
+            embedder.encode([text])
+        per_query_ms = (time.perf_counter() - start) * 1000 / len(SAMPLE_TEXTS)
+
+        if reference_vectors is None:
+            reference_vectors = vectors
+        a = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        b = reference_vectors / np.linalg.norm(reference_vectors, axis=1, keepdims=True)
+        cosines = (a * b).sum(axis=1)
+        print(f"{name:<12} {throughput:>10.1f} {per_query_ms:>10.2f} {rss_delta:>10.1f} {cosines.min():>10.4f} {cosines.mean():>10.4f}")
+
+        if cosines.min() <= 0.99:
+            print(f"❌ {name} parity check failed: min cosine {cosines.min():.4f} <= 0.99")
+            ok = False
+
+    if ok:
+        print("\n✅ All backends match torch vectors (cosine > 0.99)")
+    return ok
+
+
+def _synthetic_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors, closer to real embedding distributions than uniform noise"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n // 50), dim))
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.5 * rng.standard_normal((n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _wait_for_green(client, collection_name: str, timeout: float = 300):
+    """Wait until Qdrant has finished optimizing (indexing/quantizing) a collection"""
+    from qdrant_client.http import models
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if client.get_collection(collection_name).status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(0.5)
+    logger.warning(f"Collection {collection_name} still optimizing after {timeout}s")
+
+
+def bench_quantization(args) -> bool:
+    """Recall@k vs latency for unquantized, scalar int8 and binary quantized collections"""
+    from qdrant_client.http import models
+    from app.services.vector_store import VectorStoreService, quantization_config, quantized_search_params
+
+    client = VectorStoreService().client
+    vectors = _synthetic_vectors(args.points + args.queries, args.dim)
+    data, queries = vectors[:args.points], vectors[args.points:]
+    # Exact top-k by brute force is the ground truth
+    truth = [set(row.tolist()) for row in np.argsort(-(queries @ data.T), axis=1)[:, :args.k]]
+    bytes_per_vector = {"none": args.dim * 4, "scalar": args.dim, "binary": args.dim / 8}
+
+    print(f"\n{'mode':<8} {'oversample':>10} {'rescore':>8} {f'recall@{args.k}':>10} {'p50 ms':>8} {'p95 ms':>8} {'RAM MB':>8}")
+    for mode in ("none", "scalar", "binary"):
+        collection_name = f"bench_quantization_{mode}_{int(time.time())}"
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=models.VectorParams(
+                size=args.dim,
+                distance=models.Distance.COSINE,
+                quantization_config=quantization_config(mode),
+                on_disk=mode != "none",
+            ),
+        )
+        try:
+            for start in range(0, args.points, 1000):
+                end = min(start + 1000, args.points)
+                client.upsert(
+                    collection_name=collection_name,
+                    points=models.Batch(ids=list(range(start, end)), vectors=data[start:end].tolist()),
+                )
+            _wait_for_green(client, collection_name)
+
+            settings_grid = [(1.0, False)] if mode == "none" else [
+                (oversampling, rescore) for oversampling in args.oversampling for rescore in (True, False)
+            ]
+            for oversampling, rescore in settings_grid:
+                latencies, recalls = [], []
+                for query, expected in zip(queries, truth):
+                    start = time.perf_counter()
+                    hits = client.search(
+                        collection_name=collection_name,
+                        query_vector=query.tolist(),
+                        limit=args.k,
+                        search_params=quantized_search_params(oversampling, rescore),
+                    )
+                    latencies.append(time.perf_counter() - start)
+                    recalls.append(len({hit.id for hit in hits} & expected) / args.k)
+                ram_mb = args.points * bytes_per_vector[mode] / 1024 / 1024
+                print(
+                    f"{mode:<8} {oversampling:>10.1f} {str(rescore):>8} {np.mean(recalls):>10.3f} "
+                    f"{np.percentile(latencies, 50) * 1000:>8.2f} {np.percentile(latencies, 95) * 1000:>8.2f} {ram_mb:>8.1f}"
+                )
+        finally:
+            client.delete_collection(collection_name)
+
+    print("\nRAM MB is the in-memory vector footprint; quantized modes keep originals on disk for rescoring.")
+    return True
+
+
+def bench_transport(args) -> bool:
+    """Bulk upsert and search latency over REST vs gRPC against the same Qdrant"""
+    from qdrant_client import QdrantClient
+    from qdrant_client.http import models
+    from app.services.vector_store import VectorStoreService
+
+    vector_store = VectorStoreService()
+    vectors = _synthetic_vectors(args.points + args.queries, args.dim)
+    data, queries = vectors[:args.points], vectors[args.points:]
+
+    print(f"\n{'transport':<10} {'upsert pts/s':>13} {'upsert s':>9} {'search p50':>11} {'search p95':>11} {'search qps':>11}")
+    for transport in ("rest", "grpc"):
+        client = QdrantClient(**vector_store._client_kwargs(prefer_grpc=transport == "grpc"))
+        collection_name = f"bench_transport_{transport}_{int(time.time())}"
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=models.VectorParams(size=args.dim, distance=models.Distance.COSINE),
+        )
+        try:
+            start = time.perf_counter()
+            for batch_start in range(0, args.points, args.batch_size):
+                batch = data[batch_start:batch_start + args.batch_size]
+                client.upsert(
+                    collection_name=collection_name,
+                    points=models.Batch(
+                        ids=list(range(batch_start, batch_start + len(batch))),
+                        vectors=batch.tolist(),
+                        payloads=[{"bot_id": "bench", "text": SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]} for i in range(len(batch))],
+                    ),
+                    wait=True,
+                )
+            upsert_seconds = time.perf_counter() - start
+            _wait_for_green(client, collection_name)
+
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                client.search(collection_name=collection_name, query_vector=query.tolist(), limit=args.k, with_payload=True)
+                latencies.append(time.perf_counter() - start)
+
+            print(
+                f"{transport:<10} {args.points / upsert_seconds:>13.0f} {upsert_seconds:>9.2f} "
+                f"{np.percentile(latencies, 50) * 1000:>9.2f}ms {np.percentile(latencies, 95) * 1000:>9.2f}ms "
+                f"{len(latencies) / sum(latencies):>11.0f}"
+            )
+        finally:
+            client.delete_collection(collection_name)
+            client.close()
+    return True
+
+
+def bench_embedded(args) -> bool:
+    """Search and upsert latency of embedded Qdrant (memory/disk) vs the server, per bot size"""
+    import tempfile
+    from qdrant_client import QdrantClient
+    from qdrant_client.http import models
+    from app.services.vector_store import VectorStoreService
+
+    targets = [("embedded-memory", lambda: QdrantClient(location=":memory:"))]
+    storage_dir = tempfile.mkdtemp(prefix="bench_qdrant_")
+    targets.append(("embedded-disk", lambda: QdrantClient(path=storage_dir)))
+    targets.append(("server", lambda: QdrantClient(**VectorStoreService()._client_kwargs())))
+
+    print(f"\n{'mode':<16} {'chunks':>7} {'upsert s':>9} {'search p50':>11} {'search p95':>11}")
+    for size in args.sizes:
+        vectors = _synthetic_vectors(size + args.queries, args.dim, seed=size)
+        data, queries = vectors[:size], vectors[size:]
+        for mode, make_client in targets:
+            try:
+                client = make_client()
+                client.get_collections()
+            except Exception as e:
+                print(f"{mode:<16} {size:>7} skipped: {e}")
+                continue
+
+            collection_name = f"bench_embedded_{size}_{int(time.time())}"
+            client.create_collection(
+                collection_name=collection_name,
+                vectors_config=models.VectorParams(size=args.dim, distance=models.Distance.COSINE),
+            )
+            try:
+                start = time.perf_counter()
+                for batch_start in range(0, size, 256):
+                    batch = data[batch_start:batch_start + 256]
+                    client.upsert(
+                        collection_name=collection_name,
+                        points=models.Batch(ids=list(range(batch_start, batch_start + len(batch))), vectors=batch.tolist()),
+                    )
+                upsert_seconds = time.perf_counter() - start
+                if mode == "server":
+                    _wait_for_green(client, collection_name)
+
+                latencies = []
+                for query in queries:
+                    start = time.perf_counter()
+                    client.search(collection_name=collection_name, query_vector=query.tolist(), limit=args.k)
+                    latencies.append(time.perf_counter() - start)
+                print(
+                    f"{mode:<16} {size:>7} {upsert_seconds:>9.2f} "
+                    f"{np.percentile(latencies, 50) * 1000:>9.2f}ms {np.percentile(latencies, 95) * 1000:>9.2f}ms"
+                )
+            finally:
+                client.delete_collection(collection_name)
+                client.close()
+
+    print("\nEmbedded mode searches exactly (brute force); the server uses HNSW and adds a network hop.")
+    return True
+
+
+def bench_exact(args) -> bool:
+    """In-process exact top-k vs a Qdrant search (the configured server or embedded store) per bot size"""
+    from qdrant_client.http import models
+    from app.services.exact_search import ExactIndex
+    from app.services.vector_store import VectorStoreService
+
+    client = VectorStoreService().client
+    print(f"\n{'path':<16} {'chunks':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'MB':>7}")
+    for size in args.sizes:
+        vectors = _synthetic_vectors(size + args.queries, args.dim, seed=size)
+        data, queries = vectors[:size], vectors[size:]
+        payloads = [{"text": SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]} for i in range(size)]
+
+        for dtype in ("float32", "float16"):
+            index = ExactIndex(data, payloads, dtype=dtype)
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                index.search(query, args.k)
+                latencies.append(time.perf_counter() - start)
+            print(
+                f"{'exact-' + dtype:<16} {size:>7} {np.percentile(latencies, 50) * 1000:>8.3f} "
+                f"{np.percentile(latencies, 95) * 1000:>8.3f} {np.percentile(latencies, 99) * 1000:>8.3f} {index.nbytes / 1024 / 1024:>7.1f}"
+            )
+
+        collection_name = f"bench_exact_{size}_{int(time.time())}"
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=models.VectorParams(size=args.dim, distance=models.Distance.COSINE),
+        )
+        try:
+            for batch_start in range(0, size, 256):
+                batch = data[batch_start:batch_start + 256]
+                client.upsert(
+                    collection_name=collection_name,
+                    points=models.Batch(
+                        ids=list(range(batch_start, batch_start + len(batch))),
+                        vectors=batch.tolist(),
+                        payloads=payloads[batch_start:batch_start + len(batch)],
+                    ),
+                )
+            _wait_for_green(client, collection_name)
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                client.search(collection_name=collection_name, query_vector=query.tolist(), limit=args.k, with_payload=True)
+                latencies.append(time.perf_counter() - start)
+            print(
+                f"{'qdrant':<16} {size:>7} {np.percentile(latencies, 50) * 1000:>8.3f} "
+                f"{np.percentile(latencies, 95) * 1000:>8.3f} {np.percentile(latencies, 99) * 1000:>8.3f} {'-':>7}"
+            )
+        finally:
+            client.delete_collection(collection_name)
+    return True
+
+
+def _percentiles_ms(latencies) -> str:
+    p50, p95, p99 = (np.percentile(latencies, q) * 1000 for q in (50, 95, 99))
+    return f"{p50:>8.2f} {p95:>8.2f} {p99:>8.2f}"
+
+
+def bench_fallback(args) -> bool:
+    """Retrieval tail latency: separate k and fallback-k searches vs one search with in-memory fallback"""
+    from app.models.bot import RetrievalPolicy
+    from app.services.vector_store import VectorStoreService
+
+    vector_store = VectorStoreService()
+    policy = RetrievalPolicy(k=args.k, score_threshold=args.threshold, fallback_k=args.fallback_k)
+    collection_name = f"bench_fallback_{int(time.time())}"
+    vector_store.create_collection(collection_name)
+    try:
+        vector_store.add_texts(collection_name, _sample_corpus(args.chunks))
+
+        # Half the questions match the corpus, half are off-topic and end up in the fallback branch
+        def questions(tag: str):
+            return [
+                f"{SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]} ({tag} {i})" if i % 2 == 0 else f"Unrelated question about zebra migration {tag} {i}"
+                for i in range(args.queries)
+            ]
+
+        def two_searches(query: str) -> bool:
+            results = vector_store.search(collection_name, query, limit=policy.k)
+            if any(r["score"] >= policy.score_threshold for r in results):
+                return False
+            # The baseline is two independent searches, each embedding the query; don't let the
+            # query vector cache turn the second one into a Qdrant-only call
+            vector_store.query_cache.clear()
+            vector_store.search(collection_name, query, limit=policy.fallback_k)
+            return True
+
+        def one_search(query: str) -> bool:
+            results = vector_store.search(collection_name, query, limit=policy.fetch_k)
+            return not any(r["score"] >= policy.score_threshold for r in results[:policy.k])
+
+        print(f"\n{'path':<14} {'queries':>8} {'fallback':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for name, retrieve in (("two-searches", two_searches), ("one-search", one_search)):
+            # Distinct questions per path, so the query vector cache can't favour the second run
+            latencies, fallback_latencies = [], []
+            for query in questions(name):
+                start = time.perf_counter()
+                fell_back = retrieve(query)
+                elapsed = time.perf_counter() - start
+                latencies.append(elapsed)
+                if fell_back:
+                    fallback_latencies.append(elapsed)
+            print(f"{name:<14} {len(latencies):>8} {len(fallback_latencies):>9} {_percentiles_ms(latencies)}")
+            if fallback_latencies:
+                print(f"{'  fallback only':<14} {len(fallback_latencies):>8} {'':>9} {_percentiles_ms(fallback_latencies)}")
+    finally:
+        vector_store.delete_collection(collection_name)
+    return True
+
+
+def bench_hybrid(args) -> bool:
+    """Recall@k and latency of dense vs hybrid (dense + sparse, RRF) search on exact-code questions"""
+    from app.services.vector_store import VectorStoreService
+
+    vector_store = VectorStoreService()
+    rng = np.random.default_rng(7)
+    letters = np.array(list("ABCDEFGHJKLMNPQRSTUVWXYZ"))
+    codes = [f"{''.join(rng.choice(letters, 3))}-{int(rng.integers(100, 999))}-{''.join(rng.choice(letters, 2))}" for _ in range(args.needles)]
+    needles = [f"Part {code} ships from warehouse {i % 7} within {i % 10 + 1} business days." for i, code in enumerate(codes)]
+    questions = [f"How long does part {code} take to ship?" for code in codes]
+
+    collection_name = f"bench_hybrid_{int(time.time())}"
+    vector_store.create_collection(collection_name)
+    try:
+        if not vector_store._has_sparse(collection_name):
+            logger.error("Collection has no sparse vectors; set HYBRID_SPARSE_VECTORS=true")
+            return False
+        vector_store.add_texts(collection_name, _sample_corpus(args.chunks) + needles)
+
+        print(f"\n{'mode':<8} {'queries':>8} {f'recall@{args.k}':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for mode in ("dense", "hybrid"):
+            # Both modes pay for encoding the question
+            vector_store.query_cache.clear()
+            hits, latencies = 0, []
+            for question, needle in zip(questions, needles):
+                start = time.perf_counter()
+                results = vector_store.search(collection_name, question, limit=args.k, mode=mode)
+                latencies.append(time.perf_counter() - start)
+                hits += any(r["text"] == needle for r in results)
+            print(f"{mode:<8} {len(questions):>8} {hits / len(questions):>10.3f} {_percentiles_ms(latencies)}")
+    finally:
+        vector_store.delete_collection(collection_name)
+    print("\nEmbedded Qdrant scores sparse vectors by brute force; a server uses an inverted index.")
+    return True
+
+
+def bench_mmr(args) -> bool:
+    """Prompt chunks and ~tokens per answer with and without MMR on overlapping, partly duplicated chunks"""
+    import asyncio
+    from app.models.bot import RetrievalPolicy
+    from app.services.chat import ChatService
+    from app.services.context_packer import estimate_tokens
+    from app.utils.document_processor import DocumentProcessor
+
+    chat_service = ChatService()
+    vector_store = chat_service.vector_store
+    processor = DocumentProcessor()
+    # Two revisions of one handbook: with the splitter's 200-char overlap this is what near-duplicates look like
+    document = "\n\n".join(_sample_corpus(args.paragraphs))
+    revised = document.replace("business days", "working days")
+    chunks = processor.process_text(document) + processor.process_text(revised)
+    questions = [SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] for i in range(args.queries)]
+
+    collection_name = f"bench_mmr_{int(time.time())}"
+    vector_store.create_collection(collection_name)
+    try:
+        vector_store.add_texts(collection_name, chunks)
+        policies = (
+            ("no-mmr", RetrievalPolicy(mmr=False)),
+            ("mmr", RetrievalPolicy(mmr=True, mmr_lambda=args.mmr_lambda, duplicate_threshold=args.duplicate_threshold)),
+        )
+        print(f"\n{len(chunks)} chunks, {len(questions)} questions")
+        print(f"{'policy':<8} {'chunks/answer':>14} {'~tokens/answer':>15} {'select ms':>10}")
+        for name, policy in policies:
+            chunk_counts, token_counts, select_seconds = [], [], []
+            for question in questions:
+                results = vector_store.search(collection_name, question, limit=policy.fetch_k, with_vectors=policy.mmr)
+                start = time.perf_counter()
+                selected = asyncio.run(chat_service._select_chunks(question, results, policy))
+                select_seconds.append(time.perf_counter() - start)
+                texts = list(dict.fromkeys(r["text"].strip() for r in selected))
+                chunk_counts.append(len(texts))
+                token_counts.append(sum(estimate_tokens(text) for text in texts))
+            print(
+                f"{name:<8} {np.mean(chunk_counts):>14.2f} {np.mean(token_counts):>15.0f} "
+                f"{np.mean(select_seconds) * 1000:>10.3f}"
+            )
+    finally:
+        vector_store.delete_collection(collection_name)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval pipeline benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    embedders_parser = subparsers.add_parser("embedders", help="Torch vs ONNX parity and throughput")
+    embedders_parser.add_argument("--texts", type=int, default=512)
+    embedders_parser.add_argument("--batch-size", type=int, default=32)
+    embedders_parser.set_defaults(func=bench_embedders)
+
+    quantization_parser = subparsers.add_parser("quantization", help="Recall@k vs latency per quantization mode (needs Qdrant)")
+    quantization_parser.add_argument("--points", type=int, default=20000)
+    quantization_parser.add_argument("--queries", type=int, default=200)
+    quantization_parser.add_argument("--dim", type=int, default=384)
+    quantization_parser.add_argument("--k", type=int, default=10)
+    quantization_parser.add_argument("--oversampling", type=float, nargs="+", default=[1.0, 2.0, 4.0])
+    quantization_parser.set_defaults(func=bench_quantization)
+
+    transport_parser = subparsers.add_parser("transport", help="REST vs gRPC upsert and search (needs Qdrant with port 6334)")
+    transport_parser.add_argument("--points", type=int, default=20000)
+    transport_parser.add_argument("--batch-size", type=int, default=256)
+    transport_parser.add_argument("--queries", type=int, default=500)
+    transport_parser.add_argument("--dim", type=int, default=384)
+    transport_parser.add_argument("--k", type=int, default=5)
+    transport_parser.set_defaults(func=bench_transport)
+
+    embedded_parser = subparsers.add_parser("embedded", help="Embedded Qdrant vs server latency for small and medium bots")
+    embedded_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 20000])
+    embedded_parser.add_argument("--queries", type=int, default=200)
+    embedded_parser.add_argument("--dim", type=int, default=384)
+    embedded_parser.add_argument("--k", type=int, default=5)
+    embedded_parser.set_defaults(func=bench_embedded)
+
+    exact_parser = subparsers.add_parser("exact", help="In-process exact search vs Qdrant latency for small bots")
+    exact_parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 5000])
+    exact_parser.add_argument("--queries", type=int, default=500)
+    exact_parser.add_argument("--dim", type=int, default=384)
+    exact_parser.add_argument("--k", type=int, default=5)
+    exact_parser.set_defaults(func=bench_exact)
+
+    fallback_parser = subparsers.add_parser("fallback", help="Tail latency of the low-score fallback: two searches vs one")
+    fallback_parser.add_argument("--chunks", type=int, default=2000)
+    fallback_parser.add_argument("--queries", type=int, default=300)
+    fallback_parser.add_argument("--k", type=int, default=5)
+    fallback_parser.add_argument("--threshold", type=float, default=0.2)
+    fallback_parser.add_argument("--fallback-k", type=int, default=8)
+    fallback_parser.set_defaults(func=bench_fallback)
+
+    hybrid_parser = subparsers.add_parser("hybrid", help="Dense vs hybrid recall and latency on questions about exact codes")
+    hybrid_parser.add_argument("--chunks", type=int, default=2000)
+    hybrid_parser.add_argument("--needles", type=int, default=200)
+    hybrid_parser.add_argument("--k", type=int, default=5)
+    hybrid_parser.set_defaults(func=bench_hybrid)
+
+    mmr_parser = subparsers.add_parser("mmr", help="Prompt size per answer with and without MMR diversification")
+    mmr_parser.add_argument("--paragraphs", type=int, default=400)
+    mmr_parser.add_argument("--queries", type=int, default=100)
+    mmr_parser.add_argument("--mmr-lambda", type=float, default=0.7)
+    mmr_parser.add_argument("--duplicate-threshold", type=float, default=0.95)
+    mmr_parser.set_defaults(func=bench_mmr)
+
+    args = parser.parse_args()
+    success = args.func(args)
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
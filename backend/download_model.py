@@ -6,5 +6,27 @@ def download_model():
     model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
     print("Model downloaded successfully!")
 
+def download_rerank_model():
+    from sentence_transformers import CrossEncoder
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    print(f"Downloading rerank model {settings.RERANK_MODEL_NAME}...")
+    CrossEncoder(settings.RERANK_MODEL_NAME)
+    print("Rerank model downloaded successfully!")
+
+def export_onnx():
+    from app.core.config import get_settings
+    from app.services.embedders import export_onnx_model
+
+    settings = get_settings()
+    print(f"Exporting {settings.EMBEDDING_MODEL_NAME} to ONNX...")
+    model_dir = export_onnx_model(settings.EMBEDDING_MODEL_NAME, quantize=settings.ONNX_QUANTIZE)
+    print(f"ONNX model written to {model_dir}")
+
 if __name__ == "__main__":
-    download_model()
\ No newline at end of file
+    download_model()
+    if os.getenv("RERANK_ENABLED", "false").lower() == "true":
+        download_rerank_model()
+    if os.getenv("EMBEDDING_BACKEND", "torch").lower() == "onnx":
+        export_onnx()
@@ -0,0 +1,40 @@
+"""
+Gunicorn settings for multi-worker serving.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Workers fork right away and load the embedding model in their background warm-up,
+so /api/health answers "warming" within seconds of a deploy.
+
+GUNICORN_PRELOAD=true trades that for memory: the master imports the app and loads
+the model once before forking, so workers share the weight pages copy-on-write
+instead of each holding a private copy. No worker exists until that load (and its
+retries) finishes, so health checks fail meanwhile; give the platform's health
+check a grace period longer than a cold model load. Check /api/metrics ->
+process.uss_mb for what each extra worker really costs.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() == "true"
+
+if os.getenv("QDRANT_PATH") and workers > 1:
+    # Embedded storage belongs to one process: on disk it is locked, in memory it is per worker
+    raise RuntimeError("Embedded Qdrant (QDRANT_PATH) supports a single worker; set WEB_CONCURRENCY=1 or use a Qdrant server")
+
+
+def when_ready(server):
+    # Runs in the master after the app is imported and before any worker is forked
+    if not preload_app:
+        return
+    from app.services.vector_store import VectorStoreService
+
+    try:
+        VectorStoreService().preload_for_fork()
+    except Exception as e:
+        # Workers will load the model themselves during warm-up
+        server.log.error(f"Pre-fork model load failed: {str(e)}")
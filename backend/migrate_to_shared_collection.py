@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Migration script to move per-bot Qdrant collections (bot_<id>) into the shared
+multi-tenant collection used by QDRANT_STORAGE_MODE=shared.
+
+Points keep their ids, vectors and payload (with bot_id set), so the script can be
+re-run safely after an interruption. A source collection is only deleted once the
+shared collection holds at least as many points for that bot.
+
+Usage:
+    python migrate_to_shared_collection.py [--batch-size 256] [--keep-source] [--dry-run]
+    python migrate_to_shared_collection.py verify
+"""
+
+import argparse
+import asyncio
+import logging
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _per_bot_collections(vector_store, registry_collection: str):
+    return [
+        name for name in vector_store.list_collections()
+        if name.startswith("bot_") and name != registry_collection
+    ]
+
+
+async def _load_profiles(registry, sources: list) -> dict:
+    """Every source bot's profile, read in one event loop (the registry's async client is bound to it)"""
+    # Fail loudly if the registry is unreachable; get_profile would fall back to default profiles
+    await registry._ensure_collection()
+    return {source: await registry.get_profile(source[len("bot_"):], max_age=0) for source in sources}
+
+
+def migrate_collection(vector_store, profile, source: str, batch_size: int, keep_source: bool, dry_run: bool) -> bool:
+    """Copy one bot_<id> collection into its shared collection in batches"""
+    from qdrant_client.http import models
+
+    bot_id = source[len("bot_"):]
+    target = vector_store.shared_collection_name(profile.embedding_model)
+    client = vector_store.client
+
+    source_count = client.count(source, exact=True).count
+    source_size = client.get_collection(source).config.params.vectors.size
+    logger.info(f"Migrating {source} ({source_count} points, dim {source_size}) -> {target}")
+    if dry_run:
+        return True
+
+    vector_store.create_collection(target, model_name=profile.embedding_model)
+    target_size = client.get_collection(target).config.params.vectors.size
+    if source_size != target_size:
+        logger.error(f"Skipping {source}: vector size {source_size} does not match {target} ({target_size})")
+        return False
+
+    # A shared collection created before hybrid search can't take the sparse vectors
+    keep_sparse = vector_store._has_sparse(target)
+
+    def vector_for_target(vector):
+        if isinstance(vector, dict) and not keep_sparse:
+            return vector.get("")
+        return vector
+
+    copied = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=source,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        if points:
+            client.upsert(
+                collection_name=target,
+                # PointStruct rather than Batch: sources with sparse vectors return named vectors,
+                # older ones a plain dense list
+                points=[
+                    models.PointStruct(id=point.id, vector=vector_for_target(point.vector), payload={**(point.payload or {}), "bot_id": bot_id})
+                    for point in points
+                ],
+                wait=True,
+            )
+            copied += len(points)
+            logger.info(f"  {source}: copied {copied}/{source_count}")
+        if offset is None:
+            break
+
+    bot_filter = models.Filter(must=[models.FieldCondition(key="bot_id", match=models.MatchValue(value=bot_id))])
+    target_count = client.count(target, count_filter=bot_filter, exact=True).count
+    if target_count < source_count:
+        logger.error(f"{target} only has {target_count} of {source_count} points for bot {bot_id}; keeping {source}")
+        return False
+
+    if not keep_source:
+        vector_store.delete_collection(source)
+        logger.info(f"Deleted source collection {source}")
+    return True
+
+
+def migrate_to_shared(batch_size: int = 256, keep_source: bool = False, dry_run: bool = False):
+    """Migrate every per-bot collection into the shared collection"""
+
+    # Import here to avoid circular imports
+    from app.core.config import get_settings
+    from app.services.bot_registry import BotRegistry
+    from app.services.vector_store import VectorStoreService
+
+    settings = get_settings()
+    vector_store = VectorStoreService()
+    registry = BotRegistry()
+
+    sources = _per_bot_collections(vector_store, settings.BOT_REGISTRY_COLLECTION)
+    if not sources:
+        logger.info("No per-bot collections found. Nothing to migrate.")
+        return
+
+    logger.info(f"Found {len(sources)} per-bot collections to migrate")
+    profiles = asyncio.run(_load_profiles(registry, sources))
+    migrated_count = 0
+    failed_count = 0
+    for source in sources:
+        try:
+            if migrate_collection(vector_store, profiles[source], source, batch_size, keep_source, dry_run):
+                migrated_count += 1
+            else:
+                failed_count += 1
+        except Exception as e:
+            logger.error(f"Failed to migrate {source}: {str(e)}")
+            failed_count += 1
+
+    logger.info(f"Migration completed. Migrated: {migrated_count}, Failed: {failed_count}")
+    if settings.QDRANT_STORAGE_MODE != "shared":
+        logger.info("Set QDRANT_STORAGE_MODE=shared so the API reads from the shared collection.")
+
+
+def verify_migration():
+    """Report points per collection after the migration"""
+    from app.core.config import get_settings
+    from app.services.vector_store import VectorStoreService
+
+    settings = get_settings()
+    vector_store = VectorStoreService()
+    leftover = _per_bot_collections(vector_store, settings.BOT_REGISTRY_COLLECTION)
+    logger.info(f"{len(leftover)} per-bot collections remain")
+
+    for collection_name in vector_store.list_collections():
+        if collection_name.startswith(settings.QDRANT_SHARED_COLLECTION):
+            info = vector_store.get_collection_info(collection_name)
+            logger.info(f"  - {collection_name}: {info['points_count']} points")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move per-bot collections into the shared collection")
+    parser.add_argument("command", nargs="?", choices=["migrate", "verify"], default="migrate")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--keep-source", action="store_true", help="Don't delete bot_<id> collections after copying")
+    parser.add_argument("--dry-run", action="store_true", help="Only list what would be migrated")
+    args = parser.parse_args()
+
+    if args.command == "verify":
+        verify_migration()
+    else:
+        migrate_to_shared(args.batch_size, args.keep_source, args.dry_run)
+        verify_migration()
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Tests for the ingestion path of ChatService / VectorStoreService and the bot
+lifecycle around it (model loading, retries, shared collections, deletion).
+
+These run against an in-memory Qdrant and a fake embedder (see testkit.py), so
+they need neither a Qdrant server nor the sentence-transformers model:
+
+    python test_ingestion.py
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+
+import numpy as np
+
+# testkit must come first: it configures the environment the app reads at import time
+from testkit import FakeEmbedder, make_chat_service, run_tests
+
+from app.core.config import get_settings
+from app.services.chat import ChatService
+
+# Setup logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+async def _chat_latencies(chat_service: ChatService, bot_id: str, n: int):
+    latencies = []
+    for i in range(n):
+        start = time.perf_counter()
+        # Distinct queries so the query cache doesn't hide the encode
+        await chat_service.get_response(bot_id, None, f"question number {i} {time.time()}")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+def test_chat_latency_during_upload():
+    """Chat latency must stay flat while a large upload is being embedded and stored"""
+
+    async def run():
+        chat_service = make_chat_service(seconds_per_text=0.002)
+        await chat_service.process_documents("chat-bot", "user", [f"seed chunk {i}" for i in range(20)], ["seed.txt"])
+
+        baseline = await _chat_latencies(chat_service, "chat-bot", 10)
+
+        # ~4s of embedding work if it ran on the event loop
+        large_upload = [f"chunk {i} of a very large document" for i in range(2000)]
+        upload = asyncio.create_task(
+            chat_service.process_documents("upload-bot", "user", large_upload, ["large.pdf"])
+        )
+        await asyncio.sleep(0.05)
+        during = await _chat_latencies(chat_service, "chat-bot", 10)
+        upload_was_running = not upload.done()
+        await upload
+
+        return baseline, during, upload_was_running
+
+    baseline, during, upload_was_running = asyncio.run(run())
+    baseline_p95 = float(np.percentile(baseline, 95))
+    during_p95 = float(np.percentile(during, 95))
+    print(f"   chat p95 idle: {baseline_p95 * 1000:.1f}ms, during upload: {during_p95 * 1000:.1f}ms")
+
+    assert upload_was_running, "upload finished before the chats were measured"
+    assert during_p95 < baseline_p95 * 3 + 0.05, "chat latency degraded while an upload was in flight"
+
+
+def test_new_model_loads_off_the_event_loop():
+    """The first upload for a bot on a not-yet-loaded model keeps the event loop responsive"""
+    import app.services.embedders as embedders_module
+
+    original_load = embedders_module.load_embedder
+
+    def slow_load(model_name: str, backend=None):
+        time.sleep(0.5)
+        embedder = FakeEmbedder()
+        embedder.model_name = model_name
+        return embedder
+
+    async def run():
+        chat_service = make_chat_service()
+        gaps = []
+
+        async def ticker():
+            last = time.perf_counter()
+            while True:
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        task = asyncio.create_task(ticker())
+        await chat_service.process_documents("slow-model-bot", "user", ["chunk one", "chunk two"], ["a.txt"], embedding_model="slow-test-model")
+        task.cancel()
+        profile = await chat_service.bot_registry.get_profile("slow-model-bot")
+        return max(gaps, default=float("inf")), profile
+
+    embedders_module.load_embedder = slow_load
+    try:
+        max_gap, profile = asyncio.run(run())
+    finally:
+        embedders_module.load_embedder = original_load
+        ChatService().vector_store.embedders._models.pop("slow-test-model", None)
+
+    print(f"   longest event loop stall during the upload: {max_gap * 1000:.0f}ms")
+    assert profile.embedding_model == "slow-test-model" and profile.embedding_dim == 384
+    assert max_gap < 0.3, f"the model load blocked the event loop for {max_gap * 1000:.0f}ms"
+
+
+def test_embedder_pool_keeps_the_model_it_returns():
+    """With room for one model, a newly loaded one survives until replaced and every load is counted"""
+    from concurrent.futures import ThreadPoolExecutor
+    import app.services.embedders as embedders_module
+    from app.services.embedders import EmbedderPool
+
+    original_load = embedders_module.load_embedder
+
+    def fake_load(model_name):
+        time.sleep(0.01)
+        embedder = FakeEmbedder()
+        embedder.model_name = model_name
+        return embedder
+
+    pool = EmbedderPool("default-model", max_models=1)
+    embedders_module.load_embedder = fake_load
+    try:
+        pool.get()
+        returned = pool.get("other-model")
+        kept = "other-model" in pool._models
+        # Concurrent first loads of different models all land in the counter
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(pool.get, [f"model-{i}" for i in range(16)]))
+    finally:
+        embedders_module.load_embedder = original_load
+
+    print(f"   {pool.loads} loads, {pool.unloads} unloads, loaded: {list(pool._models)}")
+    assert returned.model_name == "other-model" and kept, "the requested model was evicted as soon as it was loaded"
+    assert pool.loads == 18, f"expected 18 loads, counted {pool.loads}"
+    assert "default-model" in pool._models
+
+
+def test_retry_after_mid_batch_failure_does_not_duplicate():
+    """A retried upload that failed halfway must overwrite, not duplicate, the points already written"""
+    settings = get_settings()
+
+    async def run():
+        chat_service = make_chat_service()
+        collection_name = chat_service._get_collection_name("retry-bot")
+        client = chat_service.vector_store.async_client
+        original_upsert = client.upsert
+        data_upserts = []
+
+        async def flaky_upsert(*args, **kwargs):
+            if kwargs.get("collection_name") == collection_name:
+                data_upserts.append(len(kwargs["points"].ids))
+                if len(data_upserts) == 3:
+                    raise ConnectionError("simulated Qdrant failure mid-upload")
+            return await original_upsert(*args, **kwargs)
+
+        client.upsert = flaky_upsert
+        texts = [f"chunk {i} of report.pdf" for i in range(500)]
+        content_hashes = [hashlib.sha256(b"report.pdf contents").hexdigest()] * len(texts)
+
+        await chat_service.process_documents("retry-bot", "user", texts, ["report.pdf"], content_hashes=content_hashes)
+        after_retry = (await client.count(collection_name, exact=True)).count
+
+        # Uploading the same file again is also a no-op
+        await chat_service.process_documents("retry-bot", "user", texts, ["report.pdf"], content_hashes=content_hashes)
+        after_reupload = (await client.count(collection_name, exact=True)).count
+        return data_upserts, after_retry, after_reupload
+
+    original_batch_size = settings.QDRANT_UPSERT_BATCH_SIZE
+    settings.QDRANT_UPSERT_BATCH_SIZE = 50
+    try:
+        data_upserts, after_retry, after_reupload = asyncio.run(run())
+    finally:
+        settings.QDRANT_UPSERT_BATCH_SIZE = original_batch_size
+
+    print(f"   {len(data_upserts)} upsert calls, {after_retry} points after retry, {after_reupload} after re-upload")
+    assert len(data_upserts) > 10, "the failure did not trigger a retry"
+    assert after_retry == 500, f"expected 500 points after the retry, found {after_retry}"
+    assert after_reupload == 500, f"expected 500 points after re-uploading, found {after_reupload}"
+
+
+def test_sync_and_async_ingestion_write_alike():
+    """add_texts and add_texts_async send the same batches: wait=False for all but the final barrier"""
+    from qdrant_client import QdrantClient
+    from app.services.embedded_qdrant import LockedQdrantClient
+    settings = get_settings()
+
+    def spy(upsert, calls):
+        def record(*args, **kwargs):
+            calls.append((len(kwargs["points"].ids), kwargs["wait"]))
+            return upsert(*args, **kwargs)
+        return record
+
+    def async_spy(upsert, calls):
+        async def record(*args, **kwargs):
+            calls.append((len(kwargs["points"].ids), kwargs["wait"]))
+            return await upsert(*args, **kwargs)
+        return record
+
+    chat_service = make_chat_service()
+    vector_store = chat_service.vector_store
+    texts = [f"chunk {i} written {'x' * (i % 7)}" for i in range(230)]
+    sync_calls, async_calls = [], []
+    original_client, original_batch_size = vector_store._client, settings.QDRANT_UPSERT_BATCH_SIZE
+    # The upsert pool calls the client from several threads, which the local-mode client can't take unguarded
+    vector_store._client = LockedQdrantClient(QdrantClient(location=":memory:"))
+    vector_store._client.upsert = spy(vector_store._client.upsert, sync_calls)
+    vector_store._async_client.upsert = async_spy(vector_store._async_client.upsert, async_calls)
+    settings.QDRANT_UPSERT_BATCH_SIZE = 50
+    try:
+        vector_store.add_texts("sync-written", texts)
+        sync_count = vector_store.client.count("sync-written", exact=True).count
+        asyncio.run(vector_store.add_texts_async("async-written", texts))
+        async_count = asyncio.run(vector_store.async_client.count("async-written", exact=True)).count
+        sync_results = vector_store.search("sync-written", "chunk 3 written", limit=3)
+    finally:
+        vector_store._client = original_client
+        settings.QDRANT_UPSERT_BATCH_SIZE = original_batch_size
+
+    print(f"   sync upserts {sync_calls}; async upserts {async_calls}")
+    assert sync_count == async_count == len(texts)
+    assert sorted(sync_calls[:-1]) == sorted(async_calls[:-1]) and all(not wait for _, wait in sync_calls[:-1] + async_calls[:-1])
+    assert sync_calls[-1][1] and async_calls[-1][1], "the last upsert must wait as the write barrier"
+    assert len(sync_results) == 3
+
+
+def test_embedding_cache_encodes_only_misses():
+    """Re-ingesting chunks only encodes the ones missing from the embedding cache for that embedder variant"""
+    import tempfile
+    from app.services.embedding_cache import EmbeddingCache
+
+    class Int8FakeEmbedder(FakeEmbedder):
+        backend = "fake-int8"
+
+    async def run(cache_path):
+        chat_service = make_chat_service()
+        vector_store = chat_service.vector_store
+        embedder = vector_store.embedders.get()
+        vector_store._embedding_cache = EmbeddingCache(cache_path)
+        try:
+            collection_name = "embedding-cache-test"
+            await vector_store.create_collection_async(collection_name)
+            texts = [f"cached chunk {i}" for i in range(40)]
+            await vector_store.add_texts_async(collection_name, texts)
+            first = embedder.texts_encoded
+
+            await vector_store.add_texts_async(collection_name, texts[:30] + [f"new chunk {i}" for i in range(10)])
+            second = embedder.texts_encoded - first
+
+            # Same model on another backend: its vectors differ slightly, so none are reused
+            int8_embedder = Int8FakeEmbedder()
+            vector_store.embedders.add(int8_embedder)
+            await vector_store.add_texts_async(collection_name, texts)
+            other_variant = int8_embedder.texts_encoded
+        finally:
+            vector_store._embedding_cache = None
+        return first, second, other_variant
+
+    with tempfile.TemporaryDirectory() as directory:
+        first, second, other_variant = asyncio.run(run(os.path.join(directory, "embeddings.sqlite3")))
+
+    print(f"   encoded {first} chunks on the first upload, {second} on the second, {other_variant} for another variant")
+    assert first == 40
+    assert second == 10, f"expected only the 10 new chunks to be encoded, encoded {second}"
+    assert other_variant == 40, "another embedder variant reused cached vectors"
+
+
+def test_shared_collection_keeps_identical_chunks_per_bot():
+    """Two bots uploading the same text to the shared collection each keep their own points"""
+    settings = get_settings()
+
+    async def run():
+        chat_service = make_chat_service()
+        vector_store = chat_service.vector_store
+        collection_name = chat_service._get_collection_name("shared-bot-a")
+        vector_store._forget_collection(collection_name)
+        texts = [f"warranty terms clause {i}" for i in range(10)]
+        # No content hashes, so point ids fall back to the chunk text and position
+        await chat_service.process_documents("shared-bot-a", "user", texts, ["terms.txt"])
+        await chat_service.process_documents("shared-bot-b", "user", texts, ["terms.txt"])
+        total = (await vector_store.async_client.count(collection_name, exact=True)).count
+        results_a = await vector_store.search_async(collection_name, "warranty terms", limit=5, bot_id="shared-bot-a")
+        results_b = await vector_store.search_async(collection_name, "warranty terms", limit=5, bot_id="shared-bot-b")
+        return collection_name, total, results_a, results_b
+
+    original_mode = settings.QDRANT_STORAGE_MODE
+    settings.QDRANT_STORAGE_MODE = "shared"
+    try:
+        collection_name, total, results_a, results_b = asyncio.run(run())
+    finally:
+        settings.QDRANT_STORAGE_MODE = original_mode
+        ChatService().vector_store._forget_collection(collection_name)
+
+    print(f"   {total} points in {collection_name}; {len(results_a)} results for bot a, {len(results_b)} for bot b")
+    assert total == 20, f"expected 20 points for two bots, found {total}"
+    assert results_a and all(r["metadata"]["bot_id"] == "shared-bot-a" for r in results_a), "bot a lost its chunks"
+    assert results_b and all(r["metadata"]["bot_id"] == "shared-bot-b" for r in results_b)
+
+
+def test_document_listing_covers_every_file():
+    """A bot with more than 100 chunks lists every uploaded file, from the manifest and from a legacy rebuild"""
+    files = [f"file_{i}.txt" for i in range(4)]
+
+    async def run():
+        chat_service = make_chat_service()
+        texts, filenames = [], []
+        for filename in files:
+            for i in range(40):
+                texts.append(f"chunk {i} of {filename}")
+                filenames.append(filename)
+        await chat_service.process_documents("listing-bot", "user", texts, filenames)
+
+        async def allow(bot_id, user_id, token=None):
+            return {"bot_id": bot_id}
+
+        original_verify = chat_service.verify_bot_access
+        chat_service.verify_bot_access = allow
+        try:
+            from_manifest = (await chat_service.get_bot_documents("listing-bot", "user"))["documents"]
+            # A bot uploaded before the manifest existed has no entries and is rebuilt from its chunks
+            await chat_service.document_manifest.delete_bot_documents("listing-bot")
+            from_rebuild = (await chat_service.get_bot_documents("listing-bot", "user"))["documents"]
+        finally:
+            chat_service.verify_bot_access = original_verify
+        return from_manifest, from_rebuild
+
+    from_manifest, from_rebuild = asyncio.run(run())
+    print(f"   {len(from_manifest)} documents from the manifest, {len(from_rebuild)} from a rebuild")
+    for documents in (from_manifest, from_rebuild):
+        assert sorted(d["filename"] for d in documents) == files, f"missing files: {documents}"
+        assert all(d["chunk_count"] == 40 for d in documents)
+
+
+class FakeSupabaseTable:
+    """Just enough of the Supabase query builder for BotService.delete_bot"""
+
+    def delete(self):
+        return self
+
+    def eq(self, column, value):
+        return self
+
+    def execute(self):
+        return type("Response", (), {"data": [{"deleted": True}]})()
+
+
+def test_delete_bot_survives_registry_failure():
+    """Deleting a bot removes its vectors even when the registry can't record the version bump"""
+    from types import SimpleNamespace
+    from app.services.bot import BotService
+
+    async def run():
+        chat_service = make_chat_service()
+        bot_service = BotService()
+        registry = bot_service.bot_registry
+        await chat_service.process_documents("doomed-bot", "user", [f"doomed chunk {i}" for i in range(5)], ["d.txt"])
+        collection_name = chat_service._get_collection_name("doomed-bot")
+
+        async def user_bots(user_id, token=None):
+            return [{"bot_id": "doomed-bot"}]
+
+        async def unreachable(bot_id):
+            raise ConnectionError("simulated registry outage")
+
+        original_bots, original_bump = bot_service.auth_service.get_user_bots, registry.bump_content_version
+        original_client = bot_service.auth_service._client
+        bot_service.auth_service.get_user_bots = user_bots
+        bot_service.auth_service._client = SimpleNamespace(table=lambda name: FakeSupabaseTable())
+        registry.bump_content_version = unreachable
+        try:
+            await bot_service.delete_bot("doomed-bot", "user")
+        finally:
+            bot_service.auth_service.get_user_bots = original_bots
+            bot_service.auth_service._client = original_client
+            registry.bump_content_version = original_bump
+        return await chat_service.vector_store.collection_exists_async(collection_name)
+
+    exists = asyncio.run(run())
+    assert not exists, "the bot's collection survived a delete during a registry outage"
+
+
+if __name__ == "__main__":
+    run_tests([
+        test_chat_latency_during_upload,
+        test_new_model_loads_off_the_event_loop,
+        test_embedder_pool_keeps_the_model_it_returns,
+        test_retry_after_mid_batch_failure_does_not_duplicate,
+        test_sync_and_async_ingestion_write_alike,
+        test_embedding_cache_encodes_only_misses,
+        test_shared_collection_keeps_identical_chunks_per_bot,
+        test_document_listing_covers_every_file,
+        test_delete_bot_survives_registry_failure,
+    ])
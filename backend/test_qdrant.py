@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 Test script to verify Qdrant integration works correctly.
-Run this after setting up Qdrant to ensure everything is working.
+Run this after setting up Qdrant to ensure everything is working, or offline
+against embedded Qdrant with QDRANT_PATH=:memory:.
 """
 
 import asyncio
@@ -160,4 +161,5 @@ if __name__ == "__main__":
         print("1. Make sure Qdrant is running: docker-compose up -d qdrant")
         print("2. Check your .env file has correct Qdrant settings")
         print("3. Verify Qdrant is accessible: curl http://localhost:6333/health")
+        print("4. Or run without a server using embedded Qdrant: QDRANT_PATH=:memory: python test_qdrant.py")
         sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+Tests for the retrieval and answer path of ChatService: the exact-index,
+retrieval and answer caches, score fallback, hybrid search, reranking, MMR
+and context packing.
+
+These run against an in-memory Qdrant and a fake embedder (see testkit.py):
+
+    python test_retrieval.py
+"""
+
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+# testkit must come first: it configures the environment the app reads at import time
+from testkit import FakeEmbedder, make_chat_service, run_tests
+
+from app.services.chat import ChatService
+
+# Setup logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def test_concurrent_queries_share_model_calls():
+    """Concurrent query embeddings are coalesced into fewer model calls, each caller getting its own vector"""
+    n = 32
+
+    async def run():
+        chat_service = make_chat_service(seconds_per_text=0.002)
+        vector_store = chat_service.vector_store
+        embedder = vector_store.embedders.get()
+        queries = [f"concurrent question {i} {time.time()}" for i in range(n)]
+        calls_before = embedder.encode_calls
+        vectors = await asyncio.gather(*(vector_store.embed_query_async(q) for q in queries))
+        calls = embedder.encode_calls - calls_before
+        matches = all(np.allclose(v, embedder.encode([q])[0]) for q, v in zip(queries, vectors))
+        return calls, matches
+
+    calls, matches = asyncio.run(run())
+    print(f"   {n} concurrent queries encoded in {calls} model calls")
+    assert calls < n, "concurrent queries were not batched"
+    assert matches, "a caller received another query's vector"
+
+
+def test_query_cache_counts_expires_and_evicts():
+    """The query embedding cache counts hits and misses, expires entries after its TTL and evicts the LRU entry"""
+    from app.utils.cache import LRUCache
+
+    async def run():
+        chat_service = make_chat_service()
+        vector_store = chat_service.vector_store
+        embedder = vector_store.embedders.get()
+        original_cache = vector_store.query_cache
+        vector_store.query_cache = cache = LRUCache(max_entries=2, ttl_seconds=0.2)
+        try:
+            calls_before = embedder.encode_calls
+            await vector_store.embed_query_async("first question")
+            # Whitespace differences map to the same entry
+            await vector_store.embed_query_async("first   question ")
+            after_repeat = (cache.hits, cache.misses, embedder.encode_calls - calls_before)
+
+            await vector_store.embed_query_async("second question")
+            await vector_store.embed_query_async("third question")  # Evicts "first question"
+            await vector_store.embed_query_async("first question")
+            after_eviction = (cache.evictions, embedder.encode_calls - calls_before)
+
+            await asyncio.sleep(0.25)
+            await vector_store.embed_query_async("first question")
+            after_expiry = (cache.expirations, embedder.encode_calls - calls_before)
+        finally:
+            vector_store.query_cache = original_cache
+        return after_repeat, after_eviction, after_expiry
+
+    after_repeat, after_eviction, after_expiry = asyncio.run(run())
+    print(f"   (hits, misses, encodes) after repeat {after_repeat}; (evictions, encodes) after eviction "
+          f"{after_eviction}; (expirations, encodes) after expiry {after_expiry}")
+    assert after_repeat == (1, 1, 1), "the repeated question was not served from the cache"
+    assert after_eviction == (2, 4), "the least recently used question was not evicted"
+    assert after_expiry == (1, 5), "an expired entry was served"
+
+
+def test_query_cache_folds_case_only_for_uncased_models():
+    """Queries differing only in case share a cache entry for uncased models and not for cased ones"""
+
+    async def run(lowercases):
+        chat_service = make_chat_service()
+        vector_store = chat_service.vector_store
+        embedder = FakeEmbedder(lowercases=lowercases)
+        vector_store.embedders.add(embedder)
+        first = await vector_store.embed_query_async("Who founded ACME?")
+        second = await vector_store.embed_query_async("who founded acme?")
+        return embedder.encode_calls, np.allclose(first, second)
+
+    uncased_calls, uncased_same = asyncio.run(run(lowercases=True))
+    cased_calls, cased_same = asyncio.run(run(lowercases=False))
+    print(f"   model calls: {uncased_calls} uncased, {cased_calls} cased")
+    assert uncased_calls == 1 and uncased_same, "an uncased model re-encoded a case variant"
+    assert cased_calls == 2 and not cased_same, "a cased model was served another casing's vector"
+
+
+def test_exact_index_keyed_on_content_version():
+    """A cached exact index is only used for the content version it was loaded under"""
+
+    async def run():
+        chat_service = make_chat_service()
+        vector_store = chat_service.vector_store
+        await chat_service.process_documents("exact-bot", "user", [f"exact doc chunk {i}" for i in range(30)], ["exact.txt"])
+        collection_name = chat_service._get_collection_name("exact-bot")
+
+        async def searched_exactly(version: str) -> bool:
+            before = vector_store._search_counts["exact"]
+            await vector_store.search_async(collection_name, "exact doc", limit=3, bot_id="exact-bot", content_version=version)
+            await asyncio.gather(*list(vector_store._exact_loads.values()))
+            return vector_store._search_counts["exact"] > before
+
+        # First search loads the index in the background; the second uses it
+        used = [await searched_exactly("v1"), await searched_exactly("v1")]
+        # Another worker's upload changed the version: the index must be reloaded first
+        used += [await searched_exactly("v2"), await searched_exactly("v2")]
+        return used, dict(vector_store.exact_cache._loading)
+
+    used, loading = asyncio.run(run())
+    print(f"   exact index used per search: {used}")
+    assert used == [False, True, False, True], "the exact index ignored the content version"
+    assert not loading, "finished loads should not be tracked"
+
+
+def test_exact_index_remembers_empty_bots():
+    """Bots with no collection or no points yet are loaded once per content version, not on every query"""
+
+    async def run():
+        chat_service = make_chat_service()
+        vector_store = chat_service.vector_store
+        client = vector_store.async_client
+        await vector_store.create_collection_async("empty-collection")
+        original_count = client.count
+        counts = []
+
+        async def counting_count(*args, **kwargs):
+            counts.append(args[0] if args else kwargs.get("collection_name"))
+            return await original_count(*args, **kwargs)
+
+        client.count = counting_count
+        for collection_name in ("missing-collection", "empty-collection"):
+            for version in ("v1", "v1", "v1", "v2"):
+                await vector_store.search_async(collection_name, "anything", limit=3, bot_id="empty-bot", content_version=version)
+                await asyncio.gather(*list(vector_store._exact_loads.values()))
+        return counts, vector_store.exact_cache.get_stats()
+
+    counts, stats = asyncio.run(run())
+    print(f"   exact-index loads: {counts}; {stats['empty']} empty entries")
+    assert counts.count("missing-collection") == 2, "a missing collection was re-counted on every query"
+    assert counts.count("empty-collection") == 2, "an empty collection was re-counted on every query"
+    assert stats["empty"] == 2
+
+
+def test_retrieval_cache_invalidated_by_upload():
+    """Repeated questions are answered from the retrieval cache until the bot's documents change"""
+    from app.models.bot import RetrievalPolicy
+
+    async def run():
+        chat_service = make_chat_service()
+        vector_store = chat_service.vector_store
+        original_search = vector_store.search_async
+        searches = []
+
+        async def counting_search(*args, **kwargs):
+            searches.append(kwargs.get("limit"))
+            return await original_search(*args, **kwargs)
+
+        vector_store.search_async = counting_search
+        try:
+            await chat_service.process_documents("cache-bot", "user", [f"first doc chunk {i}" for i in range(20)], ["first.txt"])
+            # The answer cache would answer the repeat before retrieval is reached
+            await chat_service.bot_registry.set_retrieval_policy("cache-bot", RetrievalPolicy(answer_cache=False))
+            await chat_service.get_response("cache-bot", None, "What is in the documents?")
+            first = len(searches)
+            # Same question modulo case and whitespace
+            await chat_service.get_response("cache-bot", None, "what is in  the documents?")
+            repeated = len(searches)
+
+            await chat_service.process_documents("cache-bot", "user", [f"second doc chunk {i}" for i in range(20)], ["second.txt"])
+            await chat_service.get_response("cache-bot", None, "What is in the documents?")
+            after_upload = len(searches)
+
+            # An upload handled by another worker: this worker's profile cache still holds the old version
+            registry = chat_service.bot_registry
+            stale_profile = await registry.get_profile("cache-bot")
+            await registry.bump_content_version("cache-bot")
+            registry._cache.set("cache-bot", stale_profile)
+            # ...until the revalidation window has passed
+            registry._validated_at.pop("cache-bot")
+            await chat_service.get_response("cache-bot", None, "What is in the documents?")
+            after_remote_upload = len(searches)
+
+            # Within the window, chats reuse the cached profile instead of reading the registry
+            original_retrieve = registry.vector_store.async_client.retrieve
+            retrieves = []
+
+            async def counting_retrieve(*args, **kwargs):
+                retrieves.append(kwargs.get("collection_name"))
+                return await original_retrieve(*args, **kwargs)
+
+            registry.vector_store.async_client.retrieve = counting_retrieve
+            try:
+                for _ in range(5):
+                    await chat_service.get_response("cache-bot", None, "What is in the documents?")
+            finally:
+                registry.vector_store.async_client.retrieve = original_retrieve
+            registry_reads = retrieves.count(registry.collection_name)
+        finally:
+            vector_store.search_async = original_search
+        return first, repeated, after_upload, after_remote_upload, registry_reads, chat_service.retrieval_cache.get_stats()
+
+    first, repeated, after_upload, after_remote_upload, registry_reads, stats = asyncio.run(run())
+    print(f"   searches: {first} first, {repeated} after repeat, {after_upload} after upload, "
+          f"{after_remote_upload} after another worker's upload; hit rate {stats['hit_rate']:.2f}; "
+          f"{registry_reads} registry reads in 5 chats")
+    assert first > 0, "the first question did not search"
+    assert repeated == first, "the repeated question was not served from the cache"
+    assert after_upload > repeated, "cached results survived an upload"
+    assert after_remote_upload > after_upload, "cached results survived an upload in another worker"
+    assert registry_reads <= 1, "every chat read the bot registry"
+    assert stats["hits"] > 0 and "memory_mb" in stats
+
+
+def test_low_score_fallback_uses_one_search():
+    """When nothing clears the bot's threshold, the fallback chunks come from the same search"""
+    from app.models.bot import RetrievalPolicy
+
+    async def run():
+        chat_service = make_chat_service()
+        vector_store = chat_service.vector_store
+        await chat_service.process_documents("policy-bot", "user", [f"policy chunk {i}" for i in range(30)], ["policy.txt"])
+        # Random fake vectors never reach a score of 1.0, so every question takes the fallback branch
+        await chat_service.bot_registry.set_retrieval_policy("policy-bot", RetrievalPolicy(k=3, score_threshold=1.0, fallback_k=6))
+
+        original_search = vector_store.search_async
+        searches = []
+        prompts = []
+
+        async def counting_search(*args, **kwargs):
+            searches.append(kwargs.get("limit"))
+            return await original_search(*args, **kwargs)
+
+        async def capture_prompt(prompt: str, context: str = "") -> str:
+            prompts.append(prompt)
+            return "ok"
+
+        vector_store.search_async = counting_search
+        chat_service.ai_service.generate_response = capture_prompt
+        try:
+            await chat_service.get_response("policy-bot", None, "anything about the policy?")
+        finally:
+            vector_store.search_async = original_search
+        return searches, prompts
+
+    searches, prompts = asyncio.run(run())
+    print(f"   search limits: {searches}")
+    assert searches == [6], f"expected one search for the fallback k, got {searches}"
+    assert prompts and prompts[0].count("- policy chunk") == 6, "fallback context should hold fallback_k chunks"
+
+
+def test_hybrid_search_finds_exact_codes():
+    """The sparse leg surfaces a chunk containing a product code, which random dense vectors can't"""
+
+    async def run():
+        chat_service = make_chat_service()
+        vector_store = chat_service.vector_store
+        texts = [f"General information paragraph number {i} about our products." for i in range(60)]
+        texts[37] = "The SKU for the 500ml stainless steel bottle is BTL-500-SS."
+        await chat_service.process_documents("hybrid-bot", "user", texts, ["catalog.txt"])
+        collection_name = chat_service._get_collection_name("hybrid-bot")
+
+        hybrid = await vector_store.search_async(collection_name, "price of btl-500-ss", limit=5, bot_id="hybrid-bot", mode="hybrid")
+        dense = await vector_store.search_async(collection_name, "price of btl-500-ss", limit=5, bot_id="hybrid-bot")
+        return hybrid, dense
+
+    hybrid, dense = asyncio.run(run())
+    hybrid_rank = next((i for i, r in enumerate(hybrid) if "BTL-500-SS" in r["text"]), None)
+    dense_rank = next((i for i, r in enumerate(dense) if "BTL-500-SS" in r["text"]), None)
+    print(f"   SKU chunk rank: hybrid {hybrid_rank}, dense {dense_rank}")
+    # RRF scores a leg's top hit 1/(k+1), so the lexical match ties with the best dense hit
+    assert hybrid_rank is not None and hybrid_rank <= 1, "hybrid search did not surface the SKU chunk"
+    assert all(-1.0 <= r["score"] <= 1.0 for r in hybrid), "hybrid results should keep cosine scores"
+
+
+def test_hybrid_keeps_lexical_hits_below_threshold():
+    """Top lexical matches reach the prompt in hybrid mode even when their dense cosine is under the threshold"""
+    from app.models.bot import RetrievalPolicy
+
+    rng = np.random.default_rng(1)
+    results = [{"text": f"general chunk {i}", "score": 0.6 - i * 0.02, "vector": rng.standard_normal(384)} for i in range(7)]
+    # The only chunk naming the SKU, ranked first by the sparse leg, scores low on cosine
+    results.insert(1, {"text": "BTL-500-SS ships with a steel lid", "score": 0.05, "vector": rng.standard_normal(384), "sparse_rank": 1})
+
+    chat_service = ChatService()
+    selected = {}
+    for mode in ("dense", "hybrid"):
+        for mmr in (False, True):
+            policy = RetrievalPolicy(k=3, mode=mode, mmr=mmr, score_threshold=0.2)
+            chunks = asyncio.run(chat_service._select_chunks("BTL-500-SS lid", results, policy))
+            selected[(mode, mmr)] = any("BTL-500-SS" in r["text"] for r in chunks)
+
+    print(f"   SKU chunk selected: {selected}")
+    assert selected[("hybrid", False)] and selected[("hybrid", True)], "hybrid mode dropped the lexical match"
+    assert not selected[("dense", False)], "dense mode should still apply the threshold"
+
+
+class FakeCrossEncoder:
+    """Scores a pair by whether the chunk mentions the first query word, after a fixed delay"""
+
+    def __init__(self, seconds: float = 0.0):
+        self.seconds = seconds
+
+    def predict(self, pairs, batch_size: int = 32, show_progress_bar: bool = False):
+        time.sleep(self.seconds)
+        return [1.0 if query.split()[0] in text else 0.0 for query, text in pairs]
+
+
+def test_rerank_respects_time_budget():
+    """Reranking reorders candidates within budget and is skipped, keeping search order, when too slow"""
+    from app.services.reranker import Reranker
+
+    reranker = Reranker()
+    candidates = [{"text": f"chunk {i} about shipping"} for i in range(7)] + [{"text": "chunk about refunds"}]
+
+    async def run(seconds: float):
+        reranker.model = FakeCrossEncoder(seconds)
+        return await reranker.rerank("refunds policy", candidates, top_n=3)
+
+    original_model, original_budget = reranker.model, reranker.budget_seconds
+    reranker.budget_seconds = 0.05
+    reranker._seconds_per_pair = None
+    try:
+        fast = asyncio.run(run(0.0))
+        slow = asyncio.run(run(0.2))
+        # Let the timed-out batch finish; it teaches the estimator that this batch can't fit
+        reranker._executor.submit(lambda: None).result()
+        skipped = asyncio.run(run(0.0))
+        stats = reranker.get_stats()
+    finally:
+        reranker.model, reranker.budget_seconds = original_model, original_budget
+        reranker._seconds_per_pair = None
+
+    print(f"   fast top: {fast[0]['text']!r}, slow: {slow}, stats: reranked={stats['reranked']} timeouts={stats['timeouts']} skipped={stats['skipped_budget']}")
+    assert len(fast) == 3 and fast[0]["text"] == "chunk about refunds", "rerank did not promote the relevant chunk"
+    assert slow is None, "a rerank over budget should be skipped"
+    assert skipped is None, "the cost estimate should skip reranks that can't fit the budget"
+    assert stats["timeouts"] >= 1 and stats["skipped_budget"] >= 1
+
+
+def test_skipped_rerank_keeps_top_n_and_retries_load():
+    """A skipped rerank still cuts the pool to rerank_top_n, and a failed model load is retried later"""
+    from app.models.bot import RetrievalPolicy
+
+    chat_service = ChatService()
+    reranker = chat_service.reranker
+    results = [{"text": f"chunk {i}", "score": 0.9 - i * 0.01} for i in range(8)]
+    policy = RetrievalPolicy(k=5, fallback_k=8, mmr=False, rerank=True, rerank_top_n=3)
+
+    original_model, original_name = reranker.model, reranker.model_name
+    reranker.model, reranker.model_name = None, "/nonexistent/rerank-model"
+    try:
+        selected = asyncio.run(chat_service._select_chunks("question", results, policy))
+        loader = reranker._loader
+        if loader is not None:
+            loader.join(timeout=30)
+        failures, retry_in = reranker._load_failures, reranker._next_load_at - time.monotonic()
+        loader_reset = reranker._loader is None
+    finally:
+        reranker.model, reranker.model_name = original_model, original_name
+        reranker._load_failures, reranker._next_load_at, reranker._loader = 0, 0.0, None
+
+    print(f"   {len(selected)} chunks kept; load failures {failures}, retry in {retry_in:.0f}s")
+    assert [r["text"] for r in selected] == ["chunk 0", "chunk 1", "chunk 2"], "a skipped rerank sent the whole pool"
+    assert failures == 1 and loader_reset and retry_in > 0, "a failed load should be retried after a backoff"
+
+
+def test_mmr_drops_near_duplicate_chunks():
+    """Overlapping chunks with almost the same vector take one prompt slot, not several"""
+    from app.models.bot import RetrievalPolicy
+
+    rng = np.random.default_rng(0)
+    base, other = rng.standard_normal(384), rng.standard_normal(384)
+    results = [
+        {"text": "refunds take 5 days", "score": 0.80, "vector": base},
+        {"text": "refunds take 5 days, processed", "score": 0.79, "vector": base + 0.01 * rng.standard_normal(384)},
+        {"text": "days, processed by finance", "score": 0.78, "vector": base + 0.01 * rng.standard_normal(384)},
+        {"text": "shipping is free over $50", "score": 0.60, "vector": other},
+    ]
+    chat_service = make_chat_service()
+    with_mmr = asyncio.run(chat_service._select_chunks("refunds?", results, RetrievalPolicy(k=3)))
+    without_mmr = asyncio.run(chat_service._select_chunks("refunds?", results, RetrievalPolicy(k=3, mmr=False)))
+
+    print(f"   with MMR: {[r['text'] for r in with_mmr]}")
+    assert [r["text"] for r in with_mmr] == ["refunds take 5 days", "shipping is free over $50"]
+    assert len(without_mmr) == 3 and all("refunds" in r["text"] or "days" in r["text"] for r in without_mmr)
+
+
+def test_context_packed_into_token_budget():
+    """The prompt context stays within the bot's token budget and ends on a sentence boundary"""
+    from app.models.bot import RetrievalPolicy
+    from app.services.context_packer import estimate_tokens
+
+    async def run():
+        chat_service = make_chat_service()
+        sentence = "Orders ship from our warehouse within two business days. "
+        texts = [f"Chunk {i}. " + sentence * 20 for i in range(10)]
+        await chat_service.process_documents("budget-bot", "user", texts, ["shipping.txt"])
+        # Threshold 1.0 sends every question to the fallback (8 chunks, ~2400 tokens)
+        policy = RetrievalPolicy(score_threshold=1.0, mmr=False, context_token_budget=400)
+        await chat_service.bot_registry.set_retrieval_policy("budget-bot", policy)
+
+        prompts = []
+
+        async def capture_prompt(prompt: str, context: str = "") -> str:
+            prompts.append(prompt)
+            return "ok"
+
+        chat_service.ai_service.generate_response = capture_prompt
+        await chat_service.get_response("budget-bot", None, "how fast do orders ship?")
+        return prompts[0]
+
+    prompt = asyncio.run(run())
+    context = prompt.split("Document Context:")[1].split("User Question:")[0].strip()
+    chunks = [chunk[2:] for chunk in context.split("\n\n")]
+    tokens = sum(estimate_tokens(chunk) for chunk in chunks)
+    print(f"   {len(chunks)} chunks, ~{tokens} context tokens")
+    assert tokens <= 400, f"context of ~{tokens} tokens exceeds the 400 token budget"
+    assert len(chunks) == 2 and chunks[-1].endswith("."), "the last chunk should be trimmed at a sentence end"
+
+
+def test_answer_cache_reuses_answers_until_upload():
+    """Near-duplicate questions reuse the earlier answer; uploads and the per-bot opt-out bypass the cache"""
+    from app.models.bot import RetrievalPolicy
+
+    async def run():
+        chat_service = make_chat_service()
+        llm_calls = []
+
+        async def counting_generate(prompt: str, context: str = "") -> str:
+            llm_calls.append(prompt)
+            return f"answer {len(llm_calls)}"
+
+        chat_service.ai_service.generate_response = counting_generate
+        await chat_service.process_documents("answer-bot", "user", [f"first doc chunk {i}" for i in range(20)], ["first.txt"])
+        answers = [
+            await chat_service.get_response("answer-bot", None, "How do I reset my password?"),
+            # Same question modulo case and whitespace, so the same embedding
+            await chat_service.get_response("answer-bot", None, "how do I reset  my password?"),
+            await chat_service.get_response("answer-bot", None, "Where is my order?"),
+        ]
+        calls_before_upload = len(llm_calls)
+
+        await chat_service.process_documents("answer-bot", "user", [f"second doc chunk {i}" for i in range(20)], ["second.txt"])
+        answers.append(await chat_service.get_response("answer-bot", None, "How do I reset my password?"))
+        calls_after_upload = len(llm_calls)
+
+        await chat_service.bot_registry.set_retrieval_policy("answer-bot", RetrievalPolicy(answer_cache=False))
+        await chat_service.get_response("answer-bot", None, "How do I reset my password?")
+        await chat_service.get_response("answer-bot", None, "How do I reset my password?")
+        return answers, calls_before_upload, calls_after_upload, len(llm_calls), chat_service.answer_cache.get_stats()
+
+    answers, before_upload, after_upload, opted_out, stats = asyncio.run(run())
+    print(f"   LLM calls: {before_upload} for 3 questions, {after_upload} after upload, {opted_out} after opt-out; "
+          f"hit rate {stats['hit_rate']:.2f}")
+    assert answers[1] == answers[0] and before_upload == 2, "the near-duplicate question called the LLM again"
+    assert answers[2] != answers[0], "a different question got a cached answer"
+    assert after_upload == 3 and answers[3] != answers[0], "a cached answer survived an upload"
+    assert opted_out == 5, "the opt-out bot was answered from the cache"
+    assert stats["hits"] == 1 and "saved_llm_seconds" in stats
+
+
+def test_answer_cache_covers_bots_without_content_version():
+    """Chats never write the registry; bots without a content version are cached once it is backfilled"""
+
+    async def run():
+        chat_service = make_chat_service()
+        registry = chat_service.bot_registry
+        llm_calls = []
+
+        async def counting_generate(prompt: str, context: str = "") -> str:
+            llm_calls.append(prompt)
+            return "ok"
+
+        chat_service.ai_service.generate_response = counting_generate
+        await chat_service.process_documents("legacy-bot", "user", [f"legacy doc chunk {i}" for i in range(10)], ["old.txt"])
+        legacy_profile = (await registry.get_profile("legacy-bot")).model_copy(update={"content_version": ""})
+        await registry.save_profile(legacy_profile)
+        client = chat_service.vector_store.async_client
+        registry_points = (await client.count(registry.collection_name, exact=True)).count
+
+        question = "What changed in the last release?"
+        for bot_id in ("legacy-bot", "legacy-bot", "made-up-bot-1", "made-up-bot-2"):
+            await chat_service.get_response(bot_id, None, question)
+        calls_before_backfill = len(llm_calls)
+        points_after_chats = (await client.count(registry.collection_name, exact=True)).count
+
+        updated = await registry.backfill_content_versions()
+        await chat_service.get_response("legacy-bot", None, question)
+        await chat_service.get_response("legacy-bot", None, question)
+        return calls_before_backfill, len(llm_calls), registry_points, points_after_chats, updated
+
+    before, after, registry_points, points_after_chats, updated = asyncio.run(run())
+    print(f"   LLM calls: {before} before backfill, {after} after; registry points {registry_points} -> {points_after_chats}")
+    assert points_after_chats == registry_points, "chats wrote profiles to the registry"
+    assert before == 2, "a bot without a content version should not use the answer cache"
+    assert updated == 1 and after == before + 1, "the backfilled bot was not served from the answer cache"
+
+
+if __name__ == "__main__":
+    run_tests([
+        test_concurrent_queries_share_model_calls,
+        test_query_cache_counts_expires_and_evicts,
+        test_query_cache_folds_case_only_for_uncased_models,
+        test_exact_index_keyed_on_content_version,
+        test_exact_index_remembers_empty_bots,
+        test_retrieval_cache_invalidated_by_upload,
+        test_low_score_fallback_uses_one_search,
+        test_hybrid_search_finds_exact_codes,
+        test_hybrid_keeps_lexical_hits_below_threshold,
+        test_rerank_respects_time_budget,
+        test_skipped_rerank_keeps_top_n_and_retries_load,
+        test_mmr_drops_near_duplicate_chunks,
+        test_context_packed_into_token_budget,
+        test_answer_cache_reuses_answers_until_upload,
+        test_answer_cache_covers_bots_without_content_version,
+    ])
@@ -0,0 +1,89 @@
+"""
+Shared fakes for the offline test scripts (test_ingestion.py, test_retrieval.py).
+
+Chat services built here use an in-memory Qdrant, a fake embedder and a stubbed
+LLM, so the tests need neither a Qdrant server nor any model downloads.
+"""
+
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+
+# Measure real encode work, not the persistent chunk embedding cache
+os.environ["EMBEDDING_CACHE_PATH"] = ""
+
+from app.core.config import get_settings
+from app.services.chat import ChatService
+from app.services.embedders import Embedder
+
+
+class FakeEmbedder(Embedder):
+    """Deterministic embedder that burns wall-clock time like a real model would.
+
+    Uncased by default, like the MiniLM model it stands in for.
+    """
+
+    backend = "fake"
+
+    def __init__(self, seconds_per_text: float = 0.0, lowercases: bool = True):
+        super().__init__(get_settings().EMBEDDING_MODEL_NAME)
+        self.dimension = 384
+        self.lowercases = lowercases
+        self.seconds_per_text = seconds_per_text
+        self.texts_encoded = 0
+        self.encode_calls = 0
+
+    def encode(self, texts, batch_size: int = 32) -> np.ndarray:
+        self.encode_calls += 1
+        self.texts_encoded += len(texts)
+        # time.sleep releases the GIL, like torch/onnxruntime kernels do
+        time.sleep(self.seconds_per_text * len(texts))
+        vectors = []
+        for text in texts:
+            text = " ".join(text.split())
+            if self.lowercases:
+                text = text.lower()
+            seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:4], "little")
+            vectors.append(np.random.default_rng(seed).standard_normal(self.dimension))
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_chat_service(seconds_per_text: float = 0.0) -> ChatService:
+    chat_service = ChatService()
+    vector_store = chat_service.vector_store
+    vector_store.embedders.add(FakeEmbedder(seconds_per_text))
+    vector_store._async_client = AsyncQdrantClient(location=":memory:")
+    vector_store._embedding_cache = None
+    chat_service.bot_registry._collection_ready = False
+    chat_service.bot_registry._cache.clear()
+    chat_service.bot_registry._validated_at.clear()
+    chat_service.document_manifest._collection_ready = False
+    vector_store.query_cache.clear()
+    chat_service.retrieval_cache.clear()
+    chat_service.answer_cache.clear()
+
+    async def fake_generate_response(prompt: str, context: str = "") -> str:
+        return "ok"
+
+    chat_service.ai_service.generate_response = fake_generate_response
+    return chat_service
+
+
+def run_tests(tests):
+    """Run test functions script-style and exit non-zero if any failed"""
+    failed = 0
+    for test in tests:
+        print(f"🔍 {test.__name__}")
+        try:
+            test()
+            print("✅ passed")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ failed: {e}")
+
+    sys.exit(1 if failed else 0)